@@ -9,16 +9,31 @@ Input:
   data/step1_launches.json
   data/step2_near_grad.json
   data/step3_price_action.json
+  data/candles/             (candle_store.py; path-dependent ladder and momentum filter)
+  data/creator_index/       (creator_index.py; built from the launches if missing)
 
 Output:
   output/analysis_report.md
 """
 
+import argparse
+import itertools
 import json
 import os
 import sys
+from concurrent.futures import ProcessPoolExecutor
 from statistics import mean, median
 
+from candle_store import POST_MINUTES, open_store
+from creator_index import RUGGER_MAX_GRAD_RATE, RUGGER_MIN_LAUNCHES, load_index, serial_rugger_mints
+from metrics import METRICS
+from resample import bootstrap_q1_ev, bootstrap_strategy_ci, simulate_portfolio
+from profiling import profile_run
+from simulator import check_ladder, gather, simulate_ladder_returns
+from step2_near_graduation import reached_pct
+from sketches import TDigest, group_by_day, load_range, save_day_summary
+from slot_time import day_label
+
 os.makedirs("output", exist_ok=True)
 
 
@@ -27,7 +42,7 @@ def load_json(filename):
     if not os.path.exists(path):
         print(f"WARNING: {path} not found.")
         return None
-    with open(path) as f:
+    with open(path) as f, METRICS.timed_op("json_load"):
         return json.load(f)
 
 
@@ -49,7 +64,7 @@ def analyze_q1(launches, near_grad_data, price_data):
     # Build mint -> price_action map
     price_map = {r["mint"]: r for r in price_tokens}
 
-    tokens_90plus = [t for t in near_grad_tokens if (t.get("grad_pct") or 0) >= 90]
+    tokens_90plus = [t for t in near_grad_tokens if reached_pct(t) >= 90]
     tokens_90plus_graduated = [t for t in tokens_90plus if t.get("status") == "graduated"]
 
     grad_rate_90plus = len(tokens_90plus_graduated) / len(tokens_90plus) * 100 if tokens_90plus else 0
@@ -76,6 +91,10 @@ def analyze_q1(launches, near_grad_data, price_data):
         "p_loss": round(p_loss, 4),
         "ev_net_multiplier": round(ev_90, 4),
         "verdict": "BUY" if ev_90 > 0.1 else "PASS" if ev_90 > -0.1 else "AVOID",
+        "ci": bootstrap_q1_ev(
+            [t.get("status") == "graduated" for t in tokens_90plus],
+            [r["peak_30min_mult"] for r in perf_90plus if r.get("peak_30min_mult")],
+        ),
     }
 
 
@@ -93,8 +112,21 @@ def strategy_a_quick_flip(price_tokens):
     return returns
 
 
-def strategy_b_ladder_sell(price_tokens):
-    """50% at 2x, 25% at 5x, 25% hold with -60% stop loss."""
+def strategy_b_ladder_sell(price_tokens, take_profits=(2.0, 5.0), tranches=(0.50, 0.25),
+                           stop_loss=-0.60, path_dependent=False, store=None):
+    """
+    Ladder out: sell tranches[i] at take_profits[i] (default 50% at 2x, 25% at 5x),
+    hold the remainder to 24h with a stop_loss floor (default -60%).
+
+    path_dependent=True replays the candles in time order via simulator.py instead
+    of assuming every take-profit below the 30-min peak was hit.
+    """
+    check_ladder(take_profits, tranches)
+    if path_dependent:
+        return simulate_ladder_returns(price_tokens, take_profits, tranches, stop_loss,
+                                       store=store)
+
+    hold_size = 1.0 - sum(tranches)
     returns = []
     for r in price_tokens:
         grad_price = r.get("grad_price")
@@ -102,19 +134,20 @@ def strategy_b_ladder_sell(price_tokens):
             continue
         peak_mult = r.get("peak_30min_mult") or 1.0
 
-        # Tranche 1: 50% — sell at 2x if reached, else at peak
-        ret_t1 = (min(peak_mult, 2.0) - 1.0)
-        # Tranche 2: 25% — sell at 5x if reached, else at peak
-        ret_t2 = (min(peak_mult, 5.0) - 1.0)
-        # Tranche 3: 25% — hold with -60% stop
+        # Ladder tranches — sell at the take-profit if reached, else at peak
+        blended = sum(
+            size * (min(peak_mult, tp) - 1.0)
+            for tp, size in zip(take_profits, tranches)
+        )
+        # Remainder — hold with stop
         change_24h_raw = r.get("change_24h_pct")
         if change_24h_raw is not None:
-            ret_t3 = max(change_24h_raw / 100, -0.60)
+            ret_hold = max(change_24h_raw / 100, stop_loss)
         else:
-            ret_t3 = -0.60  # assume stop triggered if no data
+            ret_hold = stop_loss  # assume stop triggered if no data
 
-        blended = (0.50 * ret_t1 + 0.25 * ret_t2 + 0.25 * ret_t3) * 100
-        returns.append(blended)
+        blended += hold_size * ret_hold
+        returns.append(blended * 100)
     return returns
 
 
@@ -128,21 +161,26 @@ def strategy_c_hold_24h(price_tokens):
     return returns
 
 
-def strategy_d_momentum_filter(price_tokens):
-    """Only buy if price UP >20% in first 5 min post-grad, then hold 24h."""
+def strategy_d_momentum_filter(price_tokens, window_min=5, threshold_pct=20, store=None):
+    """Only buy if price UP >threshold_pct in first window_min min post-grad, then hold 24h."""
+    minute = (store or open_store())["minute"]
+    tokens = [r for r in price_tokens if r.get("grad_price") and r["grad_price"] > 0]
+    if not tokens or not 0 < window_min <= POST_MINUTES:
+        return []
+    # Row of the window's last 1-min candle per token (-1: fewer than window_min candles)
+    last = minute.first_rows([r.get("pair_address") for r in tokens],
+                             [r.get("graduation_time") or 0 for r in tokens], window_min)[:, -1]
+    closes = gather(minute.ohlcv[:, 3], last)
     returns = []
-    for r in price_tokens:
-        grad_price = r.get("grad_price")
-        if not grad_price or grad_price <= 0:
+    for r, row, price_at_window in zip(tokens, last.tolist(), closes.tolist()):
+        if row < 0:
             continue
-        candles = r.get("post_30min_candles", [])
-        if len(candles) >= 5:
-            price_at_5min = candles[4][4]  # close of 5th candle
-            pct_5min = (price_at_5min - grad_price) / grad_price * 100
-            if pct_5min > 20:
-                ch = r.get("change_24h_pct")
-                if ch is not None:
-                    returns.append(ch)
+        grad_price = r["grad_price"]
+        pct_window = (price_at_window - grad_price) / grad_price * 100
+        if pct_window > threshold_pct:
+            ch = r.get("change_24h_pct")
+            if ch is not None:
+                returns.append(ch)
     return returns
 
 
@@ -172,21 +210,46 @@ def compute_strategy_stats(returns, label):
     }
 
 
-def analyze_q2(price_data):
-    price_tokens = price_data.get("tokens", []) if price_data else []
+STRATEGY_KEYS = ("a_quick_flip", "b_ladder_sell", "c_hold_24h", "d_momentum_filter")
+
+
+def strategy_returns(price_tokens, path_dependent=False):
+    """Per-trade returns (%) of strategies A-D, in STRATEGY_KEYS order."""
+    return (
+        strategy_a_quick_flip(price_tokens),
+        strategy_b_ladder_sell(price_tokens, path_dependent=path_dependent),
+        strategy_c_hold_24h(price_tokens),
+        strategy_d_momentum_filter(price_tokens),
+    )
+
 
-    strat_a = strategy_a_quick_flip(price_tokens)
-    strat_b = strategy_b_ladder_sell(price_tokens)
-    strat_c = strategy_c_hold_24h(price_tokens)
-    strat_d = strategy_d_momentum_filter(price_tokens)
+def analyze_q2(price_data, path_dependent=False, mc_params=None):
+    """
+    Score strategies A-D. Each stats dict also carries bootstrap CIs ("ci") and,
+    unless mc_params is False, a Monte Carlo bankroll run ("monte_carlo") using
+    mc_params as keyword arguments to resample.simulate_portfolio.
+    """
+    price_tokens = price_data.get("tokens", []) if price_data else []
+    strat_a, strat_b, strat_c, strat_d = strategy_returns(price_tokens, path_dependent)
 
     strategies = [
         compute_strategy_stats(strat_a, "Strategy A: Quick Flip (buy@grad, sell@15min)"),
-        compute_strategy_stats(strat_b, "Strategy B: Ladder Sell (50%@2x, 25%@5x, 25% stop-60%)"),
+        compute_strategy_stats(
+            strat_b,
+            "Strategy B: Ladder Sell (50%@2x, 25%@5x, 25% stop-60%)"
+            + (" [path-dependent]" if path_dependent else ""),
+        ),
         compute_strategy_stats(strat_c, "Strategy C: Hold 24h (buy@grad, sell@24h)"),
         compute_strategy_stats(strat_d, "Strategy D: Momentum Filter (>20% in 5min, hold 24h)"),
     ]
 
+    for key, stats, returns in zip(STRATEGY_KEYS, strategies, (strat_a, strat_b, strat_c, strat_d)):
+        stats["key"] = key
+        stats["wins"] = sum(1 for r in returns if r > 0)
+        stats["ci"] = bootstrap_strategy_ci(returns)
+        if mc_params is not False:
+            stats["monte_carlo"] = simulate_portfolio(returns, **(mc_params or {}))
+
     ranked = sorted(
         [s for s in strategies if s["expected_value"] is not None],
         key=lambda s: s["expected_value"],
@@ -196,16 +259,286 @@ def analyze_q2(price_data):
     return strategies, ranked
 
 
+# ── Creator filter: serial ruggers ───────────────────────────────────────────
+
+def creator_filter(launches, min_launches=RUGGER_MIN_LAUNCHES, max_grad_rate=RUGGER_MAX_GRAD_RATE):
+    """
+    Serial-rugger launches from the creator index: tokens whose creator had at
+    least min_launches earlier launches graduating at ≤ max_grad_rate. Only
+    launches before each token count, and one of them counts as graduated only
+    if its pair was created before the token launched, so the filter is usable
+    at entry.
+    """
+    index = load_index(launches)
+    mints = serial_rugger_mints(index.history(), min_launches, max_grad_rate)
+    creator_of = {t["mint"]: t.get("creator") for t in launches}
+    agg = index.aggregates()
+    top = sorted(range(len(agg["creator"])), key=lambda i: -agg["launches"][i])[:10]
+    return {
+        "mints": mints,
+        "min_launches": min_launches,
+        "max_grad_rate": max_grad_rate,
+        "creators": len({creator_of.get(m) for m in mints} - {None}),
+        "launches": sum(1 for t in launches if t["mint"] in mints),
+        "top_creators": [{"creator": str(agg["creator"][i]),
+                          "launches": int(agg["launches"][i]),
+                          "graduated": int(agg["graduated"][i]),
+                          "grad_rate": float(agg["grad_rate"][i]),
+                          "median_grad_pct": float(agg["median_grad_pct"][i]),
+                          "median_peak_grad_pct": float(agg["median_peak_grad_pct"][i])}
+                         for i in top],
+    }
+
+
+def without_mints(data, key, mints):
+    """Copy of a step2/step3 payload with `mints` dropped from its token list."""
+    if not data:
+        return data
+    return dict(data, **{key: [t for t in data.get(key, []) if t["mint"] not in mints]})
+
+
+def compare_creator_filter(launches, near_grad_data, price_data, creators, path_dependent=False):
+    """Q1 / Q2 headline numbers with and without the serial-rugger launches."""
+    mints = creators["mints"]
+    kept_near = without_mints(near_grad_data, "near_grad_tokens", mints)
+    kept_price = without_mints(price_data, "tokens", mints)
+    rows = {}
+    for name, near, price in (("all", near_grad_data, price_data),
+                              ("excluding_ruggers", kept_near, kept_price)):
+        q1 = analyze_q1(launches, near, price)
+        strategies, _ = analyze_q2(price, path_dependent=path_dependent, mc_params=False)
+        rows[name] = {"q1": q1, "strategies": strategies}
+    return rows
+
+
+def save_strategy_sketches(price_data, launches, path_dependent=False):
+    """
+    Persist each strategy's return digest and win/n counters per launch day
+    (graduation day when the launch is unknown). Returns the paths written.
+    """
+    launch_time = {t["mint"]: t.get("block_time") for t in launches}
+    price_tokens = price_data.get("tokens", []) if price_data else []
+    paths = []
+    for day, tokens in sorted(group_by_day(
+            price_tokens, lambda r: launch_time.get(r["mint"]) or r.get("graduation_time")).items()):
+        counters, sketches = {}, {}
+        for key, returns in zip(STRATEGY_KEYS, strategy_returns(tokens, path_dependent)):
+            counters[f"{key}_n"] = len(returns)
+            counters[f"{key}_wins"] = sum(1 for r in returns if r > 0)
+            sketches[f"{key}_returns"] = TDigest().update(returns)
+        paths.append(save_day_summary("analyze", day, counters, sketches))
+    return paths
+
+
+def strategy_stats_from_summary(counters, sketches, key, label):
+    """compute_strategy_stats equivalent built from merged day summaries."""
+    n = counters.get(f"{key}_n", 0)
+    td = sketches.get(f"{key}_returns")
+    if not n or td is None or not td.count:
+        return compute_strategy_stats([], label)
+    avg_ret = td.mean()
+    return {
+        "label": label,
+        "n": n,
+        "win_rate": round(counters.get(f"{key}_wins", 0) / n * 100, 2),
+        "avg_return": round(avg_ret, 2),
+        "median_return": round(td.median(), 2),
+        "expected_value": round(avg_ret, 2),
+        "max_drawdown": round(td.min, 2),
+        "verdict": "BUY" if avg_ret > 10 else "PASS" if avg_ret > 0 else "AVOID",
+    }
+
+
+def range_strategy_stats(start_day, end_day):
+    """Strategy stats across a day range, computed from persisted sketches only."""
+    counters, sketches, _ = load_range("analyze", start_day, end_day)
+    keys = sorted({k[:-len("_n")] for k in counters if k.endswith("_n")})
+    return [strategy_stats_from_summary(counters, sketches, k, k) for k in keys]
+
+
+# ── Parameter sweep over exit strategies ──────────────────────────────────────
+
+# Each strategy maps parameter name -> list of candidate values.
+# The cartesian product of each strategy's lists is evaluated.
+SWEEP_GRID = {
+    "ladder": {
+        "take_profits": [[1.5, 3.0], [2.0, 5.0], [3.0, 10.0]],
+        "tranches":     [[0.50, 0.25], [0.33, 0.33], [0.25, 0.25], [0.75, 0.0]],
+        "stop_loss":    [-0.30, -0.60, -0.90],
+        "path_dependent": [False, True],
+    },
+    "momentum": {
+        "window_min":    [1, 3, 5, 10, 15],
+        "threshold_pct": [0, 10, 20, 50, 100],
+    },
+}
+
+SWEEP_STRATEGIES = {
+    "ladder":   strategy_b_ladder_sell,
+    "momentum": strategy_d_momentum_filter,
+}
+
+# Read-only price records, set once per worker process by _init_sweep_worker
+_SWEEP_TOKENS = None
+
+
+def expand_grid(grid):
+    """
+    Expand {strategy: {param: [values]}} into a list of (strategy, params) variants.
+    Raises ValueError for a ladder whose tranches do not match its take-profits or sum past 1.
+    """
+    variants = []
+    for name, params in grid.items():
+        if name not in SWEEP_STRATEGIES:
+            raise ValueError(f"unknown sweep strategy: {name}")
+        keys = list(params)
+        for combo in itertools.product(*(params[k] for k in keys)):
+            variant = dict(zip(keys, combo))
+            if name == "ladder":
+                check_ladder(variant.get("take_profits", (2.0, 5.0)),
+                             variant.get("tranches", (0.50, 0.25)))
+            variants.append((name, variant))
+    return variants
+
+
+def _init_sweep_worker(price_tokens):
+    global _SWEEP_TOKENS
+    _SWEEP_TOKENS = price_tokens
+
+
+def _format_params(params):
+    return ", ".join(f"{k}={v}" for k, v in params.items())
+
+
+def _eval_variant(variant):
+    name, params = variant
+    returns = SWEEP_STRATEGIES[name](_SWEEP_TOKENS, **params)
+    stats = compute_strategy_stats(returns, f"{name}({_format_params(params)})")
+    stats["strategy"] = name
+    stats["params"] = params
+    return stats
+
+
+def run_sweep(price_data, grid=None, workers=None):
+    """
+    Evaluate every variant in the grid across a process pool.
+    Price records are handed to each worker once at startup and shared read-only
+    by all variants that worker evaluates. Returns stats ranked by expected value.
+    """
+    price_tokens = price_data.get("tokens", []) if price_data else []
+    variants = expand_grid(grid or SWEEP_GRID)
+    chunksize = max(1, len(variants) // ((workers or os.cpu_count() or 1) * 4))
+
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        initializer=_init_sweep_worker,
+        initargs=(price_tokens,),
+    ) as executor:
+        results = list(executor.map(_eval_variant, variants, chunksize=chunksize))
+
+    return sorted(
+        [s for s in results if s["expected_value"] is not None],
+        key=lambda s: (s["expected_value"], s["median_return"]),
+        reverse=True,
+    ) + [s for s in results if s["expected_value"] is None]
+
+
+def write_sweep_report(ranked, top_n=50):
+    os.makedirs("data", exist_ok=True)
+    with open("data/sweep_results.json", "w") as f, METRICS.timed_op("json_write"):
+        json.dump(ranked, f, indent=2)
+    print("Sweep results saved to data/sweep_results.json")
+
+    lines = [
+        "# Exit Strategy Parameter Sweep",
+        "",
+        f"**Variants evaluated:** {len(ranked)}",
+        "",
+        f"## Top {min(top_n, len(ranked))} by Expected Value",
+        "",
+        "| # | Strategy | Params | N | Win Rate | Avg Return | Median Return | Max Drawdown | Verdict |",
+        "|---|----------|--------|---|---------|-----------|--------------|-------------|---------|",
+    ]
+    for i, s in enumerate(ranked[:top_n], 1):
+        if s["n"] == 0:
+            lines.append(
+                f"| {i} | {s['strategy']} | {_format_params(s['params'])} | 0 | "
+                f"N/A | N/A | N/A | N/A | **INSUFFICIENT DATA** |"
+            )
+        else:
+            lines.append(
+                f"| {i} | {s['strategy']} | {_format_params(s['params'])} | {s['n']} | "
+                f"{s['win_rate']:.1f}% | {s['avg_return']:.1f}% | {s['median_return']:.1f}% | "
+                f"{s['max_drawdown']:.1f}% | **{s['verdict']}** |"
+            )
+
+    report_path = "output/sweep_report.md"
+    with open(report_path, "w") as f:
+        f.write("\n".join(lines) + "\n")
+    print(f"Sweep report saved to {report_path}")
+
+
 # ── Report writer ─────────────────────────────────────────────────────────────
 
-def write_report(q1, strategies, ranked, launches):
+def creator_report_lines(creators):
+    rows = creators["comparison"]
+    lines = [
+        "",
+        "---",
+        "",
+        "## Creator Filter: Serial Ruggers",
+        "",
+        f"A launch is a serial-rugger launch when its creator already had "
+        f"≥{creators['min_launches']} earlier launches with a graduation rate "
+        f"≤{creators['max_grad_rate']:.0%} (creator index: launches before the token only, "
+        f"counted as graduated only if they graduated before it launched). "
+        f"Flagged: **{creators['launches']:,} launches** by **{creators['creators']:,} creators**"
+        + (" — excluded from the results above." if creators.get("applied") else "."),
+        "",
+        "| | All launches | Excluding ruggers |",
+        "|---|---|---|",
+    ]
+    q_all, q_kept = rows["all"]["q1"], rows["excluding_ruggers"]["q1"]
+    lines += [
+        f"| Q1: 90%+ tokens | {q_all['tokens_90plus']:,} | {q_kept['tokens_90plus']:,} |",
+        f"| Q1: graduation rate | {q_all['grad_rate_90plus_pct']:.1f}% | "
+        f"{q_kept['grad_rate_90plus_pct']:.1f}% |",
+        f"| Q1: EV | {q_all['ev_net_multiplier']:+.2f}x | {q_kept['ev_net_multiplier']:+.2f}x |",
+    ]
+    def fmt(s):
+        return f"{s['avg_return']:.1f}% avg, {s['win_rate']:.0f}% win (n={s['n']})" if s["n"] else "N/A"
+
+    for s_all, s_kept in zip(rows["all"]["strategies"], rows["excluding_ruggers"]["strategies"]):
+        lines.append(f"| {s_all['label'].split(':')[0]} | {fmt(s_all)} | {fmt(s_kept)} |")
+
+    if not creators["top_creators"]:
+        return lines
+    lines += [
+        "",
+        "### Most Prolific Creators",
+        "",
+        "| Creator | Launches | Graduated | Grad Rate | Median grad % | Median peak % |",
+        "|---------|----------|-----------|-----------|---------------|---------------|",
+    ]
+    for c in creators["top_creators"]:
+        peak = c["median_peak_grad_pct"]
+        lines.append(
+            f"| `{c['creator'][:16]}…` | {c['launches']:,} | {c['graduated']:,} | "
+            f"{c['grad_rate']:.1%} | {c['median_grad_pct']:.1f}% | "
+            + (f"{peak:.1f}% |" if peak == peak else "N/A |")
+        )
+    return lines
+
+
+def write_report(q1, strategies, ranked, launches, creators=None):
     total = len(launches)
     graduated_count = sum(1 for t in launches if t.get("status") == "graduated")
     grad_rate = graduated_count / total * 100 if total else 0
+    label = day_label(t.get("block_time") for t in launches)
 
     lines = [
         "# Pump.fun Token Analytics — Investment Strategy Analysis",
-        "## Jan 20, 2026 — On-Chain Data",
+        f"## {label} — On-Chain Data",
         "",
         f"**Total tokens launched:** {total:,}",
         f"**Graduated:** {graduated_count:,} ({grad_rate:.1f}%)",
@@ -223,6 +556,15 @@ def write_report(q1, strategies, ranked, launches):
         f"| P(graduate) | {q1['p_profit']:.2%} |",
         f"| P(die before grad) | {q1['p_loss']:.2%} |",
         f"| Expected Value | {q1['ev_net_multiplier']:+.2f}x net |",
+    ]
+    if q1.get("ci"):
+        ci = q1["ci"]
+        lo, hi = ci["ev_net_multiplier"]
+        lines += [
+            f"| EV {ci['level']:.0%} CI (bootstrap) | {lo:+.2f}x to {hi:+.2f}x |",
+            f"| P(EV > 0) (bootstrap) | {ci['p_positive_ev']:.1%} |",
+        ]
+    lines += [
         "",
         "### Conclusion",
         "",
@@ -289,13 +631,55 @@ def write_report(q1, strategies, ranked, launches):
             f"- Max drawdown: {winner['max_drawdown']:.1f}%",
         ]
 
+    with_ci = [s for s in strategies if s.get("ci")]
+    if with_ci:
+        lines += [
+            "",
+            "## Uncertainty (bootstrap, 95% CI)",
+            "",
+            "| Strategy | Win Rate CI | Avg Return CI | Median Return CI | P(EV > 0) |",
+            "|----------|------------|--------------|-----------------|-----------|",
+        ]
+        for s in with_ci:
+            ci = s["ci"]
+            lines.append(
+                f"| {s['label']} | {ci['win_rate'][0]:.1f}% – {ci['win_rate'][1]:.1f}% | "
+                f"{ci['avg_return'][0]:.1f}% – {ci['avg_return'][1]:.1f}% | "
+                f"{ci['median_return'][0]:.1f}% – {ci['median_return'][1]:.1f}% | "
+                f"{ci['p_positive_ev']:.1%} |"
+            )
+
+    with_mc = [s for s in strategies if s.get("monte_carlo")]
+    if with_mc:
+        mc0 = with_mc[0]["monte_carlo"]
+        lines += [
+            "",
+            "## Monte Carlo Bankroll Simulation",
+            "",
+            f"{mc0['paths']:,} paths × {mc0['n_trades']} trades, "
+            f"{mc0['fraction']:.1%} of bankroll per trade, ruin = bankroll ≤ {mc0['ruin_level']:.0%}.",
+            "",
+            "| Strategy | Final p5 | Final Median | Final p95 | P(profit) | P(ruin) | Median Max DD |",
+            "|----------|---------|-------------|----------|----------|--------|--------------|",
+        ]
+        for s in with_mc:
+            mc = s["monte_carlo"]
+            lines.append(
+                f"| {s['label']} | {mc['final_p5']:.2f}x | {mc['final_median']:.2f}x | "
+                f"{mc['final_p95']:.2f}x | {mc['p_profit']:.1%} | {mc['p_ruin']:.1%} | "
+                f"{mc['median_max_drawdown']:.1%} |"
+            )
+
+    if creators:
+        lines += creator_report_lines(creators)
+
     lines += [
         "",
         "---",
         "",
         "## Methodology Notes",
         "",
-        "- Token discovery: on-chain Alchemy RPC scanning Jan 20 2026 blocks (getBlocks + getBlock)",
+        f"- Token discovery: on-chain Alchemy RPC scanning {label} blocks (getBlocks + getBlock)",
         "- CreateV2 fingerprint: PUMP_PROGRAM in accounts + 'pump'-suffix mint with preBalance=0",
         "- Graduation detection: DexScreener Raydium pair presence",
         "- Price data: GeckoTerminal OHLCV (free tier, 1-min and hourly candles)",
@@ -313,6 +697,83 @@ def write_report(q1, strategies, ranked, launches):
 
 
 def main():
+    parser = argparse.ArgumentParser(description="Final investment analysis")
+    parser.add_argument(
+        "--sweep", action="store_true",
+        help="Run the exit-strategy parameter sweep instead of the standard report",
+    )
+    parser.add_argument(
+        "--grid", metavar="PATH",
+        help="JSON file with a sweep grid ({strategy: {param: [values]}}); default SWEEP_GRID",
+    )
+    parser.add_argument(
+        "--workers", type=int, default=None,
+        help="Process pool size for the sweep (default: CPU count)",
+    )
+    parser.add_argument(
+        "--path-dependent", action="store_true",
+        help="Simulate Strategy B by walking candles in time order (simulator.py)",
+    )
+    parser.add_argument(
+        "--mc-paths", type=int, default=10_000,
+        help="Monte Carlo bankroll paths per strategy (0 disables the simulation)",
+    )
+    parser.add_argument(
+        "--mc-trades", type=int, default=100,
+        help="Trades per Monte Carlo bankroll path",
+    )
+    parser.add_argument(
+        "--mc-fraction", type=float, default=0.02,
+        help="Fraction of bankroll staked per trade in the Monte Carlo simulation",
+    )
+    parser.add_argument(
+        "--exclude-ruggers", action="store_true",
+        help="Drop serial-rugger launches (creator index) from the Q1/Q2 headline results",
+    )
+    parser.add_argument(
+        "--rugger-min-launches", type=int, default=RUGGER_MIN_LAUNCHES,
+        help="Earlier launches a creator needs before counting as a serial rugger",
+    )
+    parser.add_argument(
+        "--rugger-max-grad-rate", type=float, default=RUGGER_MAX_GRAD_RATE,
+        help="Highest graduation rate (0-1) over those earlier launches that still counts",
+    )
+    parser.add_argument(
+        "--profile", action="store_true",
+        help="Write per-phase wall/CPU/net-wait, cProfile and tracemalloc reports to output/profile/",
+    )
+    args = parser.parse_args()
+    if args.mc_trades < 1:
+        parser.error("--mc-trades must be at least 1")
+
+    with profile_run("analyze", args.profile):
+        run(args)
+
+
+def run(args):
+    if args.sweep:
+        print("=" * 60)
+        print("ANALYZE — Exit strategy parameter sweep")
+        print("=" * 60)
+        price_data = load_json("step3_price_action.json")
+        grid = None
+        if args.grid:
+            with open(args.grid) as f:
+                grid = json.load(f)
+            try:
+                expand_grid(grid)
+            except ValueError as e:
+                print(f"ERROR: invalid sweep grid {args.grid}: {e}")
+                sys.exit(1)
+        with METRICS.phase("sweep"):
+            ranked = run_sweep(price_data, grid=grid, workers=args.workers)
+        for s in ranked[:10]:
+            if s["n"] > 0:
+                print(f"  {s['label']}: n={s['n']}, win={s['win_rate']}%, avg={s['avg_return']}%")
+        write_sweep_report(ranked)
+        print("\nSWEEP COMPLETE.")
+        return
+
     print("=" * 60)
     print("ANALYZE — Final investment thesis")
     print("=" * 60)
@@ -329,14 +790,34 @@ def main():
           f"{len((near_grad_data or {}).get('near_grad_tokens', []))} near-grad tokens, "
           f"{len((price_data or {}).get('tokens', []))} graduated price records.")
 
+    print("\n[Creators] Flagging serial-rugger launches from the creator index...")
+    with METRICS.phase("creator_filter"):
+        creators = creator_filter(launches, args.rugger_min_launches, args.rugger_max_grad_rate)
+        creators["comparison"] = compare_creator_filter(
+            launches, near_grad_data, price_data, creators, path_dependent=args.path_dependent)
+    print(f"  {creators['launches']} launches by {creators['creators']} serial-rugger creators")
+    if args.exclude_ruggers:
+        creators["applied"] = True
+        near_grad_data = without_mints(near_grad_data, "near_grad_tokens", creators["mints"])
+        price_data = without_mints(price_data, "tokens", creators["mints"])
+
     print("\n[Q1] Analyzing pre-graduation buy strategy...")
-    q1 = analyze_q1(launches, near_grad_data, price_data)
+    with METRICS.phase("q1"):
+        q1 = analyze_q1(launches, near_grad_data, price_data)
     print(f"  90%+ tokens: {q1['tokens_90plus']} | "
           f"Grad rate: {q1['grad_rate_90plus_pct']}% | "
           f"EV: {q1['ev_net_multiplier']:+.2f}x | Verdict: {q1['verdict']}")
 
     print("\n[Q2] Simulating post-graduation strategies...")
-    strategies, ranked = analyze_q2(price_data)
+    mc_params = False if args.mc_paths <= 0 else {
+        "paths": args.mc_paths,
+        "n_trades": args.mc_trades,
+        "fraction": args.mc_fraction,
+    }
+    with METRICS.phase("q2"):
+        strategies, ranked = analyze_q2(
+            price_data, path_dependent=args.path_dependent, mc_params=mc_params,
+        )
     for s in strategies:
         if s["n"] > 0:
             print(f"  {s['label']}: n={s['n']}, win={s['win_rate']}%, avg={s['avg_return']}%")
@@ -346,7 +827,11 @@ def main():
     if ranked:
         print(f"\n  Best strategy: {ranked[0]['label']} (EV: {ranked[0]['expected_value']:.1f}%)")
 
-    write_report(q1, strategies, ranked, launches)
+    sketch_paths = save_strategy_sketches(price_data, launches, path_dependent=args.path_dependent)
+    print(f"  Saved strategy sketches for {len(sketch_paths)} day(s) -> data/sketches/analyze/")
+
+    with METRICS.phase("report"):
+        write_report(q1, strategies, ranked, launches, creators)
 
     print("\nANALYSIS COMPLETE.")
 
@@ -0,0 +1,366 @@
+#!/usr/bin/env python3
+"""
+bench.py — Offline throughput benchmarks over a recorded fixture corpus.
+
+`record` captures real responses once (needs network); `run` replays them with
+no network access and measures the CPU-bound hot paths:
+
+  extract        extract_createv2_from_block over recorded getBlock results
+                 → blocks/s and tokens/s
+  bonding_curve  derive_bonding_curve_pda + parse_bonding_curve over recorded
+                 getAccountInfo results → accounts/s
+  buckets        step2 compute_buckets over the parsed tokens → tokens/s
+  price_action   step3 price_action_from_candles over recorded OHLCV → tokens/s
+  strategies     analyze.py strategies A–D (+ path-dependent ladder) over the
+                 resulting price records, candles from a candle store built
+                 from the fixture in data/bench/candles → strategy evals/s
+
+Each benchmark takes the best of --repeat runs. Results are appended to
+data/bench/history.jsonl with the git commit, and compared against the last
+entry: a drop of more than --tolerance is reported as a regression (non-zero
+exit with --fail-on-regression).
+
+Corpus (gzipped JSON, data/bench/fixtures/):
+  blocks.json.gz    {slot: getBlock result}
+  accounts.json.gz  {mint: getAccountInfo result for its bonding curve PDA}
+  ohlcv.json.gz     [{token, graduation_time, pre, post, hourly}] raw candles
+
+Usage:
+  python3 bench.py record [--blocks 300] [--accounts 300] [--ohlcv 40]
+  python3 bench.py run [--repeat 5] [--only extract,strategies] [--fail-on-regression]
+  python3 bench.py history
+"""
+
+import argparse
+import gzip
+import json
+import os
+import shutil
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from analyze import (
+    strategy_a_quick_flip,
+    strategy_b_ladder_sell,
+    strategy_c_hold_24h,
+    strategy_d_momentum_filter,
+)
+from candle_store import CandleStore
+from config import JAN20_START_SLOT, rpc_call
+from step1_enrich import derive_bonding_curve_pda, parse_bonding_curve
+from step1_fetch_launches import extract_createv2_from_block, fetch_block
+from step2_near_graduation import compute_buckets
+from step3_graduated_price import fetch_ohlcv, graduation_ts, price_action_from_candles
+
+BENCH_DIR = "data/bench"
+FIXTURE_DIR = os.path.join(BENCH_DIR, "fixtures")
+HISTORY_PATH = os.path.join(BENCH_DIR, "history.jsonl")
+CANDLE_DIR = os.path.join(BENCH_DIR, "candles")
+BUCKET_MIN_TOKENS = 100_000     # replicate parsed tokens up to this for a measurable run
+STRATEGY_MIN_TOKENS = 2_000
+
+
+def fixture_path(name):
+    return os.path.join(FIXTURE_DIR, f"{name}.json.gz")
+
+
+def save_fixture(name, data):
+    os.makedirs(FIXTURE_DIR, exist_ok=True)
+    with gzip.open(fixture_path(name), "wt") as f:
+        json.dump(data, f)
+    return fixture_path(name)
+
+
+def load_fixture(name):
+    path = fixture_path(name)
+    if not os.path.exists(path):
+        return None
+    with gzip.open(path, "rt") as f:
+        return json.load(f)
+
+
+# ── Recording (network) ──────────────────────────────────────────────────────
+
+def record(n_blocks, n_accounts, n_ohlcv, start_slot=JAN20_START_SLOT):
+    slots = rpc_call("getBlocks", [start_slot, start_slot + n_blocks * 2]) or []
+    slots = slots[:n_blocks]
+    with ThreadPoolExecutor(max_workers=20) as pool:
+        blocks = {slot: block for slot, block in pool.map(fetch_block, slots) if block}
+    print(f"Recorded {len(blocks)} blocks -> {save_fixture('blocks', blocks)}")
+
+    mints = [t["mint"] for slot, b in blocks.items() for t in extract_createv2_from_block(slot, b)]
+
+    def fetch_account(mint):
+        result = rpc_call("getAccountInfo", [
+            derive_bonding_curve_pda(mint),
+            {"encoding": "base64", "commitment": "confirmed"},
+        ])
+        return mint, result
+
+    with ThreadPoolExecutor(max_workers=20) as pool:
+        accounts = dict(pool.map(fetch_account, mints[:n_accounts]))
+    print(f"Recorded {len(accounts)} accounts -> {save_fixture('accounts', accounts)}")
+
+    # Graduated tokens are ~1% of launches, so OHLCV comes from an enriched run
+    launches_path = "data/step1_launches.json"
+    graduated = []
+    if os.path.exists(launches_path):
+        with open(launches_path) as f:
+            graduated = [t for t in json.load(f)
+                         if t.get("status") == "graduated" and t.get("pair_address")]
+    ohlcv = []
+    for token in graduated:
+        if len(ohlcv) >= n_ohlcv:
+            break
+        gt = graduation_ts(token)
+        if not gt:
+            continue
+        pair = token["pair_address"]
+        ohlcv.append({
+            "token": {k: token.get(k) for k in ("mint", "pair_address", "pair_created_at",
+                                                "block_time")},
+            "graduation_time": gt,
+            "pre": fetch_ohlcv(pair, "minute", before_timestamp=gt + 300, limit=10),
+            "post": fetch_ohlcv(pair, "minute", before_timestamp=gt + 1800, limit=60),
+            "hourly": [c for c in fetch_ohlcv(pair, "hour", before_timestamp=gt + 86400, limit=48)
+                       if c[0] >= gt][:24],
+        })
+        time.sleep(1.5)
+    if not graduated:
+        print(f"  No graduated tokens in {launches_path} — run step1_enrich first for OHLCV fixtures")
+    print(f"Recorded {len(ohlcv)} OHLCV sets -> {save_fixture('ohlcv', ohlcv)}")
+
+
+# ── Benchmarks (offline) ─────────────────────────────────────────────────────
+
+def _best_of(fn, repeat):
+    best = None
+    out = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        out = fn()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return max(best, 1e-9), out
+
+
+def _replicate(items, minimum):
+    if not items:
+        return []
+    return items * max(1, -(-minimum // len(items)))
+
+
+def bench_extract(blocks, repeat):
+    items = [(int(slot), block) for slot, block in blocks.items()]
+
+    def run():
+        return sum(len(extract_createv2_from_block(slot, block)) for slot, block in items)
+
+    elapsed, n_tokens = _best_of(run, repeat)
+    return {"blocks": len(items), "tokens": n_tokens, "seconds": round(elapsed, 4),
+            "blocks_per_s": round(len(items) / elapsed, 1),
+            "tokens_per_s": round(n_tokens / elapsed, 1)}
+
+
+def bench_bonding_curve(accounts, repeat):
+    items = list(accounts.items())
+
+    def run():
+        return [dict(parse_bonding_curve(derive_bonding_curve_pda(mint), result), mint=mint)
+                for mint, result in items]
+
+    elapsed, parsed = _best_of(run, repeat)
+    return {"accounts": len(items), "seconds": round(elapsed, 4),
+            "accounts_per_s": round(len(items) / elapsed, 1)}, parsed
+
+
+def bench_buckets(parsed, repeat):
+    tokens = _replicate(parsed, BUCKET_MIN_TOKENS)
+    elapsed, _ = _best_of(lambda: compute_buckets(tokens), repeat)
+    return {"tokens": len(tokens), "seconds": round(elapsed, 4),
+            "tokens_per_s": round(len(tokens) / elapsed, 1)}
+
+
+def bench_price_action(ohlcv, repeat):
+    def run():
+        return [price_action_from_candles(o["token"], o["graduation_time"], o["pre"],
+                                          o["post"], o["hourly"]) for o in ohlcv]
+
+    elapsed, records = _best_of(run, repeat)
+    return {"tokens": len(ohlcv), "seconds": round(elapsed, 4),
+            "tokens_per_s": round(len(ohlcv) / elapsed, 1)}, records
+
+
+def fixture_store(ohlcv):
+    """Fresh candle store holding the recorded candles, keyed by pool like step3's."""
+    shutil.rmtree(CANDLE_DIR, ignore_errors=True)
+    store = CandleStore(CANDLE_DIR)
+    for o in ohlcv:
+        pool = o["token"].get("pair_address")
+        store["minute"].append(pool, o["pre"] + o["post"])
+        store["hour"].append(pool, o["hourly"])
+    return store
+
+
+def bench_strategies(records, store, repeat):
+    tokens = _replicate(records, STRATEGY_MIN_TOKENS)
+    strategies = [
+        strategy_a_quick_flip,
+        strategy_b_ladder_sell,
+        lambda t: strategy_b_ladder_sell(t, path_dependent=True, store=store),
+        strategy_c_hold_24h,
+        lambda t: strategy_d_momentum_filter(t, store=store),
+    ]
+
+    def run():
+        for fn in strategies:
+            fn(tokens)
+
+    elapsed, _ = _best_of(run, repeat)
+    evals = len(tokens) * len(strategies)
+    return {"tokens": len(tokens), "strategies": len(strategies), "seconds": round(elapsed, 4),
+            "evals_per_s": round(evals / elapsed, 1)}
+
+
+# Headline throughput per benchmark, used for regression checks
+HEADLINE = {
+    "extract": "blocks_per_s",
+    "bonding_curve": "accounts_per_s",
+    "buckets": "tokens_per_s",
+    "price_action": "tokens_per_s",
+    "strategies": "evals_per_s",
+}
+
+
+def run_benchmarks(repeat=5, only=None):
+    wanted = set(only or HEADLINE)
+    results = {}
+    blocks = load_fixture("blocks")
+    accounts = load_fixture("accounts")
+    ohlcv = load_fixture("ohlcv")
+
+    if blocks and "extract" in wanted:
+        results["extract"] = bench_extract(blocks, repeat)
+    if accounts:
+        bc, parsed = bench_bonding_curve(accounts, repeat)
+        if "bonding_curve" in wanted:
+            results["bonding_curve"] = bc
+        if "buckets" in wanted:
+            results["buckets"] = bench_buckets(parsed, repeat)
+    if ohlcv:
+        pa, records = bench_price_action(ohlcv, repeat)
+        if "price_action" in wanted:
+            results["price_action"] = pa
+        if "strategies" in wanted:
+            results["strategies"] = bench_strategies([r for r in records if r],
+                                                     fixture_store(ohlcv), repeat)
+    return results
+
+
+# ── History / regressions ────────────────────────────────────────────────────
+
+def git_commit():
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                             text=True, cwd=os.path.dirname(os.path.abspath(__file__)))
+        return out.stdout.strip() or None
+    except OSError:
+        return None
+
+
+def load_history():
+    if not os.path.exists(HISTORY_PATH):
+        return []
+    with open(HISTORY_PATH) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def append_history(results):
+    os.makedirs(BENCH_DIR, exist_ok=True)
+    entry = {"ts": int(time.time()), "commit": git_commit(),
+             "python": sys.version.split()[0], "results": results}
+    with open(HISTORY_PATH, "a") as f:
+        f.write(json.dumps(entry) + "\n")
+    return entry
+
+
+def compare(results, previous, tolerance):
+    """[(bench, metric, old, new, change)] for headline metrics that dropped past tolerance."""
+    regressions = []
+    for name, metric in HEADLINE.items():
+        old = ((previous or {}).get("results", {}).get(name) or {}).get(metric)
+        new = (results.get(name) or {}).get(metric)
+        if old and new is not None and new < old * (1 - tolerance):
+            regressions.append((name, metric, old, new, (new - old) / old))
+    return regressions
+
+
+def print_results(results, previous=None):
+    print(f"{'benchmark':<15} {'metric':<15} {'value':>14} {'vs last':>9}")
+    for name, metric in HEADLINE.items():
+        if name not in results:
+            continue
+        new = results[name][metric]
+        old = ((previous or {}).get("results", {}).get(name) or {}).get(metric)
+        delta = f"{(new - old) / old * 100:+.1f}%" if old else "—"
+        print(f"{name:<15} {metric:<15} {new:>14,.1f} {delta:>9}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline throughput benchmarks")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+
+    p_rec = sub.add_parser("record", help="capture a fixture corpus from the live APIs")
+    p_rec.add_argument("--blocks", type=int, default=300)
+    p_rec.add_argument("--accounts", type=int, default=300)
+    p_rec.add_argument("--ohlcv", type=int, default=40)
+    p_rec.add_argument("--start-slot", type=int, default=JAN20_START_SLOT)
+
+    p_run = sub.add_parser("run", help="replay the corpus and record throughput")
+    p_run.add_argument("--repeat", type=int, default=5)
+    p_run.add_argument("--only", help="comma-separated subset of: " + ",".join(HEADLINE))
+    p_run.add_argument("--tolerance", type=float, default=0.10,
+                       help="fractional drop vs the last run that counts as a regression")
+    p_run.add_argument("--fail-on-regression", action="store_true")
+    p_run.add_argument("--no-save", action="store_true", help="do not append to history")
+
+    sub.add_parser("history", help="print headline metrics for every recorded run")
+
+    args = parser.parse_args()
+
+    if args.cmd == "record":
+        record(args.blocks, args.accounts, args.ohlcv, start_slot=args.start_slot)
+        return
+
+    if args.cmd == "history":
+        for entry in load_history():
+            cols = "  ".join(
+                f"{name}={entry['results'][name][metric]:,.0f}"
+                for name, metric in HEADLINE.items() if name in entry["results"]
+            )
+            print(f"{entry['ts']}  {entry.get('commit') or '-':<9} {cols}")
+        return
+
+    only = [s.strip() for s in args.only.split(",")] if args.only else None
+    results = run_benchmarks(repeat=args.repeat, only=only)
+    if not results:
+        print(f"ERROR: no fixtures in {FIXTURE_DIR}. Run `python3 bench.py record` first.")
+        sys.exit(1)
+
+    history = load_history()
+    previous = history[-1] if history else None
+    print_results(results, previous)
+    regressions = compare(results, previous, args.tolerance)
+    if not args.no_save:
+        append_history(results)
+        print(f"\nAppended to {HISTORY_PATH}")
+    for name, metric, old, new, change in regressions:
+        print(f"REGRESSION: {name} {metric} {old:,.1f} -> {new:,.1f} ({change * 100:+.1f}%)")
+    if regressions and args.fail_on_regression:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
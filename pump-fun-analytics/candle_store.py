@@ -0,0 +1,370 @@
+#!/usr/bin/env python3
+"""
+candle_store.py — Memory-mapped OHLCV store, one contiguous series per pool.
+
+step3 used to embed pre_grad_candles, post_30min_candles and hourly_24h as
+nested lists in step3_price_action.json, and step1 / step1_enrich carried
+hourly_prices_24h on every token record: every reader parsed every candle
+as JSON before it could slice one series. The candles now live here:
+
+  data/candles/<timeframe>/ts.i64      candle open times, int64
+  data/candles/<timeframe>/ohlcv.f64   open, high, low, close, volume — float64 rows
+  data/candles/<timeframe>/index.jsonl {"pool", "offset", "count"} per write
+
+Timeframes are "minute" (step3's pre/post-graduation windows) and "hour"
+(24h after launch / graduation). Both column files are append-only and read
+through np.memmap, so a series is a zero-copy slice and a time window is a
+np.searchsorted; first_rows() gathers the same window for many pools at once
+(simulator.build_paths, analyze's momentum filter).
+
+A pool's series is always one contiguous run sorted by time: appending to a
+pool merges the new candles with its stored ones (deduped by timestamp, the
+newest fetch winning) and writes the merged run at the end; the index line
+written last points at it and the old run becomes garbage until `compact`.
+The index is a log: readers pick up other processes' appends by reading its
+new lines, and rows past the last index line (a crash mid-write) are cut off
+by the next append. Writers (append, compact) hold an exclusive flock on the
+timeframe's .lock file across sync + write, so step1_enrich, step3 and the
+daemon's /mint?refresh=1 can append concurrently without truncating each
+other's runs. sync() takes the shared flock, so a reader never pairs a
+compacted column file with the index it replaced; slices it already mapped
+stay valid either way.
+
+Token records keep only hourly_candles (how many were fetched) and price
+records per-window counts; the windows step3 reports on are grad_windows().
+
+Usage:
+  python3 candle_store.py stats
+  python3 candle_store.py show <POOL> [--timeframe minute|hour] [--start TS] [--limit N]
+  python3 candle_store.py compact
+  python3 candle_store.py migrate      # move inline candle lists out of the step1 / step3 JSON
+"""
+
+import argparse
+import fcntl
+import json
+import os
+import threading
+from contextlib import contextmanager
+
+import numpy as np
+
+from metrics import METRICS
+
+CANDLE_DIR = "data/candles"
+TIMEFRAMES = ("minute", "hour")
+INDEX_FILES = tuple(os.path.join(CANDLE_DIR, tf, "index.jsonl") for tf in TIMEFRAMES)
+OHLCV = 5                    # open, high, low, close, volume
+
+# step3's windows around graduation
+PRE_GRAD_SECONDS = 300       # 1-min candles in the 5 min before
+POST_MINUTES = 30            # first 30 1-min candles from graduation
+HOURLY_CANDLES = 24          # first 24 hourly candles from graduation
+
+
+def candle_rows(candles):
+    """Raw [ts, open, high, low, close, volume] candles (lists or an array) as (n, 6) float64."""
+    return np.asarray(candles, dtype=np.float64).reshape(-1, 1 + OHLCV)
+
+
+class Timeframe:
+    """One timeframe: the two column files and the pool -> (offset, count) index."""
+
+    def __init__(self, root, name):
+        self.name = name
+        self.dir = os.path.join(root, name)
+        self.ts_path = os.path.join(self.dir, "ts.i64")
+        self.ohlcv_path = os.path.join(self.dir, "ohlcv.f64")
+        self.index_path = os.path.join(self.dir, "index.jsonl")
+        self.lock_path = os.path.join(self.dir, ".lock")
+        self._lock = threading.RLock()
+        self._held = False       # this process holds the exclusive flock
+        self._reset()
+        self.sync()
+
+    def _reset(self):
+        self.index = {}          # pool -> (row offset, row count)
+        self.rows = 0            # rows covered by the index
+        self._pos = 0            # bytes of index.jsonl consumed
+        self._inode = None
+        self.ts = np.zeros(0, dtype=np.int64)               # whole mapped columns:
+        self.ohlcv = np.zeros((0, OHLCV), dtype=np.float64)   # first_rows() indexes these
+
+    def __contains__(self, pool):
+        return pool in self.index
+
+    def __len__(self):
+        return len(self.index)
+
+    @contextmanager
+    def _flock(self, mode):
+        with open(self.lock_path, "a") as f:
+            fcntl.flock(f, mode)
+            try:
+                yield
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+    def sync(self):
+        """Read index lines appended since the last call and remap the columns if they grew."""
+        with self._lock:
+            if self._held:
+                return self._sync()
+            if not os.path.isdir(self.dir):
+                return
+            with self._flock(fcntl.LOCK_SH):
+                self._sync()
+
+    def _sync(self):
+        try:
+            st = os.stat(self.index_path)
+        except FileNotFoundError:
+            return
+        if st.st_ino != self._inode or st.st_size < self._pos:      # compacted elsewhere
+            self._reset()
+            self._inode = st.st_ino
+        if st.st_size == self._pos:
+            return
+        with open(self.index_path, "rb") as f:
+            f.seek(self._pos)
+            tail = f.read()
+        complete = tail[:tail.rfind(b"\n") + 1]     # a torn last line waits for its newline
+        for line in complete.splitlines():
+            try:
+                rec = json.loads(line)
+            except ValueError:
+                continue
+            self.index[rec["pool"]] = (rec["offset"], rec["count"])
+            self.rows = max(self.rows, rec["offset"] + rec["count"])
+        self._pos += len(complete)
+        if self.rows > len(self.ts):
+            # Plain ndarray views of the maps: slicing a np.memmap subclass costs
+            # more than the searchsorted it feeds, per token
+            with METRICS.timed_op("candle_map"):
+                self.ts = np.memmap(self.ts_path, dtype=np.int64, mode="r",
+                                     shape=(self.rows,)).view(np.ndarray)
+                self.ohlcv = np.memmap(self.ohlcv_path, dtype=np.float64, mode="r",
+                                        shape=(self.rows, OHLCV)).view(np.ndarray)
+
+    @contextmanager
+    def _writing(self):
+        """This process's lock plus the exclusive flock, with the index synced under it."""
+        with self._lock:
+            os.makedirs(self.dir, exist_ok=True)
+            with self._flock(fcntl.LOCK_EX):
+                self._held = True
+                try:
+                    self._sync()
+                    yield
+                finally:
+                    self._held = False
+
+    def series(self, pool):
+        """(ts, ohlcv) views of the pool's whole series; empty if it has none."""
+        offset, count = self.index.get(pool, (0, 0))
+        return self.ts[offset:offset + count], self.ohlcv[offset:offset + count]
+
+    def window(self, pool, start=None, end=None, limit=None):
+        """(ts, ohlcv) for start <= ts < end, at most `limit` candles from start."""
+        ts, ohlcv = self.series(pool)
+        lo = np.searchsorted(ts, start, side="left") if start is not None else 0
+        hi = np.searchsorted(ts, end, side="left") if end is not None else len(ts)
+        if limit is not None:
+            hi = min(hi, lo + limit)
+        return ts[lo:hi], ohlcv[lo:hi]
+
+    def first_rows(self, pools, starts, limit):
+        """
+        Row indices (into .ts / .ohlcv) of each pool's first `limit` candles at or
+        after its start, as an (n, limit) int64 array padded with -1. One pass over
+        the pools' series instead of a window() per pool.
+        """
+        span = np.array([self.index.get(p, (0, 0)) for p in pools], dtype=np.int64).reshape(-1, 2)
+        offset, count = span[:, 0], span[:, 1]
+        group = np.repeat(np.arange(len(offset)), count)
+        row = np.arange(count.sum()) - np.repeat(np.cumsum(count) - count - offset, count)
+        early = self.ts[row] < np.repeat(np.asarray(starts, dtype=np.float64), count)
+        before = np.bincount(group, weights=early, minlength=len(offset)).astype(np.int64)
+        k = np.arange(limit)
+        return np.where(k < (count - before)[:, None], (offset + before)[:, None] + k, -1)
+
+    def rows_of(self, pool, start=None, end=None, limit=None):
+        """window() as (n, 6) [ts, open, high, low, close, volume] rows."""
+        ts, ohlcv = self.window(pool, start, end, limit)
+        return np.column_stack((ts.astype(np.float64), ohlcv))
+
+    def append(self, pool, candles):
+        """Merge raw candles into the pool's series; returns its length afterwards."""
+        rows = candle_rows(candles)
+        if not pool or not len(rows):
+            return len(self.series(pool)[0]) if pool else 0
+        with self._writing(), METRICS.timed_op("candle_append"):
+            old_ts, old_ohlcv = self.series(pool)
+            ts = np.concatenate([old_ts, rows[:, 0].astype(np.int64)])
+            ohlcv = np.concatenate([old_ohlcv, rows[:, 1:]])
+            # Last occurrence of each timestamp wins: unique over the reversed rows
+            _, first_rev = np.unique(ts[::-1], return_index=True)
+            keep = len(ts) - 1 - first_rev
+            ts, ohlcv = ts[keep], ohlcv[keep]
+            if np.array_equal(ts, old_ts) and np.array_equal(ohlcv, old_ohlcv, equal_nan=True):
+                return len(ts)
+            self._write(pool, ts, ohlcv)
+        return len(ts)
+
+    def _write(self, pool, ts, ohlcv):
+        """Append a run after the indexed rows; call under _writing()."""
+        offset = self.rows
+        for path, arr in ((self.ts_path, ts), (self.ohlcv_path, ohlcv)):
+            with open(path, "ab") as f:
+                f.truncate(offset * arr.itemsize * (arr.shape[1] if arr.ndim > 1 else 1))
+                f.write(np.ascontiguousarray(arr).tobytes())
+        with open(self.index_path, "ab") as f:
+            f.truncate(self._pos)
+            f.write((json.dumps({"pool": pool, "offset": offset, "count": len(ts)}) + "\n")
+                    .encode())
+        self.sync()
+
+    def live_rows(self):
+        return sum(count for _, count in self.index.values())
+
+    def compact(self):
+        """Rewrite the columns with only the current run of each pool; returns rows dropped."""
+        with self._writing(), METRICS.timed_op("candle_compact"):
+            pools = sorted(self.index)
+            dropped = self.rows - self.live_rows()
+            if not dropped:
+                return 0
+            parts = [self.series(p) for p in pools]
+            counts = [len(ts) for ts, _ in parts]
+            offsets = np.concatenate([[0], np.cumsum(counts)[:-1]]).astype(np.int64).tolist()
+            for path, arr in ((self.ts_path, np.concatenate([ts for ts, _ in parts])),
+                              (self.ohlcv_path, np.concatenate([o for _, o in parts]))):
+                np.ascontiguousarray(arr).tofile(path + ".tmp")
+                os.replace(path + ".tmp", path)
+            with open(self.index_path + ".tmp", "w") as f:
+                for pool, offset, count in zip(pools, offsets, counts):
+                    f.write(json.dumps({"pool": pool, "offset": offset, "count": count}) + "\n")
+            os.replace(self.index_path + ".tmp", self.index_path)
+            self._reset()
+            self.sync()
+        return dropped
+
+
+class CandleStore:
+    def __init__(self, root=CANDLE_DIR):
+        self.root = root
+        self.timeframes = {tf: Timeframe(root, tf) for tf in TIMEFRAMES}
+
+    def __getitem__(self, timeframe):
+        return self.timeframes[timeframe]
+
+    def sync(self):
+        for tf in self.timeframes.values():
+            tf.sync()
+        return self
+
+    def stats(self):
+        return {name: {"pools": len(tf), "rows": tf.rows, "live_rows": tf.live_rows(),
+                       "bytes": tf.rows * 8 * (1 + OHLCV)}
+                for name, tf in self.timeframes.items()}
+
+
+_STORE = None
+_STORE_LOCK = threading.Lock()
+
+
+def open_store():
+    """This process's store over CANDLE_DIR, synced with what other processes appended."""
+    global _STORE
+    with _STORE_LOCK:
+        if _STORE is None:
+            _STORE = CandleStore()
+    return _STORE.sync()
+
+
+def grad_windows(store, pool, graduation_time):
+    """step3's candle windows around graduation, as (n, 6) rows each."""
+    minute, hour = store["minute"], store["hour"]
+    return {
+        "pre_grad": minute.rows_of(pool, start=graduation_time - PRE_GRAD_SECONDS,
+                                   end=graduation_time),
+        "post_30min": minute.rows_of(pool, start=graduation_time, limit=POST_MINUTES),
+        "hourly_24h": hour.rows_of(pool, start=graduation_time, limit=HOURLY_CANDLES),
+    }
+
+
+# ── Migration of the inline JSON lists ───────────────────────────────────────
+
+def _rewrite(path, strip):
+    """Run strip(data) -> records changed over a JSON file, rewriting it if any were."""
+    if not os.path.exists(path):
+        return 0
+    with open(path) as f, METRICS.timed_op("json_load"):
+        data = json.load(f)
+    changed = strip(data)
+    if changed:
+        with open(path, "w") as f, METRICS.timed_op("json_write"):
+            json.dump(data, f, indent=2)
+    return changed
+
+
+def migrate(store, launches_path="data/step1_launches.json",
+            price_path="data/step3_price_action.json"):
+    """Move inline candle lists into the store; returns (tokens, price records) rewritten."""
+    def strip_launches(tokens):
+        n = 0
+        for t in tokens:
+            if "hourly_prices_24h" in t:
+                hourly = t.pop("hourly_prices_24h") or []
+                store["hour"].append(t.get("pair_address"), hourly)
+                t["hourly_candles"] = len(hourly)
+                n += 1
+        return n
+
+    def strip_price(price):
+        n = 0
+        for r in price.get("tokens", []):
+            if "post_30min_candles" in r:
+                pre, post, hourly = (r.pop(k, None) or [] for k in
+                                     ("pre_grad_candles", "post_30min_candles", "hourly_24h"))
+                store["minute"].append(r.get("pair_address"), pre + post)
+                store["hour"].append(r.get("pair_address"), hourly)
+                n += 1
+        return n
+
+    return _rewrite(launches_path, strip_launches), _rewrite(price_path, strip_price)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Memory-mapped candle store")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    sub.add_parser("stats", help="pools, rows and garbage per timeframe")
+    show = sub.add_parser("show", help="print one pool's candles")
+    show.add_argument("pool")
+    show.add_argument("--timeframe", choices=TIMEFRAMES, default="minute")
+    show.add_argument("--start", type=int)
+    show.add_argument("--limit", type=int)
+    sub.add_parser("compact", help="drop superseded runs")
+    sub.add_parser("migrate", help="move inline candle lists out of the step1 / step3 JSON")
+    args = parser.parse_args()
+
+    store = CandleStore()
+    if args.cmd == "stats":
+        for name, s in store.stats().items():
+            print(f"  {name:<7} {s['pools']:>7,} pools  {s['live_rows']:>10,} live / "
+                  f"{s['rows']:>10,} rows  {s['bytes'] / 1e6:>8.1f} MB")
+    elif args.cmd == "show":
+        for row in store[args.timeframe].rows_of(args.pool, start=args.start,
+                                                 limit=args.limit).tolist():
+            print(json.dumps([int(row[0])] + row[1:]))
+    elif args.cmd == "compact":
+        for name, tf in store.timeframes.items():
+            print(f"  {name}: dropped {tf.compact():,} superseded rows")
+    else:
+        tokens, records = migrate(store)
+        print(f"Moved candles of {tokens:,} token records and {records:,} price records "
+              f"→ {CANDLE_DIR}/")
+
+
+if __name__ == "__main__":
+    main()
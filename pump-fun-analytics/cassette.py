@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+"""
+cassette.py — Record/replay store for rpc_call and http_get.
+
+PUMP_CASSETTE_MODE selects the mode (config.py wires it in):
+  off      default — every call goes to the network
+  record   live calls; every request/response pair is written to the store
+  replay   served entirely from the store, no network; a miss returns None
+  auto     replay on hit, otherwise live + record; None (a failed call) is
+           never stored or replayed, so a transient failure is retried next run
+
+Entries live in one SQLite file (PUMP_CASSETTE, default data/cassettes/pipeline.db)
+keyed by a canonical request key — sha256 of the sorted-keys JSON of
+(kind, method-or-path, params) — with zlib-compressed JSON responses. The key
+ignores the JSON-RPC id, the endpoint and the API base URL, so a cassette
+recorded against production replays against any RPC endpoint or mock_server.py.
+In record mode the stored value is what rpc_call / http_get returned (None
+included), so a replayed run sees exactly the recorded run.
+
+Usage:
+  python3 cassette.py stats [PATH]
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import sys
+import threading
+import time
+import zlib
+from urllib.parse import urlsplit
+
+from metrics import METRICS
+
+DEFAULT_PATH = "data/cassettes/pipeline.db"
+MODES = ("off", "record", "replay", "auto")
+COMMIT_EVERY = 200
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    key         TEXT PRIMARY KEY,
+    kind        TEXT NOT NULL,
+    request     TEXT NOT NULL,
+    response    BLOB NOT NULL,
+    recorded_at REAL NOT NULL
+);
+"""
+
+MISSING = object()
+
+
+def request_key(kind, target, params):
+    """Canonical (key, request JSON) for an RPC method or an HTTP path plus params."""
+    request = json.dumps([kind, target, params], sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(request.encode()).hexdigest(), request
+
+
+def rpc_key(method, params):
+    return request_key("rpc", method, params)
+
+
+def http_key(url, params=None):
+    # Path + query only: the base URL may point at production or a mock
+    parts = urlsplit(url)
+    query = dict(params or {})
+    if parts.query:
+        query.update(dict(p.split("=", 1) for p in parts.query.split("&") if "=" in p))
+    return request_key("http", parts.path, {k: str(v) for k, v in query.items()})
+
+
+class Cassette:
+    def __init__(self, path=DEFAULT_PATH, mode="replay"):
+        if mode not in MODES:
+            raise ValueError(f"cassette mode must be one of {MODES}, got {mode!r}")
+        self.path = path
+        self.mode = mode
+        self.lock = threading.Lock()
+        self.pending = 0
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+
+    @property
+    def replaying(self):
+        return self.mode == "replay"
+
+    def get(self, key):
+        """Stored response for key, or MISSING."""
+        with self.lock:
+            row = self.conn.execute("SELECT response FROM entries WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return MISSING
+        return json.loads(zlib.decompress(row[0]))
+
+    def put(self, key, kind, request, response):
+        blob = zlib.compress(json.dumps(response, separators=(",", ":")).encode(), 6)
+        with self.lock:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO entries (key, kind, request, response, recorded_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (key, kind, request, blob, time.time()),
+            )
+            self.pending += 1
+            if self.pending >= COMMIT_EVERY:
+                self.conn.commit()
+                self.pending = 0
+
+    def through(self, key, request, kind, live):
+        """Serve one call per mode: replay from the store and/or run live() and record it."""
+        if self.mode in ("replay", "auto"):
+            hit = self.get(key)
+            if hit is not MISSING and not (hit is None and self.mode == "auto"):
+                METRICS.inc("cassette_total", result="hit", kind=kind)
+                return hit
+            METRICS.inc("cassette_total", result="miss", kind=kind)
+            if self.mode == "replay":
+                return None
+        response = live()
+        if response is None and self.mode == "auto":
+            return None
+        self.put(key, kind, request, response)
+        METRICS.inc("cassette_total", result="recorded", kind=kind)
+        return response
+
+    def flush(self):
+        with self.lock:
+            self.conn.commit()
+            self.pending = 0
+
+    def stats(self):
+        with self.lock:
+            rows = self.conn.execute(
+                "SELECT kind, COUNT(*), SUM(LENGTH(response)), MIN(recorded_at), MAX(recorded_at) "
+                "FROM entries GROUP BY kind"
+            ).fetchall()
+        return {kind: {"entries": n, "compressed_bytes": size or 0,
+                       "first": first, "last": last}
+                for kind, n, size, first, last in rows}
+
+
+def from_env():
+    """Cassette configured by PUMP_CASSETTE_MODE / PUMP_CASSETTE, or None when off."""
+    mode = os.environ.get("PUMP_CASSETTE_MODE", "off")
+    if mode == "off":
+        return None
+    return Cassette(os.environ.get("PUMP_CASSETTE", DEFAULT_PATH), mode)
+
+
+def main():
+    if len(sys.argv) < 2 or sys.argv[1] != "stats":
+        print("usage: python3 cassette.py stats [PATH]")
+        sys.exit(1)
+    path = sys.argv[2] if len(sys.argv) > 2 else os.environ.get("PUMP_CASSETTE", DEFAULT_PATH)
+    if not os.path.exists(path):
+        print(f"ERROR: {path} not found")
+        sys.exit(1)
+    for kind, s in Cassette(path, "replay").stats().items():
+        span = time.strftime("%Y-%m-%d %H:%M", time.gmtime(s["first"]))
+        span += " → " + time.strftime("%Y-%m-%d %H:%M", time.gmtime(s["last"]))
+        print(f"{kind:<5} {s['entries']:>9,} entries  {s['compressed_bytes'] / 1e6:>8.1f} MB  {span}")
+
+
+if __name__ == "__main__":
+    main()
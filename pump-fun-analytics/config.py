@@ -1,8 +1,30 @@
+import atexit
+import os
 import time
-import requests
 from concurrent.futures import ThreadPoolExecutor, as_completed
+from urllib.parse import urlsplit
 
-ALCHEMY_RPC = "https://solana-mainnet.g.alchemy.com/v2/vdQ02Yrm0xuJNYOCH0MbgJt1FnHEp6zt"
+import cassette
+from cu_budget import CuScheduler
+from metrics import METRICS
+from rpc_pool import RpcPool
+from transport import Transport
+
+# PUMP_RPC_URL / PUMP_DEXSCREENER_BASE / PUMP_GECKOTERMINAL_BASE redirect the
+# pipeline, e.g. at mock_server.py for load tests
+ALCHEMY_RPC = os.environ.get(
+    "PUMP_RPC_URL",
+    "https://solana-mainnet.g.alchemy.com/v2/vdQ02Yrm0xuJNYOCH0MbgJt1FnHEp6zt",
+)
+# Extra endpoints for the RPC pool, comma-separated (ALCHEMY_RPC is always first)
+RPC_ENDPOINTS = [ALCHEMY_RPC] + [
+    u.strip() for u in os.environ.get("SOLANA_RPC_ENDPOINTS", "").split(",") if u.strip()
+]
+# Websocket endpoint for the launch stream (step1_fetch_launches --stream)
+RPC_WS_URL = os.environ.get(
+    "PUMP_RPC_WS_URL",
+    ALCHEMY_RPC.replace("https://", "wss://", 1).replace("http://", "ws://", 1),
+)
 PUMP_PROGRAM = "6EF8rrecthR5Dkzon8Nwu78hRvfCKubJ14M5uBEwF6P"
 TOKEN22_PROGRAM = "TokenzQdBNbLqP5VEhdkAS6EPFLC1PHnBqCXEpPxuEb"
 
@@ -12,40 +34,82 @@ JAN20_START_TS = 1768867200
 JAN20_END_TS = 1768953600
 GRADUATION_USD = 69000
 
-DEXSCREENER_BASE = "https://api.dexscreener.com"
-GECKOTERMINAL_BASE = "https://api.geckoterminal.com/api/v2"
+DEXSCREENER_BASE = os.environ.get("PUMP_DEXSCREENER_BASE", "https://api.dexscreener.com")
+GECKOTERMINAL_BASE = os.environ.get("PUMP_GECKOTERMINAL_BASE",
+                                    "https://api.geckoterminal.com/api/v2")
 
-SESSION = requests.Session()
-SESSION.headers.update({"User-Agent": "Mozilla/5.0", "Accept": "application/json"})
+# Per-service concurrency: semaphores in the steps and HTTP pool sizes both use these
+ALCHEMY_CONCURRENCY = int(os.environ.get("ALCHEMY_CONCURRENCY", "50"))
+DEX_CONCURRENCY = int(os.environ.get("DEX_CONCURRENCY", "5"))
+GECKO_CONCURRENCY = int(os.environ.get("GECKO_CONCURRENCY", "3"))
+# Alchemy plan limit in compute units per second; 0 = unthrottled, metering only
+ALCHEMY_CU_PER_SECOND = int(os.environ.get("ALCHEMY_CU_PER_SECOND", "0"))
+# PUMP_HTTP2=1 multiplexes RPC + GeckoTerminal over HTTP/2 (needs httpx[http2])
+USE_HTTP2 = os.environ.get("PUMP_HTTP2") == "1"
 
-def rpc_call(method, params, retries=3):
-    for attempt in range(retries):
-        try:
-            r = SESSION.post(ALCHEMY_RPC, json={
-                "jsonrpc": "2.0", "id": 1, "method": method, "params": params
-            }, timeout=30)
-            d = r.json()
-            if "error" in d:
-                if attempt < retries - 1:
-                    time.sleep(2 ** attempt)
-                    continue
-                return None
-            return d.get("result")
-        except Exception as e:
-            if attempt < retries - 1:
-                time.sleep(2 ** attempt)
-    return None
+# Keyed by netloc (host[:port]) to match Transport's pools
+RPC_HOSTS = [urlsplit(u).netloc for u in RPC_ENDPOINTS]
+HOST_POOL_SIZES = {host: ALCHEMY_CONCURRENCY for host in RPC_HOSTS}
+HOST_POOL_SIZES[urlsplit(DEXSCREENER_BASE).netloc] = DEX_CONCURRENCY
+HOST_POOL_SIZES[urlsplit(GECKOTERMINAL_BASE).netloc] = GECKO_CONCURRENCY
+
+SESSION = Transport(
+    pool_sizes=HOST_POOL_SIZES,
+    http2_hosts=(RPC_HOSTS + [urlsplit(GECKOTERMINAL_BASE).netloc]) if USE_HTTP2 else (),
+)
+
+CU_SCHEDULER = CuScheduler(ALCHEMY_CU_PER_SECOND)
+RPC_POOL = RpcPool(RPC_ENDPOINTS, SESSION, scheduler=CU_SCHEDULER)
+
+# Record/replay (PUMP_CASSETTE_MODE=record|replay|auto); None = straight to network
+CASSETTE = cassette.from_env()
+if CASSETTE is not None:
+    atexit.register(CASSETTE.flush)
+
+def pace(seconds):
+    """Politeness sleep between API calls; skipped when replaying from a cassette."""
+    if CASSETTE is None or not CASSETTE.replaying:
+        time.sleep(seconds)
+
+def rpc_call(method, params, retries=3, priority=None):
+    """
+    Routed through RPC_POOL: healthiest endpoint, hedged past its p95 latency,
+    admitted against the CU budget (priority: lower runs first, default per method).
+    """
+    if CASSETTE is not None:
+        key, request = cassette.rpc_key(method, params)
+        return CASSETTE.through(key, request, "rpc",
+                                lambda: RPC_POOL.call(method, params, retries, priority))
+    return RPC_POOL.call(method, params, retries, priority)
 
 def http_get(url, params=None, retries=3, delay=0.5):
+    if CASSETTE is not None:
+        key, request = cassette.http_key(url, params)
+        return CASSETTE.through(key, request, "http",
+                                lambda: _http_get(url, params, retries, delay))
+    return _http_get(url, params, retries, delay)
+
+def _http_get(url, params=None, retries=3, delay=0.5):
+    host = urlsplit(url).netloc
     for attempt in range(retries):
+        if attempt:
+            METRICS.retry("GET", host=host)
+        start = time.time()
         try:
             r = SESSION.get(url, params=params, timeout=20)
-            if r.status_code == 429:
-                time.sleep(5 * (attempt + 1))
-                continue
-            if r.status_code == 200:
-                return r.json()
-            time.sleep(delay)
         except Exception:
+            METRICS.observe_request(host, "GET", time.time() - start, "error")
             time.sleep(delay)
+            continue
+        METRICS.observe_request(host, "GET", time.time() - start, r.status_code, len(r.content))
+        if r.status_code == 429:
+            time.sleep(5 * (attempt + 1))
+            continue
+        if r.status_code == 200:
+            try:
+                with METRICS.timed_op("json_decode"):
+                    return r.json()
+            except Exception:
+                pass
+        time.sleep(delay)
     return None
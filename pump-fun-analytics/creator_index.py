@@ -0,0 +1,326 @@
+#!/usr/bin/env python3
+"""
+creator_index.py — Creator → launches index, hash-partitioned next to the token store.
+
+Serial ruggers launch token after token that goes nowhere. Spotting them
+needs every launch by the same wallet across every scanned day — a group-by
+over months of launches that should not mean re-reading all of them.
+
+  data/creator_index/part-<NN>.npz   one file per crc32(creator) % PARTITIONS
+
+Each partition keeps its rows as columns (creator, mint, slot, block_time,
+grad_time, status, grad_pct, peak_grad_pct) sorted by (creator, slot), plus the offset of each
+creator's first row: one creator's launches are a contiguous slice, and the
+per-creator aggregates — launches, graduated, graduation rate, median
+grad_pct, median replayed peak grad % — are np.add.reduceat / sorted-index
+lookups over those offsets, with no Python loop per creator.
+
+update() is called wherever the token store is written (step1 phase 5,
+step1_enrich). Rows dedupe by mint with the newest record winning, so an
+enrich pass refreshes outcomes; a partition is rewritten only if its rows
+actually changed.
+
+history() gives, per token, the creator's launches *before* it and how many
+of those had graduated by its launch time — an earlier launch counts only if
+its graduation (DexScreener pairCreatedAt) precedes this token's block time,
+so a later graduation or today's dead/active status never leaks in. Graduated
+launches with no known pair creation time never count as prior graduations.
+analyze.py uses it to drop serial-rugger launches from the strategies.
+
+Usage:
+  python3 creator_index.py build                  # (re)build from data/step1_launches.json
+  python3 creator_index.py top [--by launches|graduated|grad_rate] [--n 20] [--min-launches 2]
+  python3 creator_index.py creator <ADDRESS>
+"""
+
+import argparse
+import json
+import os
+import shutil
+import zlib
+
+import numpy as np
+
+from metrics import METRICS
+from slot_time import estimate_times
+
+INDEX_DIR = "data/creator_index"
+PARTITIONS = 16
+# Serial rugger: at least this many earlier launches, none of which graduated
+RUGGER_MIN_LAUNCHES = 3
+RUGGER_MAX_GRAD_RATE = 0.0
+
+STATUS_CODES = {"dead": 0, "active": 1, "graduated": 2}
+STATUS_NAMES = {v: k for k, v in STATUS_CODES.items()}
+GRADUATED = STATUS_CODES["graduated"]
+COLUMNS = ("creator", "mint", "slot", "block_time", "grad_time", "status", "grad_pct",
+           "peak_grad_pct")
+AGGREGATES = ("creator", "launches", "graduated", "grad_rate", "median_grad_pct",
+              "median_peak_grad_pct", "first_slot", "last_slot")
+
+
+def partition_of(creator, partitions=PARTITIONS):
+    # crc32, not hash(): the assignment must be stable across processes
+    return zlib.crc32(creator.encode()) % partitions
+
+
+def token_columns(tokens):
+    """Column arrays for the tokens that have a creator."""
+    tokens = [t for t in tokens if t.get("creator")]
+    slot = np.array([t.get("slot") or 0 for t in tokens], dtype=np.int64)
+    block_time = np.array([t.get("block_time") or 0 for t in tokens], dtype=np.int64)
+    missing = np.flatnonzero((block_time <= 0) & (slot > 0))
+    if len(missing):
+        # Estimated from the slot-time cache (whatever days have been resolved)
+        block_time[missing] = estimate_times(slot[missing])
+    return {
+        "creator": np.array([t["creator"] for t in tokens], dtype="U44"),
+        "mint": np.array([t["mint"] for t in tokens], dtype="U44"),
+        "slot": slot,
+        "block_time": block_time,
+        # Pair creation (s) of a graduated launch; 0 = not graduated or time unknown
+        "grad_time": np.array([(t.get("pair_created_at") or 0) // 1000
+                               if t.get("status") == "graduated" else 0 for t in tokens],
+                              dtype=np.int64),
+        "status": np.array([STATUS_CODES.get(t.get("status"), -1) for t in tokens], dtype=np.int8),
+        "grad_pct": np.array([t.get("grad_pct") or 0.0 for t in tokens], dtype=np.float32),
+        "peak_grad_pct": np.array([t["peak_grad_pct"] if t.get("peak_grad_pct") is not None
+                                   else np.nan for t in tokens], dtype=np.float32),
+    }
+
+
+def _group_median(values, offsets, group):
+    """Median of `values` within each group (NaNs ignored; NaN for an all-NaN group)."""
+    if not len(values):
+        return np.zeros(0)
+    ordered = values[np.lexsort((values, group))].astype(np.float64)   # NaNs last per group
+    valid = np.add.reduceat((~np.isnan(values)).astype(np.int64), offsets)
+    lo = offsets + np.maximum(valid - 1, 0) // 2
+    hi = offsets + np.where(valid > 0, valid // 2, 0)
+    return np.where(valid > 0, (ordered[lo] + ordered[np.minimum(hi, len(ordered) - 1)]) / 2, np.nan)
+
+
+class Partition:
+    """One hash partition: rows sorted by (creator, slot) with per-creator offsets."""
+
+    def __init__(self, cols=None):
+        cols = cols or token_columns([])
+        order = np.lexsort((cols["slot"], cols["creator"]))
+        self.cols = {k: v[order] for k, v in cols.items()}
+        creator = self.cols["creator"]
+        self.creators, self.offsets = np.unique(creator, return_index=True)
+        self.group = np.repeat(np.arange(len(self.offsets)), self.counts)
+
+    def __len__(self):
+        return len(self.cols["mint"])
+
+    @property
+    def counts(self):
+        return np.diff(np.append(self.offsets, len(self)))
+
+    @classmethod
+    def load(cls, path):
+        if not os.path.exists(path):
+            return cls()
+        with np.load(path) as z:
+            return cls({k: z[k] for k in COLUMNS})
+
+    def save(self, path):
+        tmp = path + ".tmp.npz"
+        np.savez(tmp, **self.cols)
+        os.replace(tmp, path)
+
+    def merged(self, cols):
+        """New partition with `cols` added; a mint already present is replaced."""
+        both = {k: np.concatenate([self.cols[k], cols[k]]) for k in COLUMNS}
+        # Last occurrence of each mint wins: unique over the reversed rows
+        _, first_rev = np.unique(both["mint"][::-1], return_index=True)
+        keep = len(both["mint"]) - 1 - first_rev
+        return Partition({k: v[keep] for k, v in both.items()})
+
+    def same_rows(self, other):
+        return len(self) == len(other) and all(
+            np.array_equal(self.cols[k], other.cols[k], equal_nan=self.cols[k].dtype.kind == "f")
+            for k in COLUMNS)
+
+    def aggregates(self):
+        counts = self.counts
+        if not len(self):
+            return {k: np.zeros(0) for k in AGGREGATES}
+        graduated = np.add.reduceat((self.cols["status"] == GRADUATED).astype(np.int64),
+                                    self.offsets)
+        return {
+            "creator": self.creators,
+            "launches": counts,
+            "graduated": graduated,
+            "grad_rate": graduated / counts,
+            "median_grad_pct": _group_median(self.cols["grad_pct"], self.offsets, self.group),
+            "median_peak_grad_pct": _group_median(self.cols["peak_grad_pct"], self.offsets,
+                                                  self.group),
+            "first_slot": self.cols["slot"][self.offsets],
+            "last_slot": self.cols["slot"][self.offsets + counts - 1],
+        }
+
+    def history(self):
+        """Per row: the creator's earlier launches and how many had graduated by its launch."""
+        start = self.offsets[self.group]
+        prior_launches = np.arange(len(self)) - start
+        if not len(self):
+            return prior_launches, prior_launches
+        # Count, within the creator's group, graduation times strictly before this row's
+        # block time: one searchsorted over (group, time) keys flattened into int64
+        block_time, grad_time = self.cols["block_time"], self.cols["grad_time"]
+        span = int(max(grad_time.max(), block_time.max())) + 2
+        grad_time = np.where(grad_time > 0, grad_time, span - 1)    # never graduated: sorts last
+        keys = np.sort(self.group * span + grad_time)
+        at = np.searchsorted(keys, self.group * span + block_time, side="left")
+        prior_graduated = np.minimum(at - start, prior_launches)
+        return prior_launches, prior_graduated
+
+
+class CreatorIndex:
+    def __init__(self, root=INDEX_DIR, partitions=PARTITIONS):
+        self.root = root
+        self.partitions = partitions
+        self._cache = {}
+        meta = self._meta()
+        if meta and meta.get("partitions") != partitions:
+            raise ValueError(f"{root} has {meta['partitions']} partitions, not {partitions}; "
+                             f"rebuild it with `python3 creator_index.py build`")
+        if meta and meta.get("columns") != list(COLUMNS):
+            raise ValueError(f"{root} predates the current columns {COLUMNS}; "
+                             f"rebuild it with `python3 creator_index.py build`")
+
+    def _path(self, p):
+        return os.path.join(self.root, f"part-{p:02d}.npz")
+
+    def _meta(self):
+        path = os.path.join(self.root, "meta.json")
+        if not os.path.exists(path):
+            return None
+        with open(path) as f:
+            return json.load(f)
+
+    def exists(self):
+        return self._meta() is not None
+
+    def partition(self, p):
+        if p not in self._cache:
+            with METRICS.timed_op("creator_index_load"):
+                self._cache[p] = Partition.load(self._path(p))
+        return self._cache[p]
+
+    def update(self, tokens):
+        """Merge launches into their partitions; returns how many partitions were rewritten."""
+        cols = token_columns(tokens)
+        os.makedirs(self.root, exist_ok=True)
+        part = np.array([partition_of(c, self.partitions) for c in cols["creator"]], dtype=np.int64)
+        rewritten = 0
+        with METRICS.timed_op("creator_index_update"):
+            for p in np.unique(part):
+                mask = part == p
+                old = self.partition(int(p))
+                new = old.merged({k: v[mask] for k, v in cols.items()})
+                if not new.same_rows(old):
+                    new.save(self._path(int(p)))
+                    self._cache[int(p)] = new
+                    rewritten += 1
+        rows = sum(len(self.partition(p)) for p in range(self.partitions))
+        with open(os.path.join(self.root, "meta.json"), "w") as f:
+            json.dump({"partitions": self.partitions, "columns": list(COLUMNS), "rows": rows}, f)
+        METRICS.set_gauge("creator_index_rows", rows)
+        return rewritten
+
+    def rebuild(self, tokens):
+        if os.path.exists(self.root):
+            shutil.rmtree(self.root)
+        self._cache = {}
+        return self.update(tokens)
+
+    def creator(self, address):
+        """Every indexed launch by `address`, in slot order."""
+        part = self.partition(partition_of(address, self.partitions))
+        i = np.searchsorted(part.creators, address)
+        if i == len(part.creators) or part.creators[i] != address:
+            return []
+        start, end = part.offsets[i], part.offsets[i] + part.counts[i]
+        return [{"mint": str(part.cols["mint"][j]), "slot": int(part.cols["slot"][j]),
+                 "status": STATUS_NAMES.get(int(part.cols["status"][j])),
+                 "grad_pct": round(float(part.cols["grad_pct"][j]), 2),
+                 "peak_grad_pct": (None if np.isnan(part.cols["peak_grad_pct"][j])
+                                   else round(float(part.cols["peak_grad_pct"][j]), 2))}
+                for j in range(start, end)]
+
+    def aggregates(self):
+        """Per-creator aggregates over every partition, as columns."""
+        per = [self.partition(p).aggregates() for p in range(self.partitions)]
+        return {k: np.concatenate([a[k] for a in per]) for k in per[0]}
+
+    def history(self):
+        """mint -> (earlier launches by its creator, how many had graduated by its launch)."""
+        out = {}
+        for p in range(self.partitions):
+            part = self.partition(p)
+            prior, prior_grad = part.history()
+            out.update(zip(part.cols["mint"].tolist(), zip(prior.tolist(), prior_grad.tolist())))
+        return out
+
+
+def serial_rugger_mints(history, min_launches=RUGGER_MIN_LAUNCHES,
+                        max_grad_rate=RUGGER_MAX_GRAD_RATE):
+    """
+    Mints whose creator already had ≥ min_launches launches graduating at ≤ max_grad_rate
+    (a first launch has no rate, so it is never flagged, even with min_launches=0).
+    """
+    return {mint for mint, (prior, grad) in history.items()
+            if prior >= min_launches and prior > 0 and grad / prior <= max_grad_rate}
+
+
+def load_index(tokens=None):
+    """The persisted index, built from `tokens` first if it does not exist yet."""
+    index = CreatorIndex()
+    if not index.exists() and tokens:
+        index.update(tokens)
+    return index
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Creator → launches index")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    sub.add_parser("build", help="rebuild from data/step1_launches.json")
+    top = sub.add_parser("top", help="creators ranked by an aggregate")
+    top.add_argument("--by", choices=("launches", "graduated", "grad_rate"), default="launches")
+    top.add_argument("--n", type=int, default=20)
+    top.add_argument("--min-launches", type=int, default=2)
+    one = sub.add_parser("creator", help="every launch by one creator")
+    one.add_argument("address")
+    args = parser.parse_args()
+
+    if args.cmd == "build":
+        with open("data/step1_launches.json") as f, METRICS.timed_op("json_load"):
+            tokens = json.load(f)
+        # Cleared first: an index of another layout cannot even be opened
+        shutil.rmtree(INDEX_DIR, ignore_errors=True)
+        index = CreatorIndex()
+        index.rebuild(tokens)
+        agg = index.aggregates()
+        print(f"Indexed {len(tokens):,} launches by {len(agg['creator']):,} creators "
+              f"→ {INDEX_DIR}/ ({PARTITIONS} partitions)")
+        return
+    index = CreatorIndex()
+    if args.cmd == "top":
+        agg = index.aggregates()
+        keep = agg["launches"] >= args.min_launches
+        order = np.argsort(-agg[args.by][keep], kind="stable")[:args.n]
+        print(f"  {'Creator':<46} {'Launches':>8} {'Grad':>5} {'Rate':>6} {'Med %':>6} {'Peak %':>7}")
+        for i in np.flatnonzero(keep)[order]:
+            print(f"  {agg['creator'][i]:<46} {agg['launches'][i]:>8} {agg['graduated'][i]:>5} "
+                  f"{agg['grad_rate'][i] * 100:>5.1f}% {agg['median_grad_pct'][i]:>6.1f} "
+                  f"{agg['median_peak_grad_pct'][i]:>7.1f}")
+    else:
+        for row in index.creator(args.address):
+            print(json.dumps(row))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+cu_budget.py — Compute-unit budget scheduler for RPC requests.
+
+Alchemy bills each JSON-RPC method a different number of compute units (CU)
+and throttles on CU per second, not on request count. The scheduler holds a
+per-method cost table and a token bucket refilled at cu_per_second. Every
+physical request (retries and hedges included) is admitted only when the
+bucket covers its cost, lowest priority number first, so slot listing is not
+starved by a flood of block fetches or PDA reads.
+
+cu_per_second=0 disables throttling but still meters CU spent per method.
+"""
+
+import heapq
+import itertools
+import threading
+import time
+
+# Approximate Alchemy Solana CU costs; tune to the plan's published table.
+CU_COSTS = {
+    "getBlock":            40,
+    "getBlocks":           20,
+    "getBlocksWithLimit":  20,
+    "getBlockTime":        10,
+    "getAccountInfo":      10,
+    "getMultipleAccounts": 20,
+    "getProgramAccounts":  100,
+    "getSignaturesForAddress": 40,
+    "getTransaction":      40,
+    "getSlot":             10,
+}
+DEFAULT_COST = 20
+
+# Lower runs first: slot listing gates everything after it
+METHOD_PRIORITY = {
+    "getBlocks":          0,
+    "getBlocksWithLimit": 0,
+    "getBlockTime":       0,
+    "getSlot":            0,
+    "getBlock":           1,
+    "getAccountInfo":     2,
+    "getMultipleAccounts": 2,
+    "getProgramAccounts": 2,
+}
+DEFAULT_PRIORITY = 3
+
+
+def method_cost(method, params=None):
+    """CU cost of one call; getBlock without transaction details is cheap."""
+    cost = CU_COSTS.get(method, DEFAULT_COST)
+    if method == "getBlock" and params and len(params) > 1 and isinstance(params[1], dict):
+        if params[1].get("transactionDetails") == "none":
+            cost = CU_COSTS["getBlockTime"]
+    return cost
+
+
+class CuScheduler:
+    def __init__(self, cu_per_second=0, burst_seconds=1.0):
+        self.cu_per_second = cu_per_second
+        self.capacity = cu_per_second * burst_seconds
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.cond = threading.Condition()
+        self.waiters = []                # heap of (priority, seq)
+        self.seq = itertools.count()
+        self.spent = {}                  # method -> CU
+        self.calls = {}                  # method -> count
+        self.started = time.time()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.cu_per_second)
+        self.updated = now
+
+    def acquire(self, method, params=None, priority=None):
+        """Block until the request fits the budget and no higher-priority caller is waiting."""
+        cost = method_cost(method, params)
+        with self.cond:
+            self.spent[method] = self.spent.get(method, 0) + cost
+            self.calls[method] = self.calls.get(method, 0) + 1
+            if not self.cu_per_second:
+                return cost
+
+            if priority is None:
+                priority = METHOD_PRIORITY.get(method, DEFAULT_PRIORITY)
+            ticket = (priority, next(self.seq))
+            heapq.heappush(self.waiters, ticket)
+            try:
+                while True:
+                    self._refill()
+                    # A single request costlier than the bucket waits for a full bucket
+                    need = min(cost, self.capacity)
+                    if self.waiters[0] == ticket and self.tokens >= need:
+                        self.tokens -= cost
+                        return cost
+                    wait = max((need - self.tokens) / self.cu_per_second, 0.001)
+                    self.cond.wait(timeout=wait if self.waiters[0] == ticket else None)
+            finally:
+                self.waiters.remove(ticket)
+                heapq.heapify(self.waiters)
+                self.cond.notify_all()
+
+    def report(self):
+        """CU spent per method since construction, plus the achieved CU/s."""
+        with self.cond:
+            elapsed = max(time.time() - self.started, 1e-9)
+            total = sum(self.spent.values())
+            return {
+                "budget_cu_per_second": self.cu_per_second,
+                "total_cu": total,
+                "elapsed_s": round(elapsed, 1),
+                "avg_cu_per_second": round(total / elapsed, 1),
+                "by_method": {
+                    m: {"calls": self.calls[m], "cu": cu}
+                    for m, cu in sorted(self.spent.items(), key=lambda kv: -kv[1])
+                },
+            }
+
+    def print_report(self):
+        r = self.report()
+        budget = r["budget_cu_per_second"] or "unlimited"
+        print(f"\nCompute units: {r['total_cu']:,} CU in {r['elapsed_s']}s "
+              f"({r['avg_cu_per_second']} CU/s, budget {budget})")
+        for m, v in r["by_method"].items():
+            print(f"  {m:<22} {v['calls']:>9,} calls  {v['cu']:>12,} CU")
@@ -0,0 +1,285 @@
+#!/usr/bin/env python3
+"""
+cube.py — Vectorized launch-distribution cube over configurable dimensions.
+
+step2 bucketed grad_pct with an if/elif ladder, one dimension per pass, and
+every new way of slicing the distribution was another pass over the full
+JSON. The cube counts every token once into a dense int64 array:
+
+  grad     today's grad_pct bucket (edges 10/25/50/75/90/100, as step2)
+  peak     reached grad % bucket (step1 reserve-replay peak when present)
+  hour     launch hour of day, UTC
+  status   dead / active / graduated / unknown
+  cohort   creator cohort at launch (creator_index history): first launch,
+           repeat, serial rugger, proven (an earlier launch had graduated by then)
+
+Building is one np.digitize / lookup per dimension, np.ravel_multi_index and
+one np.bincount. A query indexes the dimensions it filters and sums out the
+ones it does not group by, so its cost depends on the cube's size, not on the
+number of tokens.
+
+The cube remembers each token's cell, so update() with re-enriched tokens
+moves them between cells instead of double counting them, and a new day's
+launches are simply added. step2 persists it to data/step2_cube.npz.
+
+Usage:
+  python3 cube.py build [--dims grad,peak,hour,status,cohort]
+  python3 cube.py query --by peak,cohort [--where status=dead,active] [--where hour=13]
+"""
+
+import argparse
+import json
+import os
+import sys
+from dataclasses import dataclass
+from typing import Callable
+
+import numpy as np
+
+from creator_index import RUGGER_MAX_GRAD_RATE, RUGGER_MIN_LAUNCHES, load_index
+from metrics import METRICS
+from slot_time import estimate_times
+
+CUBE_FILE = "data/step2_cube.npz"
+GRAD_EDGES = (10, 25, 50, 75, 90, 100)
+GRAD_LABELS = ("0-10", "10-25", "25-50", "50-75", "75-90", "90-99", "100")
+STATUS_LABELS = ("dead", "active", "graduated", "unknown")
+COHORT_LABELS = ("first", "repeat", "rugger", "proven", "unknown")
+
+
+def grad_codes(pct):
+    """Bucket index per grad %: 0 for <10 … 6 for >=100."""
+    return np.digitize(np.nan_to_num(np.asarray(pct, dtype=np.float64)), GRAD_EDGES)
+
+
+# ── Dimensions ───────────────────────────────────────────────────────────────
+
+def token_columns(tokens, history=None):
+    """Column arrays the dimensions are computed from; history: mint -> (prior, prior_grad)."""
+    history = history or {}
+    prior = np.array([history.get(t["mint"], (-1, 0))[0] for t in tokens], dtype=np.int64)
+    prior_grad = np.array([history.get(t["mint"], (-1, 0))[1] for t in tokens], dtype=np.int64)
+    block_time = np.array([t.get("block_time") or 0 for t in tokens], dtype=np.int64)
+    missing = np.flatnonzero(block_time <= 0)
+    if len(missing):
+        # Estimated from the slot-time cache (whatever days have been resolved)
+        slots = np.array([tokens[i].get("slot") or 0 for i in missing], dtype=np.int64)
+        block_time[missing] = np.where(slots > 0, estimate_times(slots), 0)
+    grad = np.array([t.get("grad_pct") or 0 for t in tokens], dtype=np.float64)
+    peak = np.array([t.get("peak_grad_pct") or 0 for t in tokens], dtype=np.float64)
+    return {
+        "grad_pct": grad,
+        "reached_pct": np.maximum(grad, peak),
+        "block_time": block_time,
+        "status": np.array([t.get("status") or "unknown" for t in tokens]),
+        "prior": prior,
+        "prior_grad": prior_grad,
+    }
+
+
+def _lookup(values, labels):
+    codes = np.full(len(values), len(labels) - 1, dtype=np.int64)   # last label: unknown
+    for i, label in enumerate(labels[:-1]):
+        codes[values == label] = i
+    return codes
+
+
+def _cohort_codes(cols):
+    prior, grad = cols["prior"], cols["prior_grad"]
+    rate = np.divide(grad, prior, out=np.zeros(len(prior)), where=prior > 0)
+    return np.select(
+        [prior < 0, grad > 0, (prior >= RUGGER_MIN_LAUNCHES) & (rate <= RUGGER_MAX_GRAD_RATE),
+         prior == 0],
+        [COHORT_LABELS.index("unknown"), COHORT_LABELS.index("proven"),
+         COHORT_LABELS.index("rugger"), COHORT_LABELS.index("first")],
+        default=COHORT_LABELS.index("repeat"),
+    )
+
+
+def _hour_label(value):
+    """"5", 5 and "05" all name the 05:00 UTC hour."""
+    value = str(value).strip()
+    return f"{int(value):02d}" if value.isdigit() else value
+
+
+@dataclass
+class Dimension:
+    name: str
+    labels: tuple
+    codes: Callable          # token columns -> label index per token
+    normalize: Callable = str   # query input -> label
+
+    def index(self, label):
+        """Position of a query label; ValueError naming the valid labels if unknown."""
+        norm = self.normalize(label)
+        if norm not in self.labels:
+            raise ValueError(f"unknown {self.name} label {label!r}; valid: {', '.join(self.labels)}")
+        return self.labels.index(norm)
+
+
+DIMENSIONS = {d.name: d for d in (
+    Dimension("grad", GRAD_LABELS, lambda c: grad_codes(c["grad_pct"])),
+    Dimension("peak", GRAD_LABELS, lambda c: grad_codes(c["reached_pct"])),
+    Dimension("hour", tuple(f"{h:02d}" for h in range(24)), lambda c: (c["block_time"] // 3600) % 24,
+              _hour_label),
+    Dimension("status", STATUS_LABELS, lambda c: _lookup(c["status"], STATUS_LABELS)),
+    Dimension("cohort", COHORT_LABELS, _cohort_codes),
+)}
+DEFAULT_DIMS = ("grad", "peak", "hour", "status", "cohort")
+
+
+# ── Cube ─────────────────────────────────────────────────────────────────────
+
+class Cube:
+    def __init__(self, dims=DEFAULT_DIMS):
+        unknown = [d for d in dims if d not in DIMENSIONS]
+        if unknown:
+            raise ValueError(f"unknown dimension(s) {unknown}; choose from {list(DIMENSIONS)}")
+        self.dims = [DIMENSIONS[d] for d in dims]
+        self.shape = tuple(len(d.labels) for d in self.dims)
+        self.counts = np.zeros(self.shape, dtype=np.int64)
+        self.cells = {}          # mint -> flat cell index
+
+    @property
+    def names(self):
+        return tuple(d.name for d in self.dims)
+
+    @property
+    def total(self):
+        return int(self.counts.sum())
+
+    def cell_of(self, cols):
+        return np.ravel_multi_index(tuple(d.codes(cols) for d in self.dims), self.shape)
+
+    def update(self, tokens, history=None):
+        """Add new tokens and move known ones to their current cell; returns (added, moved)."""
+        latest = {t["mint"]: t for t in tokens}      # a mint twice in one batch counts once
+        tokens = list(latest.values())
+        if not tokens:
+            return 0, 0
+        with METRICS.timed_op("cube_update"):
+            cells = self.cell_of(token_columns(tokens, history))
+            old = np.array([self.cells.get(t["mint"], -1) for t in tokens], dtype=np.int64)
+            known = old >= 0
+            flat = self.counts.reshape(-1)
+            flat -= np.bincount(old[known], minlength=flat.size)
+            flat += np.bincount(cells, minlength=flat.size)
+            self.cells.update(zip(latest, cells.tolist()))
+        return int((~known).sum()), int((known & (old != cells)).sum())
+
+    def query(self, by=(), **where):
+        """
+        Token counts grouped by the `by` dimensions (in that order) over the
+        cells matching `where` ({dimension: label or list of labels}).
+        Returns a plain int for by=(), else an ndarray shaped like `by`.
+        """
+        by = (by,) if isinstance(by, str) else tuple(by)
+        names = self.names
+        for name in list(by) + list(where):
+            if name not in names:
+                raise ValueError(f"dimension {name!r} not in this cube {names}")
+        index = []
+        for d in self.dims:
+            sel = where.get(d.name)
+            if sel is None:
+                index.append(np.arange(len(d.labels)))
+            else:
+                sel = [sel] if isinstance(sel, str) else sel
+                index.append(np.array([d.index(s) for s in sel], dtype=np.int64))
+        with METRICS.timed_op("cube_query"):
+            sub = self.counts[np.ix_(*index)]
+            kept = [n for n in names if n in by]
+            sub = sub.sum(axis=tuple(i for i, n in enumerate(names) if n not in by))
+            sub = np.transpose(sub, [kept.index(n) for n in by]) if by else sub
+        return int(sub) if not by else sub
+
+    def distribution(self, by, **where):
+        """One-dimensional query as an ordered {label: count} dict."""
+        return dict(zip(self.labels(by), self.query(by, **where).tolist()))
+
+    def labels(self, name):
+        return DIMENSIONS[name].labels
+
+    # ── Persistence ──────────────────────────────────────────────────────────
+
+    def save(self, path=CUBE_FILE):
+        tmp = path + ".tmp.npz"
+        np.savez(tmp, dims=np.array(self.names), counts=self.counts,
+                 mints=np.array(list(self.cells), dtype="U44"),
+                 cells=np.fromiter(self.cells.values(), dtype=np.int64, count=len(self.cells)))
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path=CUBE_FILE, dims=None):
+        """The persisted cube, or None if missing or built over other dimensions than `dims`."""
+        if not os.path.exists(path):
+            return None
+        with np.load(path) as z:
+            saved = tuple(z["dims"].tolist())
+            if dims is not None and tuple(dims) != saved:
+                return None
+            cube = cls(saved)
+            cube.counts = z["counts"].copy()
+            cube.cells = dict(zip(z["mints"].tolist(), z["cells"].tolist()))
+        return cube
+
+
+def load_or_build(tokens, dims=DEFAULT_DIMS, path=CUBE_FILE, history=None):
+    """Persisted cube brought up to date with `tokens` (creator cohorts from the creator index)."""
+    cube = Cube.load(path, dims) or Cube(dims)
+    if history is None and "cohort" in cube.names:
+        history = load_index(tokens).history()
+    added, moved = cube.update(tokens, history)
+    return cube, added, moved
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Launch distribution cube")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    build = sub.add_parser("build", help="rebuild from data/step1_launches.json")
+    build.add_argument("--dims", default=",".join(DEFAULT_DIMS))
+    query = sub.add_parser("query", help="slice the persisted cube")
+    query.add_argument("--by", default="", help="comma-separated dimensions to group by")
+    query.add_argument("--where", action="append", default=[], metavar="DIM=LABEL[,LABEL]")
+    args = parser.parse_args()
+
+    if args.cmd == "build":
+        with open("data/step1_launches.json") as f, METRICS.timed_op("json_load"):
+            tokens = json.load(f)
+        dims = tuple(d for d in args.dims.split(",") if d)
+        cube = Cube(dims)
+        cube.update(tokens, load_index(tokens).history() if "cohort" in dims else None)
+        cube.save()
+        print(f"Cube {' × '.join(cube.names)} {cube.shape} over {cube.total:,} tokens → {CUBE_FILE}")
+        return
+
+    cube = Cube.load()
+    if cube is None:
+        print(f"ERROR: {CUBE_FILE} not found. Run step2_near_graduation.py or `cube.py build`.")
+        return
+    by = tuple(d for d in args.by.split(",") if d)
+    where = {}
+    for spec in args.where:
+        name, _, labels = spec.partition("=")
+        where[name] = labels.split(",")
+    try:
+        result = cube.query(by, **where)
+    except ValueError as e:
+        print(f"ERROR: {e}")
+        sys.exit(1)
+    if not by:
+        print(result)
+    elif len(by) == 1:
+        for label, n in zip(cube.labels(by[0]), result.tolist()):
+            print(f"  {label:>10}  {n:>8,}")
+    elif len(by) == 2:
+        print(f"  {'':>10}  " + "  ".join(f"{c:>8}" for c in cube.labels(by[1])))
+        for label, row in zip(cube.labels(by[0]), result.tolist()):
+            print(f"  {label:>10}  " + "  ".join(f"{n:>8,}" for n in row))
+    else:
+        print(json.dumps({"by": by, "labels": [cube.labels(d) for d in by],
+                          "counts": result.tolist()}))
+
+
+if __name__ == "__main__":
+    main()
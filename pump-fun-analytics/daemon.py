@@ -0,0 +1,397 @@
+#!/usr/bin/env python3
+"""
+daemon.py — Long-running query server over the pipeline outputs.
+
+Every script is a cold process: it re-imports, re-parses the launches JSON,
+rebuilds price_map and the candle arrays, and opens fresh connection pools.
+The daemon does that once and keeps it warm:
+  - token store: launches by mint, plus numpy indexes sorted by market cap,
+    grad_pct and peak grad % (step1 reserve replay) for slice queries
+  - price records and the packed candle arrays (simulator.build_paths over the
+    memory-mapped candle store)
+  - the process-wide HTTP / RPC pools from config.py, for on-demand refreshes
+  - a result cache for strategy evaluations, cleared on reload
+Files are re-read when their mtime changes (checked every RELOAD_SECONDS), so
+the daemon follows pipeline.py runs without a restart.
+
+API (GET, JSON) on 127.0.0.1:--port or a Unix socket (--socket):
+  /health                                   counts, load time, cache size
+  /top?k=20[&by=market_cap_usd][&status=graduated]
+  /grad?min=50&max=90[&by=grad_pct|peak][&status=active][&limit=100]
+  /mint/<mint>[?refresh=1]                  token + price record + its graduation candle
+                                            windows (refresh re-enriches)
+  /strategy?name=ladder&take_profits=2,5&tranches=0.5,0.25&stop_loss=-0.6
+           [&path_dependent=1][&ci=1]       also name=momentum|quick_flip|hold_24h
+  /q1                                       analyze_q1 over the warm store
+  /cube?by=peak,cohort[&status=dead,active][&hour=13]
+                                            slice of the step2 launch cube (cube.py)
+  /reload                                   re-read the data files now
+  /metrics                                  Prometheus text
+
+Usage:
+  python3 daemon.py serve [--port 8765 | --socket data/daemon.sock]
+  python3 daemon.py query "/top?k=5" [--port 8765 | --socket data/daemon.sock]
+"""
+
+import argparse
+import http.client
+import json
+import os
+import socket
+import socketserver
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, unquote, urlsplit
+
+import numpy as np
+
+from analyze import (
+    SWEEP_STRATEGIES, analyze_q1, compute_strategy_stats, strategy_a_quick_flip,
+    strategy_c_hold_24h,
+)
+from candle_store import INDEX_FILES, TIMEFRAMES, grad_windows, open_store
+from cube import CUBE_FILE, Cube
+from metrics import METRICS
+from resample import bootstrap_strategy_ci
+from simulator import build_paths, simulate_ladder
+from step1_enrich import enrich_token
+from step2_near_graduation import reached_pct
+
+DEFAULT_PORT = 8765
+RELOAD_SECONDS = 5
+CACHE_SIZE = 256
+FILES = {
+    "launches": "data/step1_launches.json",
+    "near_grad": "data/step2_near_grad.json",
+    "price": "data/step3_price_action.json",
+    "cube": CUBE_FILE,
+    **{f"candles_{tf}": path for tf, path in zip(TIMEFRAMES, INDEX_FILES)},
+}
+SORTABLE = ("market_cap_usd", "fdv", "liquidity_usd", "grad_pct", "real_sol_reserves")
+
+
+def _load(path):
+    if not os.path.exists(path):
+        return None
+    with open(path) as f, METRICS.timed_op("json_load"):
+        return json.load(f)
+
+
+# ── Warm store ───────────────────────────────────────────────────────────────
+
+class Store:
+    """One snapshot of the pipeline outputs plus its query indexes (rows change only via replace)."""
+
+    def __init__(self, mtimes):
+        self.mtimes = mtimes
+        self.loaded_at = time.time()
+        self.launches = _load(FILES["launches"]) or []
+        self.near_grad = _load(FILES["near_grad"])
+        self.price = _load(FILES["price"])
+        self.price_tokens = (self.price or {}).get("tokens", [])
+        self.cube = Cube.load(FILES["cube"])
+
+        self.by_mint = {t["mint"]: i for i, t in enumerate(self.launches)}
+        self.price_map = {r["mint"]: r for r in self.price_tokens}
+        self.status = np.array([t.get("status") or "" for t in self.launches], dtype=object)
+        self.columns = {
+            key: np.array([float(t.get(key) or 0) for t in self.launches])
+            for key in SORTABLE
+        }
+        self.columns["peak"] = np.array([float(reached_pct(t)) for t in self.launches])
+        self.order = {}              # column -> row indices, ascending
+        for key, col in self.columns.items():
+            self.order[key] = np.argsort(col, kind="stable")
+        self.candles = open_store()
+        _, self.entry, *self.ohlc = build_paths(self.price_tokens, store=self.candles)
+
+    def replace(self, i, tok):
+        """Swap in a refreshed token and re-index its row (new arrays, so readers of the
+        old ones are unaffected)."""
+        values = {key: float(tok.get(key) or 0) for key in SORTABLE}
+        values["peak"] = float(reached_pct(tok))
+        status = self.status.copy()
+        status[i] = tok.get("status") or ""
+        columns, order = {}, {}
+        for key, col in self.columns.items():
+            col = col.copy()
+            col[i] = values[key]
+            columns[key], order[key] = col, np.argsort(col, kind="stable")
+        self.launches[i] = tok
+        self.status, self.columns, self.order = status, columns, order
+
+    def top(self, k, by="market_cap_usd", status=None):
+        rows = self.order[by][::-1]
+        if status:
+            rows = rows[self.status[rows] == status]
+        return [self.launches[i] for i in rows[:k]]
+
+    def grad_range(self, lo, hi, by="grad_pct", status=None, limit=None):
+        """Rows with lo <= by < hi (hi inclusive at 100), highest first."""
+        col, order = self.columns[by], self.order[by]
+        sorted_vals = col[order]
+        start = np.searchsorted(sorted_vals, lo, side="left")
+        end = np.searchsorted(sorted_vals, hi, side="right" if hi >= 100 else "left")
+        rows = order[start:end][::-1]
+        if status:
+            rows = rows[self.status[rows] == status]
+        return len(rows), [self.launches[i] for i in rows[:limit]]
+
+
+class Daemon:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.store = None
+        self.cache = {}
+        self.reload(force=True)
+
+    def _mtimes(self):
+        return {k: os.path.getmtime(p) if os.path.exists(p) else None for k, p in FILES.items()}
+
+    def reload(self, force=False):
+        mtimes = self._mtimes()
+        if not force and self.store is not None and mtimes == self.store.mtimes:
+            return False
+        with METRICS.phase("daemon_load"):
+            store = Store(mtimes)
+        with self.lock:
+            self.store, self.cache = store, {}
+        METRICS.inc("daemon_reloads_total")
+        print(f"  loaded {len(store.launches):,} launches, {len(store.price_tokens):,} price "
+              f"records, {len(store.entry):,} candle paths")
+        return True
+
+    def watch(self, stop):
+        while not stop.wait(RELOAD_SECONDS):
+            try:
+                self.reload()
+            except (OSError, ValueError) as e:      # a file mid-write; retry next tick
+                print(f"  reload failed: {e}")
+
+    # ── Queries ──────────────────────────────────────────────────────────────
+
+    def health(self, q):
+        s = self.store
+        return {"launches": len(s.launches), "price_records": len(s.price_tokens),
+                "candle_paths": len(s.entry), "loaded_at": s.loaded_at,
+                "cached_results": len(self.cache)}
+
+    def top(self, q):
+        by = q.get("by", "market_cap_usd")
+        if by not in self.store.columns:
+            raise ValueError(f"by must be one of {sorted(self.store.columns)}")
+        return {"by": by, "tokens": self.store.top(int(q.get("k", 20)), by, q.get("status"))}
+
+    def grad(self, q):
+        by = q.get("by", "grad_pct")
+        if by not in ("grad_pct", "peak"):
+            raise ValueError("by must be grad_pct or peak")
+        n, tokens = self.store.grad_range(float(q.get("min", 0)), float(q.get("max", 100)), by,
+                                          q.get("status"), int(q.get("limit", 100)))
+        return {"by": by, "count": n, "tokens": tokens}
+
+    def mint(self, q, mint):
+        s = self.store
+        i = s.by_mint.get(mint)
+        if i is None:
+            raise KeyError(mint)
+        tok = s.launches[i]
+        if q.get("refresh") == "1":
+            # Warm pools from config.py; updates this snapshot in place
+            tok = enrich_token(tok)
+            with self.lock:
+                s.replace(i, tok)
+            METRICS.inc("daemon_refreshes_total")
+        price = s.price_map.get(mint)
+        candles = None
+        if price is not None:
+            windows = grad_windows(s.candles, price.get("pair_address"), price["graduation_time"])
+            candles = {k: v.tolist() for k, v in windows.items()}
+        return {"token": tok, "price_action": price, "candles": candles}
+
+    def strategy(self, q):
+        key = tuple(sorted(q.items()))
+        store = self.store
+        hit = self.cache.get(key)
+        if hit is not None and hit[0] is store:
+            METRICS.inc("daemon_cache_total", result="hit")
+            return hit[1]
+        METRICS.inc("daemon_cache_total", result="miss")
+        returns, label = self._returns(store, q)
+        stats = compute_strategy_stats(returns, label)
+        if q.get("ci") == "1":
+            stats["ci"] = bootstrap_strategy_ci(returns)
+        with self.lock:
+            if len(self.cache) >= CACHE_SIZE:
+                self.cache.pop(next(iter(self.cache)))
+            self.cache[key] = (store, stats)
+        return stats
+
+    @staticmethod
+    def _returns(store, q):
+        name = q.get("name", "ladder")
+        floats = lambda k, d: tuple(float(x) for x in q[k].split(",")) if k in q else d
+        if name == "ladder":
+            tps, tranches = floats("take_profits", (2.0, 5.0)), floats("tranches", (0.50, 0.25))
+            stop = float(q.get("stop_loss", -0.60))
+            label = f"ladder(take_profits={list(tps)}, tranches={list(tranches)}, stop_loss={stop})"
+            if q.get("path_dependent") == "1":
+                if not len(store.entry):
+                    return [], label + " [path-dependent]"
+                # Cached packed candles: no build_paths per request
+                returns = simulate_ladder(store.entry, *store.ohlc, tps, tranches, stop)
+                return returns.tolist(), label + " [path-dependent]"
+            return SWEEP_STRATEGIES["ladder"](store.price_tokens, tps, tranches, stop), label
+        if name == "momentum":
+            window, threshold = int(q.get("window_min", 5)), float(q.get("threshold_pct", 20))
+            return (SWEEP_STRATEGIES["momentum"](store.price_tokens, window, threshold),
+                    f"momentum(window_min={window}, threshold_pct={threshold})")
+        if name == "quick_flip":
+            return strategy_a_quick_flip(store.price_tokens), "quick_flip"
+        if name == "hold_24h":
+            return strategy_c_hold_24h(store.price_tokens), "hold_24h"
+        raise ValueError("name must be ladder, momentum, quick_flip or hold_24h")
+
+    def q1(self, q):
+        s = self.store
+        return analyze_q1(s.launches, s.near_grad, s.price)
+
+    def cube(self, q):
+        cube = self.store.cube
+        if cube is None:
+            raise ValueError(f"{CUBE_FILE} not found — run step2_near_graduation.py")
+        by = tuple(d for d in q.get("by", "").split(",") if d)
+        where = {k: v.split(",") for k, v in q.items() if k != "by"}
+        counts = cube.query(by, **where)
+        return {"by": by, "labels": [cube.labels(d) for d in by],
+                "counts": counts if not by else counts.tolist()}
+
+    def route(self, path, q):
+        if path.startswith("/mint/"):
+            return self.mint(q, unquote(path[len("/mint/"):]))
+        if path == "/reload":
+            return {"reloaded": self.reload(force=True)}
+        handler = {"/health": self.health, "/top": self.top, "/grad": self.grad,
+                   "/strategy": self.strategy, "/q1": self.q1, "/cube": self.cube}.get(path)
+        if handler is None:
+            raise LookupError(path)
+        return handler(q)
+
+
+# ── HTTP / Unix socket server ────────────────────────────────────────────────
+
+def make_handler(daemon):
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            parts = urlsplit(self.path)
+            if parts.path == "/metrics":
+                return self._send(200, METRICS.prometheus_text().encode(), "text/plain; version=0.0.4")
+            q = {k: v[-1] for k, v in parse_qs(parts.query).items()}
+            start = time.perf_counter()
+            try:
+                status, body = 200, daemon.route(parts.path, q)
+            except KeyError as e:
+                status, body = 404, {"error": f"unknown mint {e.args[0]}"}
+            except LookupError:
+                status, body = 404, {"error": f"unknown endpoint {parts.path}"}
+            except ValueError as e:
+                status, body = 400, {"error": str(e)}
+            except Exception as e:                  # never drop the connection unanswered
+                print(f"  {parts.path} failed: {e!r}")
+                status, body = 500, {"error": f"{type(e).__name__}: {e}"}
+            elapsed = time.perf_counter() - start
+            METRICS.observe("daemon_query_seconds", elapsed, endpoint=parts.path.split("/")[1])
+            self._send(status, json.dumps(body, default=float).encode(), "application/json",
+                       {"X-Query-Ms": f"{elapsed * 1000:.2f}"})
+
+        def _send(self, status, body, ctype, headers=None):
+            self.send_response(status)
+            self.send_header("Content-Type", ctype)
+            self.send_header("Content-Length", str(len(body)))
+            for k, v in (headers or {}).items():
+                self.send_header(k, v)
+            self.end_headers()
+            self.wfile.write(body)
+
+        def address_string(self):
+            return str(self.client_address or "unix")
+
+        def log_message(self, *args):
+            pass
+
+    return Handler
+
+
+class UnixHTTPServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+    def get_request(self):
+        conn, _ = super().get_request()
+        return conn, ("unix", 0)
+
+
+class UnixHTTPConnection(http.client.HTTPConnection):
+    def __init__(self, path):
+        super().__init__("localhost")
+        self.path = path
+
+    def connect(self):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.connect(self.path)
+
+
+def serve(port=DEFAULT_PORT, socket_path=None):
+    daemon = Daemon()
+    handler = make_handler(daemon)
+    if socket_path:
+        if os.path.exists(socket_path):
+            os.remove(socket_path)
+        server = UnixHTTPServer(socket_path, handler)
+        where = f"unix:{socket_path}"
+    else:
+        server = ThreadingHTTPServer(("127.0.0.1", port), handler)
+        where = f"http://127.0.0.1:{port}"
+    stop = threading.Event()
+    threading.Thread(target=daemon.watch, args=(stop,), daemon=True).start()
+    print(f"DAEMON — serving on {where} (Ctrl-C to stop)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        stop.set()
+        server.server_close()
+        if socket_path and os.path.exists(socket_path):
+            os.remove(socket_path)
+
+
+def query(path, port=DEFAULT_PORT, socket_path=None):
+    conn = (UnixHTTPConnection(socket_path) if socket_path
+            else http.client.HTTPConnection("127.0.0.1", port))
+    conn.request("GET", path)
+    resp = conn.getresponse()
+    body = resp.read().decode()
+    if resp.getheader("Content-Type") == "application/json":
+        body = json.dumps(json.loads(body), indent=2)
+    print(body)
+    print(f"[{resp.status}, {resp.getheader('X-Query-Ms')} ms server-side]", file=sys.stderr)
+    return resp.status
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Warm query daemon over the pipeline outputs")
+    parser.add_argument("command", choices=("serve", "query"))
+    parser.add_argument("path", nargs="?", default="/health", help="query: request path")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--socket", metavar="PATH", help="serve / query on a Unix socket instead")
+    args = parser.parse_args()
+    if args.command == "serve":
+        serve(args.port, args.socket)
+    else:
+        sys.exit(0 if query(args.path, args.port, args.socket) == 200 else 1)
+
+
+if __name__ == "__main__":
+    main()
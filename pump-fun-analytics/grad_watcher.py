@@ -0,0 +1,401 @@
+#!/usr/bin/env python3
+"""
+grad_watcher.py — Live near-graduation watcher on bonding curve accounts.
+
+Watches the bonding curve PDA of every active (non-graduated, open-curve)
+token and fires an event the moment a curve crosses 50 / 75 / 90 / 100% of
+the graduation threshold, instead of waiting for the next batch step2 run.
+
+Two feeds, both decoded with step1_enrich.parse_bonding_curve:
+  poll       getMultipleAccounts, 100 PDAs per call, only the first 49 bytes
+             (reserves + complete flag) via dataSlice; works on any RPC
+  subscribe  one accountSubscribe per PDA over a single websocket; the node
+             pushes a notification only when the curve changes. After every
+             (re)connect a poll pass catches crossings missed while down
+
+Curves are kept in a ReserveIndex ordered by real_sol_reserves, updated in
+place as notifications arrive, so "closest to graduation" is a slice rather
+than a re-sort. Closed accounts (graduated or reclaimed) leave the watch set;
+accountSubscribe reports a closure as 0 lamports and empty data rather than
+null, so both forms count.
+
+Crossing state is saved to data/grad_watch_state.json, so a restart fires the
+crossings that happened while it was down, and never fires one twice; closed
+curves keep a marker there and are not watched (or reported closed) again.
+
+Input:  data/step1_launches.json (+ data/stream_launches.jsonl when present)
+Output:
+  data/grad_events.jsonl       — one line per threshold crossing / closed curve
+  data/grad_watch_state.json   — per-PDA reserves and highest threshold crossed,
+                                 or {"closed": true}
+
+Usage:
+  python3 grad_watcher.py [--mode poll|subscribe] [--interval 10]
+                          [--thresholds 50,75,90,100] [--min-pct 5]
+                          [--top 10] [--seconds N]
+"""
+
+import argparse
+import json
+import os
+import socket
+import sys
+import threading
+import time
+from bisect import bisect_left, insort
+from concurrent.futures import ThreadPoolExecutor
+
+from config import rpc_call, ALCHEMY_CONCURRENCY, RPC_WS_URL
+from metrics import METRICS
+from step1_enrich import GRADUATION_SOL_LAMPORTS, derive_bonding_curve_pda, parse_bonding_curve
+from step1_fetch_launches import STREAM_FILE
+import ws
+
+EVENTS_FILE = "data/grad_events.jsonl"
+STATE_FILE = "data/grad_watch_state.json"
+DEFAULT_THRESHOLDS = (50, 75, 90, 100)
+MULTI_BATCH = 100            # getMultipleAccounts key limit
+CURVE_SLICE = {"offset": 0, "length": 49}
+PING_SECONDS = 20
+MAX_BACKOFF = 30
+SAVE_EVERY = 30              # seconds between state snapshots
+
+
+# ── Priority index ───────────────────────────────────────────────────────────
+
+class ReserveIndex:
+    """
+    PDAs kept sorted by real_sol_reserves: a bisect-maintained list of
+    (reserves, pda) plus a pda → reserves map. An update is two binary
+    searches and a memmove (microseconds at tens of thousands of curves);
+    top-k and reserve-range queries are slices.
+    """
+
+    def __init__(self):
+        self.keys = []
+        self.value = {}
+
+    def __len__(self):
+        return len(self.keys)
+
+    def update(self, pda, reserves):
+        """Move pda to its new position; False when unchanged."""
+        old = self.value.get(pda)
+        if old == reserves:
+            return False
+        if old is not None:
+            del self.keys[bisect_left(self.keys, (old, pda))]
+        insort(self.keys, (reserves, pda))
+        self.value[pda] = reserves
+        return True
+
+    def remove(self, pda):
+        old = self.value.pop(pda, None)
+        if old is not None:
+            del self.keys[bisect_left(self.keys, (old, pda))]
+
+    def top(self, k):
+        """The k curves with the most SOL, fullest first."""
+        return self.keys[-k:][::-1] if k > 0 else []
+
+    def between(self, lo, hi):
+        """Curves with lo <= real_sol_reserves < hi, ascending."""
+        return self.keys[bisect_left(self.keys, (lo, "")):bisect_left(self.keys, (hi, ""))]
+
+
+# ── Watcher ──────────────────────────────────────────────────────────────────
+
+def account_closed(account):
+    """True for a closed account: null (getMultipleAccounts) or 0 lamports / no data (notifications)."""
+    if account is None:
+        return True
+    data = account.get("data") or [""]
+    return account.get("lamports") == 0 or not data[0]
+
+
+def load_active(min_pct=0.0):
+    """Active tokens from the batch output plus any streamed launches, keyed by mint."""
+    tokens = {}
+    path = "data/step1_launches.json"
+    if os.path.exists(path):
+        with open(path) as f:
+            for t in json.load(f):
+                tokens[t["mint"]] = t
+    if os.path.exists(STREAM_FILE):
+        with open(STREAM_FILE) as f:
+            for line in f:
+                if line.strip():
+                    t = json.loads(line)
+                    tokens.setdefault(t["mint"], t)
+    return [t for t in tokens.values()
+            if t.get("status", "active") == "active" and not t.get("account_closed")
+            and (t.get("grad_pct") or 0) >= min_pct]
+
+
+class GradWatcher:
+    """Decodes curve updates, maintains the index and fires threshold events."""
+
+    def __init__(self, tokens, thresholds=DEFAULT_THRESHOLDS, on_event=None, state=None):
+        self.thresholds = sorted(thresholds)
+        self.on_event = on_event or (lambda event: None)
+        self.mint_of = {}
+        for t in tokens:
+            pda = t.get("bonding_curve_pda") or derive_bonding_curve_pda(t["mint"])
+            self.mint_of[pda] = t["mint"]
+        self.index = ReserveIndex()
+        self.crossed = {}        # pda -> highest threshold crossed (0 = none)
+        self.closed = set()      # pdas seen closed, by this run or an earlier one
+        self.lock = threading.Lock()
+        for pda, s in (state or {}).items():
+            if s.get("closed"):
+                self.closed.add(pda)
+                self.mint_of.pop(pda, None)
+            elif pda in self.mint_of:
+                self.crossed[pda] = s.get("crossed", 0)
+                self.index.update(pda, s.get("reserves", 0))
+
+    @property
+    def pdas(self):
+        return list(self.mint_of)
+
+    def observe(self, pda, account, slot=None):
+        """Apply one account value (None = closed) for pda; returns the events fired."""
+        info = parse_bonding_curve(pda, {"value": None if account_closed(account) else account})
+        if info.get("error"):
+            METRICS.inc("grad_watch_decode_errors_total")
+            return []
+        events = []
+        with self.lock:
+            if pda not in self.mint_of:
+                return []
+            base = {"ts": time.time(), "slot": slot, "mint": self.mint_of[pda], "pda": pda}
+            if info.get("account_closed"):
+                events.append(dict(base, event="closed",
+                                   real_sol_reserves=self.index.value.get(pda, 0)))
+                del self.mint_of[pda]
+                self.index.remove(pda)
+                self.crossed.pop(pda, None)
+                self.closed.add(pda)
+            else:
+                self.index.update(pda, info["real_sol_reserves"])
+                first = pda not in self.crossed
+                prev = self.crossed.get(pda, 0)
+                hit = [th for th in self.thresholds if prev < th <= info["grad_pct"]]
+                if hit:
+                    self.crossed[pda] = hit[-1]
+                elif first:
+                    self.crossed[pda] = 0
+                # A curve seen for the first time only sets the baseline
+                if not first:
+                    events += [dict(base, event="threshold", threshold=th,
+                                    grad_pct=round(info["grad_pct"], 2),
+                                    real_sol_reserves=info["real_sol_reserves"])
+                               for th in hit]
+        for event in events:
+            METRICS.inc("grad_watch_events_total", event=event["event"],
+                        threshold=event.get("threshold", ""))
+            self.on_event(event)
+        return events
+
+    def poll(self):
+        """One getMultipleAccounts pass over every watched PDA."""
+        pdas = self.pdas
+        batches = [pdas[i:i + MULTI_BATCH] for i in range(0, len(pdas), MULTI_BATCH)]
+
+        def fetch(batch):
+            return batch, rpc_call("getMultipleAccounts", [batch, {
+                "encoding": "base64", "commitment": "confirmed", "dataSlice": CURVE_SLICE,
+            }])
+
+        with METRICS.phase("grad_watch_poll"), \
+                ThreadPoolExecutor(max_workers=ALCHEMY_CONCURRENCY) as executor:
+            for batch, result in executor.map(fetch, batches):
+                if not result or result.get("value") is None:
+                    METRICS.inc("grad_watch_poll_failures_total")
+                    continue
+                slot = (result.get("context") or {}).get("slot")
+                for pda, account in zip(batch, result["value"]):
+                    self.observe(pda, account, slot)
+        METRICS.set_gauge("grad_watch_curves", len(self.index))
+
+    def state(self):
+        with self.lock:
+            state = {pda: {"reserves": self.index.value.get(pda, 0), "crossed": c}
+                     for pda, c in self.crossed.items()}
+            state.update({pda: {"closed": True} for pda in self.closed})
+            return state
+
+    def leaderboard(self, k):
+        with self.lock:
+            return [(self.mint_of[pda], reserves) for reserves, pda in self.index.top(k)]
+
+
+class CurveSubscriber:
+    """accountSubscribe on every watched PDA over one websocket, with reconnect."""
+
+    def __init__(self, watcher, ws_url=RPC_WS_URL):
+        self.watcher = watcher
+        self.ws_url = ws_url
+        self.stop_event = threading.Event()
+        self.conn = None
+        self.pda_of = {}         # subscription id -> pda
+
+    def _subscribe(self, conn):
+        pending = {}
+        for i, pda in enumerate(self.watcher.pdas, 1):
+            pending[i] = pda
+            conn.send(json.dumps({"jsonrpc": "2.0", "id": i, "method": "accountSubscribe",
+                                  "params": [pda, {"encoding": "base64",
+                                                   "commitment": "confirmed"}]}))
+        return pending
+
+    def _listen(self, conn, pending):
+        conn.settimeout(PING_SECONDS)
+        while not self.stop_event.is_set():
+            try:
+                raw = conn.recv()
+            except socket.timeout:
+                if time.time() - conn.last_frame > 2 * PING_SECONDS:
+                    raise ws.ConnectionClosed("no frames (pong included) — connection stale")
+                conn.ping()
+                continue
+            msg = json.loads(raw)
+            if "id" in msg and msg["id"] in pending:
+                pda = pending.pop(msg["id"])
+                if "error" in msg:
+                    METRICS.inc("grad_watch_subscribe_errors_total")
+                else:
+                    self.pda_of[msg["result"]] = pda
+            elif msg.get("method") == "accountNotification":
+                result = msg["params"]["result"]
+                pda = self.pda_of.get(msg["params"]["subscription"])
+                if pda is not None:
+                    self.watcher.observe(pda, result.get("value"),
+                                         (result.get("context") or {}).get("slot"))
+
+    def run(self):
+        backoff = 1
+        while not self.stop_event.is_set():
+            try:
+                self.conn = ws.connect(self.ws_url)
+                self.pda_of = {}
+                pending = self._subscribe(self.conn)
+                print(f"  watcher: {len(pending):,} accountSubscribe sent")
+                self.watcher.poll()       # catch up on anything missed while down
+                backoff = 1
+                self._listen(self.conn, pending)
+            except (OSError, ValueError, ws.ConnectionClosed) as e:
+                if self.stop_event.is_set():
+                    break
+                METRICS.inc("grad_watch_reconnects_total")
+                print(f"  watcher: {type(e).__name__}: {e} — reconnecting in {backoff}s")
+                self.stop_event.wait(backoff)
+                backoff = min(backoff * 2, MAX_BACKOFF)
+            finally:
+                if self.conn is not None:
+                    self.conn.close()
+
+    def stop(self):
+        self.stop_event.set()
+        if self.conn is not None:
+            self.conn.close()
+
+
+# ── Main ─────────────────────────────────────────────────────────────────────
+
+def load_state(path=STATE_FILE):
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+
+def save_state(watcher, path=STATE_FILE):
+    tmp = path + ".tmp"
+    with open(tmp, "w") as f:
+        json.dump(watcher.state(), f)
+    os.replace(tmp, path)
+
+
+def print_leaderboard(watcher, k):
+    print(f"\n  {len(watcher.index):,} curves watched — top {k}:")
+    for mint, reserves in watcher.leaderboard(k):
+        print(f"    {mint[:20]}…  {reserves / 1e9:7.2f} SOL  "
+              f"{min(reserves / GRADUATION_SOL_LAMPORTS * 100, 100):5.1f}%")
+
+
+def run(args):
+    thresholds = [float(x) for x in args.thresholds.split(",")]
+    tokens = load_active(args.min_pct)
+    if not tokens:
+        print("ERROR: no active tokens to watch. Run step1_fetch_launches.py / step1_enrich.py first.")
+        sys.exit(1)
+
+    out = open(EVENTS_FILE, "a")
+    out_lock = threading.Lock()
+
+    def on_event(event):
+        with out_lock:
+            out.write(json.dumps(event) + "\n")
+            out.flush()
+        if event["event"] == "closed":
+            print(f"  CLOSED  {event['mint']}")
+        else:
+            print(f"  {event['threshold']:>5.0f}%  {event['mint']}  "
+                  f"{event['real_sol_reserves'] / 1e9:.2f} SOL (slot {event['slot']})")
+
+    watcher = GradWatcher(tokens, thresholds, on_event, load_state())
+    print(f"GRAD WATCHER — {len(watcher.mint_of):,} curves, {args.mode} mode, "
+          f"thresholds {', '.join(f'{t:g}%' for t in thresholds)} → {EVENTS_FILE}")
+
+    stop = threading.Event()
+    subscriber = None
+    if args.mode == "subscribe":
+        subscriber = CurveSubscriber(watcher)
+        threading.Thread(target=subscriber.run, daemon=True).start()
+    deadline = time.time() + args.seconds if args.seconds else None
+    last_save = time.time()
+    try:
+        while not stop.is_set():
+            if subscriber is None:
+                watcher.poll()
+            print_leaderboard(watcher, args.top)
+            if time.time() - last_save >= SAVE_EVERY:
+                save_state(watcher)
+                last_save = time.time()
+            if not watcher.mint_of:
+                print("  every watched curve has closed")
+                break
+            wait = args.interval
+            if deadline is not None:
+                wait = min(wait, deadline - time.time())
+                if wait <= 0:
+                    break
+            stop.wait(wait)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if subscriber is not None:
+            subscriber.stop()
+        save_state(watcher)
+        out.close()
+    print(f"\nState saved → {STATE_FILE}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Live near-graduation watcher")
+    parser.add_argument("--mode", choices=("poll", "subscribe"), default="poll",
+                        help="getMultipleAccounts polling or accountSubscribe over the websocket")
+    parser.add_argument("--interval", type=float, default=10,
+                        help="seconds between polls / leaderboard prints (default: 10)")
+    parser.add_argument("--thresholds", default=",".join(map(str, DEFAULT_THRESHOLDS)),
+                        help="grad %% thresholds that fire events (default: 50,75,90,100)")
+    parser.add_argument("--min-pct", type=float, default=0.0,
+                        help="only watch curves at or above this grad %% in step1 (default: all active)")
+    parser.add_argument("--top", type=int, default=10, help="leaderboard size (default: 10)")
+    parser.add_argument("--seconds", type=float, default=None, help="stop after N seconds")
+    run(parser.parse_args())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,289 @@
+#!/usr/bin/env python3
+"""
+metrics.py — Hot-path instrumentation for RPC/HTTP calls and pipeline phases.
+
+One process-wide METRICS registry records:
+  - request latency histograms per (host, method), request counts by status,
+    429s, retries and response bytes — fed by rpc_pool and config.http_get
+  - queue depth gauges set by the phase loops
+  - per-phase wall time, item counts and items/s
+  - cumulative seconds in hot operations (block extraction, JSON decode and
+    writes) via timed_op()
+
+Exposed three ways:
+  - Prometheus text file data/metrics/<script>.prom, written at exit
+  - Prometheus HTTP endpoint on PUMP_METRICS_PORT (if set) at /metrics
+  - JSONL event stream data/metrics/events.jsonl (phase start/end and final
+    snapshot; per-request events too when PUMP_METRICS_TRACE=1)
+The two files are written only for a real script run (sys.argv[0] is a file);
+stdin, `python -c` and interactive imports write nothing unless PUMP_METRICS=1.
+"""
+
+import atexit
+import functools
+import json
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+METRICS_DIR = os.environ.get("PUMP_METRICS_DIR", "data/metrics")
+LATENCY_BUCKETS = (0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+PREFIX = "pump"
+
+
+def _script_name():
+    """Name of the script being run, or None for stdin / -c / interactive runs."""
+    path = sys.argv[0] if sys.argv else ""
+    if path and os.path.isfile(path):
+        return os.path.splitext(os.path.basename(path))[0]
+    return None
+
+
+SCRIPT = _script_name()
+RECORD = SCRIPT is not None or os.environ.get("PUMP_METRICS") == "1"
+
+
+def _labels(d):
+    if not d:
+        return ""
+    return "{" + ",".join(f'{k}="{v}"' for k, v in sorted(d.items())) + "}"
+
+
+def _sort_key(item):
+    # Label values mix ints (HTTP status) and strings ("error")
+    return str(item[0])
+
+
+class Histogram:
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, v):
+        for i, le in enumerate(self.buckets):
+            if v <= le:
+                self.counts[i] += 1
+                break
+        else:
+            self.counts[-1] += 1
+        self.sum += v
+        self.count += 1
+
+
+class Metrics:
+    def __init__(self, events_path=None, trace=False):
+        self.lock = threading.Lock()
+        self.histograms = {}     # (name, labels tuple) -> Histogram
+        self.counters = {}       # (name, labels tuple) -> float
+        self.gauges = {}         # (name, labels tuple) -> float
+        self.events_path = events_path
+        self.trace = trace
+        self._events = None
+        self._phase_started = {}
+        self._phase_listeners = []
+
+    # ── Recording ────────────────────────────────────────────────────────────
+
+    def inc(self, name, value=1, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self.lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def set_gauge(self, name, value, **labels):
+        with self.lock:
+            self.gauges[(name, tuple(sorted(labels.items())))] = value
+
+    def observe(self, name, value, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self.lock:
+            h = self.histograms.get(key)
+            if h is None:
+                h = self.histograms[key] = Histogram()
+            h.observe(value)
+
+    def observe_request(self, host, method, latency, status, nbytes=0):
+        """One physical HTTP/RPC request. status is an HTTP code or 'error'."""
+        self.observe("request_latency_seconds", latency, host=host, method=method)
+        self.inc("requests_total", host=host, method=method, status=status)
+        if status == 429:
+            self.inc("rate_limited_total", host=host, method=method)
+        if nbytes:
+            self.inc("response_bytes_total", nbytes, host=host, method=method)
+        if self.trace:
+            self.event("request", host=host, method=method,
+                       latency=round(latency, 4), status=status, bytes=nbytes)
+
+    def retry(self, method, host=""):
+        self.inc("retries_total", host=host, method=method)
+
+    def add_items(self, phase, n=1):
+        """Count items processed by a running phase and refresh its items/s gauge."""
+        key = ("phase_items_total", (("phase", phase),))
+        with self.lock:
+            self.counters[key] = self.counters.get(key, 0) + n
+            items = self.counters[key]
+            started = self._phase_started.get(phase)
+        if started:
+            elapsed = time.time() - started
+            self.set_gauge("phase_items_per_second", items / elapsed if elapsed else 0,
+                           phase=phase)
+
+    @contextmanager
+    def timed_op(self, op):
+        """Accumulate wall seconds spent in a hot operation (any thread)."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.inc("op_seconds_total", time.perf_counter() - start, op=op)
+
+    def add_phase_listener(self, fn):
+        """fn(event, phase_name) is called with 'start'/'end' around every phase."""
+        self._phase_listeners.append(fn)
+
+    @contextmanager
+    def phase(self, name):
+        """Time a pipeline phase; items come from add_items(name, n) calls inside it."""
+        start = time.time()
+        with self.lock:
+            self._phase_started[name] = start
+            before = self.counters.get(("phase_items_total", (("phase", name),)), 0)
+        self.event("phase_start", phase=name)
+        for fn in self._phase_listeners:
+            fn("start", name)
+        try:
+            yield
+        finally:
+            for fn in self._phase_listeners:
+                fn("end", name)
+            elapsed = time.time() - start
+            with self.lock:
+                items = self.counters.get(("phase_items_total", (("phase", name),)), 0) - before
+                self._phase_started.pop(name, None)
+            self.set_gauge("phase_seconds", elapsed, phase=name)
+            self.set_gauge("phase_items_per_second", items / elapsed if elapsed else 0,
+                           phase=name)
+            self.event("phase_end", phase=name, seconds=round(elapsed, 3), items=items)
+
+    def timed_phase(self, name):
+        """Decorator form of phase()."""
+        def wrap(fn):
+            @functools.wraps(fn)
+            def inner(*args, **kwargs):
+                with self.phase(name):
+                    return fn(*args, **kwargs)
+            return inner
+        return wrap
+
+    # ── Reading ──────────────────────────────────────────────────────────────
+
+    def totals(self, name):
+        """Counter values for one metric name summed per label set, e.g. per op."""
+        with self.lock:
+            return {labels: v for (n, labels), v in self.counters.items() if n == name}
+
+    def histogram_sum(self, name):
+        """Sum of observations across all label sets (e.g. total request seconds)."""
+        with self.lock:
+            return sum(h.sum for (n, _), h in self.histograms.items() if n == name)
+
+    # ── Export ───────────────────────────────────────────────────────────────
+
+    def event(self, kind, **fields):
+        if not self.events_path:
+            return
+        line = json.dumps({"ts": round(time.time(), 3), "event": kind, **fields})
+        with self.lock:
+            if self._events is None:
+                os.makedirs(os.path.dirname(self.events_path) or ".", exist_ok=True)
+                self._events = open(self.events_path, "a")
+            self._events.write(line + "\n")
+            self._events.flush()
+
+    def prometheus_text(self):
+        lines = []
+        with self.lock:
+            for name in sorted({k[0] for k in self.counters}):
+                lines.append(f"# TYPE {PREFIX}_{name} counter")
+                for (n, labels), v in sorted(self.counters.items(), key=_sort_key):
+                    if n == name:
+                        lines.append(f"{PREFIX}_{n}{_labels(dict(labels))} {v}")
+            for name in sorted({k[0] for k in self.gauges}):
+                lines.append(f"# TYPE {PREFIX}_{name} gauge")
+                for (n, labels), v in sorted(self.gauges.items(), key=_sort_key):
+                    if n == name:
+                        lines.append(f"{PREFIX}_{n}{_labels(dict(labels))} {v}")
+            for name in sorted({k[0] for k in self.histograms}):
+                lines.append(f"# TYPE {PREFIX}_{name} histogram")
+                for (n, labels), h in sorted(self.histograms.items(), key=_sort_key):
+                    if n != name:
+                        continue
+                    base = dict(labels)
+                    cum = 0
+                    for le, c in zip(h.buckets + ("+Inf",), h.counts):
+                        cum += c
+                        lines.append(f"{PREFIX}_{n}_bucket{_labels({**base, 'le': le})} {cum}")
+                    lines.append(f"{PREFIX}_{n}_sum{_labels(base)} {h.sum}")
+                    lines.append(f"{PREFIX}_{n}_count{_labels(base)} {h.count}")
+        return "\n".join(lines) + "\n"
+
+    def snapshot(self):
+        with self.lock:
+            return {
+                "counters": {f"{n}{_labels(dict(l))}": v for (n, l), v in self.counters.items()},
+                "gauges": {f"{n}{_labels(dict(l))}": v for (n, l), v in self.gauges.items()},
+                "latency": {
+                    f"{n}{_labels(dict(l))}": {"count": h.count,
+                                               "mean": h.sum / h.count if h.count else None}
+                    for (n, l), h in self.histograms.items()
+                },
+            }
+
+    def write_prometheus(self, path):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp = path + ".tmp"
+        with open(tmp, "w") as f:
+            f.write(self.prometheus_text())
+        os.replace(tmp, path)
+
+    def serve(self, port):
+        """Serve /metrics in Prometheus text format from a daemon thread."""
+        registry = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                body = registry.prometheus_text().encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        server = ThreadingHTTPServer(("127.0.0.1", port), Handler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        return server
+
+    def flush(self):
+        """Write the Prometheus file for this script and a final snapshot event."""
+        if not RECORD or not (self.counters or self.gauges or self.histograms):
+            return
+        script = SCRIPT or "python"
+        self.write_prometheus(os.path.join(METRICS_DIR, f"{script}.prom"))
+        self.event("snapshot", script=script, **self.snapshot())
+
+
+METRICS = Metrics(
+    events_path=os.path.join(METRICS_DIR, "events.jsonl") if RECORD else None,
+    trace=os.environ.get("PUMP_METRICS_TRACE") == "1",
+)
+atexit.register(METRICS.flush)
+if os.environ.get("PUMP_METRICS_PORT"):
+    METRICS.serve(int(os.environ["PUMP_METRICS_PORT"]))
@@ -0,0 +1,608 @@
+#!/usr/bin/env python3
+"""
+mock_server.py — Local stand-in for Solana JSON-RPC, DexScreener and GeckoTerminal.
+
+Serves deterministic synthetic data (the same slot / mint / pool always gets
+the same answer) with per-service fault injection, so scanner and enricher
+concurrency, retry and backoff settings can be load-tested without real quota:
+
+  - latency: lognormal, median latency_ms and shape sigma
+  - rate limit: token bucket of rate_limit req/s with burst; excess → 429
+  - p429 / p5xx: random 429 and 500/502/503 responses
+
+Services listen on consecutive ports: RPC on --port, DexScreener on --port+1,
+GeckoTerminal on --port+2 and the RPC websocket on --port+3. Point the pipeline
+at them with the env vars printed at startup (PUMP_RPC_URL, PUMP_RPC_WS_URL,
+PUMP_DEXSCREENER_BASE, PUMP_GECKOTERMINAL_BASE). GET /_stats on any HTTP port
+returns request counts by service and status.
+
+RPC subset: getBlocks, getBlocksWithLimit, getBlock, getBlockTime, getSlot,
+getTransaction, getAccountInfo, getMultipleAccounts, getProgramAccounts
+(dataSize / memcmp filters and dataSlice over the curves of the first
+PROGRAM_ACCOUNT_SLOTS slots). Blocks also carry buys / sells on curves launched
+in the last data.trade_window slots; each curve's balance follows a fixed
+ramp-to-peak-then-bleed trajectory, so a replay of the blocks is checkable.
+
+Websocket: logsSubscribe / blockSubscribe for the pump program and
+accountSubscribe (a notification whenever the account bytes change — set
+data.curve_drift to make open curves fill over time). The chain
+"advances" one slot per SLOT_SECONDS of wall time from getSlot's current slot;
+ws.drop_every closes each connection after that many seconds to exercise
+reconnect and gap backfill.
+
+Usage:
+  python3 mock_server.py [--port 8899] [--config faults.json]
+                         [--set rpc.rate_limit=100 --set gecko.p429=0.2 ...]
+"""
+
+import argparse
+import base64
+import hashlib
+import json
+import math
+import random
+import socketserver
+import struct
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+import base58
+
+from config import JAN20_START_SLOT, JAN20_START_TS, PUMP_PROGRAM
+from step1_enrich import (BONDING_CURVE_DISCRIMINATOR, CURVE_RENT_LAMPORTS,
+                          GRADUATION_SOL_LAMPORTS, derive_bonding_curve_pda)
+import ws
+
+# Defaults approximate the public plans: Alchemy free tier, DexScreener 300/min,
+# GeckoTerminal 30/min
+DEFAULT_SERVICES = {
+    "rpc":   {"latency_ms": 60,  "sigma": 0.5, "rate_limit": 300, "burst": 300,
+              "p429": 0.0, "p5xx": 0.005},
+    "dex":   {"latency_ms": 120, "sigma": 0.4, "rate_limit": 5,   "burst": 10,
+              "p429": 0.0, "p5xx": 0.01},
+    "gecko": {"latency_ms": 200, "sigma": 0.4, "rate_limit": 0.5, "burst": 5,
+              "p429": 0.0, "p5xx": 0.01},
+    "ws":    {"drop_every": 0},
+}
+DEFAULT_DATA = {
+    "txs_per_block": 40,        # filler transactions per block
+    "creates_per_block": 0.09,  # mean CreateV2 per block (~20k over Jan 20)
+    "skip_rate": 0.05,          # skipped slots
+    "closed_rate": 0.6,         # bonding curve account closed
+    "complete_rate": 0.01,      # bonding curve complete (graduated)
+    "pair_rate": 0.02,          # DexScreener knows a Raydium pair
+    "curve_drift": 0.0,         # max grad progress per second on open curves (0 = static)
+    "trade_window": 150,        # slots after launch during which a curve trades
+    "trade_rate": 0.3,          # chance a curve in its window trades in a given slot
+}
+SLOT_SECONDS = 0.4
+PROGRAM_ACCOUNT_SLOTS = 2000
+
+
+def _h(*parts):
+    """Deterministic 64-bit hash of the parts."""
+    return int.from_bytes(hashlib.sha256(":".join(map(str, parts)).encode()).digest()[:8], "big")
+
+
+def _frac(*parts):
+    return _h(*parts) / 2 ** 64
+
+
+# ── Synthetic chain / market data ────────────────────────────────────────────
+
+class SyntheticData:
+    def __init__(self, cfg):
+        self.cfg = cfg
+        self.started = time.time()
+
+    def skipped(self, slot):
+        return _frac("skip", slot) < self.cfg["skip_rate"]
+
+    def block_time(self, slot):
+        return int(JAN20_START_TS + (slot - JAN20_START_SLOT) * SLOT_SECONDS)
+
+    def mints_in_block(self, slot):
+        lam = self.cfg["creates_per_block"]
+        # Poisson draw from the slot hash
+        u, k, p = _frac("creates", slot), 0, math.exp(-lam)
+        cdf = p
+        while u > cdf and k < 20:
+            k += 1
+            p *= lam / k
+            cdf += p
+        return [base58.b58encode(hashlib.sha256(f"mint:{slot}:{i}".encode()).digest()).decode()[:40]
+                + "pump" for i in range(k)]
+
+    def create_tx(self, slot, i, mint):
+        keys = [f"Creator{_h('creator', slot, i) % 5000}", mint,
+                derive_bonding_curve_pda(mint), PUMP_PROGRAM]
+        return {
+            "transaction": {
+                "accountKeys": [{"pubkey": k, "signer": j < 2} for j, k in enumerate(keys)],
+                "signatures": [f"create{slot}x{i}"],
+            },
+            "meta": {"err": None, "fee": 5000,
+                     "preBalances": [2_000_000_000, 0, 0, 1],
+                     "postBalances": [1_970_000_000, 1_461_600, CURVE_RENT_LAMPORTS, 1],
+                     "logMessages": [f"Program {PUMP_PROGRAM} invoke [1]",
+                                     "Program log: Instruction: CreateV2",
+                                     f"Program {PUMP_PROGRAM} success"]},
+        }
+
+    def curve_lamports(self, mint, age):
+        """Curve balance `age` slots after launch: ramps to a per-mint peak, then bleeds out."""
+        window = self.cfg["trade_window"]
+        peak = GRADUATION_SOL_LAMPORTS * 1.05 * _frac("peak", mint) ** 3
+        peak_at = max(1, int(_frac("peak_at", mint) * window))
+        if age <= peak_at:
+            sol = peak * age / peak_at
+        else:
+            sol = peak * (1 - 0.8 * (age - peak_at) / (window - peak_at + 1))
+        return CURVE_RENT_LAMPORTS + int(min(sol, GRADUATION_SOL_LAMPORTS))
+
+    def trades(self, mint, launch_slot, slot):
+        """Whether the curve of mint (launched at launch_slot) trades in slot."""
+        age = slot - launch_slot
+        if not 0 < age <= self.cfg["trade_window"] or self.skipped(slot):
+            return False
+        if self.curve_lamports(mint, age - 1) - CURVE_RENT_LAMPORTS >= GRADUATION_SOL_LAMPORTS:
+            return False     # complete: no more curve trades
+        return _frac("trade", mint, slot) < self.cfg["trade_rate"]
+
+    def trade_txs(self, slot):
+        """Buys/sells in slot on curves launched within the last trade_window slots."""
+        txs = []
+        for launch in range(slot - self.cfg["trade_window"], slot):
+            if self.skipped(launch):
+                continue
+            for mint in self.mints_in_block(launch):
+                if not self.trades(mint, launch, slot):
+                    continue
+                prev = next((s for s in range(slot - 1, launch, -1) if self.trades(mint, launch, s)),
+                            launch)
+                pre, post = self.curve_lamports(mint, prev - launch), self.curve_lamports(mint, slot - launch)
+                keys = [f"Trader{_h('trader', mint, slot) % 5000}", mint,
+                        derive_bonding_curve_pda(mint), PUMP_PROGRAM]
+                txs.append({
+                    "transaction": {
+                        "accountKeys": [{"pubkey": k, "signer": j == 0} for j, k in enumerate(keys)],
+                        "signatures": [f"trade{slot}x{mint[:8]}"],
+                    },
+                    "meta": {"err": None, "fee": 5000,
+                             "preBalances": [5_000_000_000, 1_461_600, pre, 1],
+                             "postBalances": [5_000_000_000 - (post - pre) - 5000, 1_461_600, post, 1],
+                             "logMessages": [f"Program {PUMP_PROGRAM} invoke [1]",
+                                             "Program log: Instruction: " + ("Buy" if post >= pre else "Sell"),
+                                             f"Program {PUMP_PROGRAM} success"]},
+                })
+        return txs
+
+    def current_slot(self):
+        return JAN20_START_SLOT + int((time.time() - JAN20_START_TS) / SLOT_SECONDS)
+
+    def block(self, slot):
+        txs = []
+        for i in range(self.cfg["txs_per_block"]):
+            txs.append({
+                "transaction": {
+                    "accountKeys": [{"pubkey": f"Fill{slot}x{i}a", "signer": True},
+                                    {"pubkey": f"Fill{slot}x{i}b", "signer": False},
+                                    {"pubkey": "ComputeBudget111111111111111111111111111111",
+                                     "signer": False}],
+                    "signatures": [f"sig{slot}x{i}"],
+                },
+                "meta": {"err": None, "fee": 5000,
+                         "preBalances": [10_000_000, 1, 1], "postBalances": [9_995_000, 1, 1]},
+            })
+        for tx in self.trade_txs(slot):
+            txs.insert(_h("pos", slot, tx["transaction"]["signatures"][0]) % (len(txs) + 1), tx)
+        for i, mint in enumerate(self.mints_in_block(slot)):
+            txs.insert(_h("pos", slot, i) % (len(txs) + 1), self.create_tx(slot, i, mint))
+        return {"blockhash": f"hash{slot}", "parentSlot": slot - 1, "blockHeight": slot,
+                "blockTime": self.block_time(slot), "transactions": txs}
+
+    def curve_data(self, pda):
+        """Bonding curve account bytes for a PDA, or None when closed."""
+        if _frac("closed", pda) < self.cfg["closed_rate"]:
+            return None
+        complete = _frac("complete", pda) < self.cfg["complete_rate"]
+        # Most curves barely move; a long tail approaches graduation
+        progress = 1.0 if complete else _frac("progress", pda) ** 4
+        if self.cfg["curve_drift"] and not complete:
+            # Live curves: each fills at its own rate from server start
+            progress += self.cfg["curve_drift"] * _frac("drift", pda) * (time.time() - self.started)
+            complete = progress >= 1.0
+            progress = min(progress, 1.0)
+        real_sol = int(progress * GRADUATION_SOL_LAMPORTS)
+        return (BONDING_CURVE_DISCRIMINATOR
+                + struct.pack("<QQQQQ", 1_073_000_000_000_000 - real_sol * 10,
+                              30_000_000_000 + real_sol, 793_100_000_000_000 - real_sol * 10,
+                              real_sol, 1_000_000_000_000_000)
+                + bytes([complete]) + bytes(32))
+
+    def account(self, pubkey, data_slice=None):
+        data = self.curve_data(pubkey)
+        if data is None:
+            return None
+        if data_slice:
+            data = data[data_slice["offset"]:data_slice["offset"] + data_slice["length"]]
+        return {"data": [base64.b64encode(data).decode(), "base64"], "executable": False,
+                "lamports": CURVE_RENT_LAMPORTS, "owner": PUMP_PROGRAM, "rentEpoch": 0}
+
+    def dex_pairs(self, mint):
+        r = _frac("dex", mint)
+        if r >= self.cfg["pair_rate"] + 0.2:
+            return None
+        raydium = r < self.cfg["pair_rate"]
+        fdv = 69_000 * (1 + 20 * _frac("fdv", mint)) if raydium else 69_000 * _frac("fdv", mint)
+        return [{
+            "dexId": "raydium" if raydium else "pumpfun",
+            "pairAddress": base58.b58encode(hashlib.sha256(f"pair:{mint}".encode()).digest()).decode(),
+            "fdv": round(fdv, 2),
+            "marketCap": round(fdv, 2),
+            "liquidity": {"usd": round(fdv * 0.2, 2)},
+            "priceUsd": f"{fdv / 1e9:.10f}",
+            "pairCreatedAt": (JAN20_START_TS + _h("created", mint) % 86400) * 1000,
+        }]
+
+    def ohlcv(self, pool, timeframe, before_ts, limit):
+        step = 3600 if timeframe == "hour" else 86400 if timeframe == "day" else 60
+        end = int(before_ts) // step * step
+        rng = random.Random(_h("ohlcv", pool, timeframe))
+        price = 1e-5 * (1 + rng.random())
+        candles = []
+        for ts in range(end - step * (limit - 1), end + 1, step):
+            o = price
+            price = max(o * math.exp(rng.gauss(0, 0.08 if step == 60 else 0.25)), 1e-12)
+            hi = max(o, price) * (1 + abs(rng.gauss(0, 0.03)))
+            lo = min(o, price) * (1 - abs(rng.gauss(0, 0.03)))
+            candles.append([ts, o, hi, lo, price, rng.random() * 10_000])
+        return list(reversed(candles))   # GeckoTerminal returns newest first
+
+
+# ── Fault injection ──────────────────────────────────────────────────────────
+
+class Service:
+    def __init__(self, name, cfg, rng):
+        self.name = name
+        self.cfg = cfg
+        self.rng = rng
+        self.lock = threading.Lock()
+        self.tokens = cfg["burst"]
+        self.updated = time.monotonic()
+        self.stats = {}
+
+    def count(self, status):
+        with self.lock:
+            self.stats[status] = self.stats.get(status, 0) + 1
+
+    def fault(self):
+        """Sleep the sampled latency; return an injected HTTP status, or None to serve."""
+        cfg = self.cfg
+        with self.lock:
+            latency = cfg["latency_ms"] / 1000 * math.exp(self.rng.gauss(0, cfg["sigma"]))
+            roll = self.rng.random()
+            limited = False
+            if cfg["rate_limit"]:
+                now = time.monotonic()
+                self.tokens = min(cfg["burst"],
+                                  self.tokens + (now - self.updated) * cfg["rate_limit"])
+                self.updated = now
+                if self.tokens < 1:
+                    limited = True
+                else:
+                    self.tokens -= 1
+        time.sleep(latency)
+        if limited or roll < cfg["p429"]:
+            return 429
+        if roll < cfg["p429"] + cfg["p5xx"]:
+            return self.rng.choice((500, 502, 503))
+        return None
+
+
+def rpc_result(data, method, params):
+    """(result, error) for one JSON-RPC call."""
+    if method in ("getBlocks", "getBlocksWithLimit"):
+        start = params[0]
+        if method == "getBlocks":
+            end = params[1] if len(params) > 1 and isinstance(params[1], int) else start + 500_000
+        else:
+            end = start + params[1] * 2
+        slots = [s for s in range(start, end + 1) if not data.skipped(s)]
+        return (slots[:params[1]] if method == "getBlocksWithLimit" else slots), None
+    if method == "getBlock":
+        slot = params[0]
+        if data.skipped(slot):
+            return None, {"code": -32007, "message": f"Slot {slot} was skipped"}
+        return data.block(slot), None
+    if method == "getBlockTime":
+        return data.block_time(params[0]), None
+    if method == "getSlot":
+        return data.current_slot(), None
+    if method == "getTransaction":
+        sig = params[0]
+        if not sig.startswith("create") or "x" not in sig:
+            return None, None
+        slot, i = (int(v) for v in sig[len("create"):].split("x", 1))
+        mints = data.mints_in_block(slot)
+        if i >= len(mints):
+            return None, None
+        tx = data.create_tx(slot, i, mints[i])
+        keys = [k["pubkey"] for k in tx["transaction"]["accountKeys"]]
+        return {"slot": slot, "blockTime": data.block_time(slot), "meta": tx["meta"],
+                "transaction": {"signatures": tx["transaction"]["signatures"],
+                                "message": {"accountKeys": keys, "instructions": []}}}, None
+    if method == "getAccountInfo":
+        opts = params[1] if len(params) > 1 else {}
+        return {"context": {"slot": 0},
+                "value": data.account(params[0], opts.get("dataSlice"))}, None
+    if method == "getMultipleAccounts":
+        opts = params[1] if len(params) > 1 else {}
+        return {"context": {"slot": 0},
+                "value": [data.account(k, opts.get("dataSlice")) for k in params[0]]}, None
+    if method == "getProgramAccounts":
+        opts = params[1] if len(params) > 1 else {}
+        out = []
+        for slot in range(JAN20_START_SLOT, JAN20_START_SLOT + PROGRAM_ACCOUNT_SLOTS):
+            if data.skipped(slot):
+                continue
+            for mint in data.mints_in_block(slot):
+                pda = derive_bonding_curve_pda(mint)
+                raw = data.curve_data(pda)
+                if raw is None or not _matches(raw, opts.get("filters") or []):
+                    continue
+                out.append({"pubkey": pda, "account": data.account(pda, opts.get("dataSlice"))})
+        return out, None
+    return None, {"code": -32601, "message": f"Method not found: {method}"}
+
+
+def _matches(raw, filters):
+    for f in filters:
+        if "dataSize" in f and len(raw) != f["dataSize"]:
+            return False
+        if "memcmp" in f:
+            want = base58.b58decode(f["memcmp"]["bytes"])
+            off = f["memcmp"]["offset"]
+            if raw[off:off + len(want)] != want:
+                return False
+    return True
+
+
+# ── HTTP plumbing ────────────────────────────────────────────────────────────
+
+def make_handler(service, data, services):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"    # keep-alive, like the real APIs
+
+        def _send(self, status, body=None):
+            payload = json.dumps(body if body is not None else {"error": status}).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            if status == 429:
+                self.send_header("Retry-After", "1")
+            self.end_headers()
+            self.wfile.write(payload)
+            service.count(status)
+
+        def do_GET(self):
+            parts = urlsplit(self.path)
+            if parts.path == "/_stats":
+                body = json.dumps({s.name: s.stats for s in services}).encode()
+                self.send_response(200)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+                return
+            status = service.fault()
+            if status:
+                return self._send(status)
+            segs = [s for s in parts.path.split("/") if s]
+            q = {k: v[0] for k, v in parse_qs(parts.query).items()}
+            if service.name == "dex" and segs[:3] == ["latest", "dex", "tokens"] and len(segs) == 4:
+                return self._send(200, {"schemaVersion": "1.0.0", "pairs": data.dex_pairs(segs[3])})
+            # /api/v2/networks/solana/pools/<pool>/ohlcv/<timeframe>
+            if service.name == "gecko" and "pools" in segs and "ohlcv" in segs:
+                pool = segs[segs.index("pools") + 1]
+                timeframe = segs[segs.index("ohlcv") + 1]
+                candles = data.ohlcv(pool, timeframe, float(q.get("before_timestamp", time.time())),
+                                     int(q.get("limit", 100)))
+                return self._send(200, {"data": {"id": pool, "type": "ohlcv_request_response",
+                                                 "attributes": {"ohlcv_list": candles}}})
+            self._send(404)
+
+        def do_POST(self):
+            length = int(self.headers.get("Content-Length") or 0)
+            try:
+                req = json.loads(self.rfile.read(length))
+            except ValueError:
+                return self._send(400)
+            status = service.fault()
+            if status:
+                return self._send(status)
+            result, error = rpc_result(data, req.get("method"), req.get("params") or [])
+            body = {"jsonrpc": "2.0", "id": req.get("id")}
+            body.update({"error": error} if error else {"result": result})
+            self._send(200, body)
+
+        def log_message(self, *args):
+            pass
+
+    return Handler
+
+
+# ── Websocket subscriptions ──────────────────────────────────────────────────
+
+class WsHandler(socketserver.BaseRequestHandler):
+    """One subscriber connection: answers *Subscribe and streams notifications."""
+
+    def handle(self):
+        data, cfg = self.server.data, self.server.cfg
+        try:
+            conn = ws.accept(self.request)
+        except (OSError, ws.ConnectionClosed):
+            return
+        subs = {}                  # sub id -> ("logs" | "block" | "account", pubkey)
+        last = {}                  # account sub id -> last bytes sent
+        lock = threading.Lock()
+        done = threading.Event()
+
+        def reader():
+            try:
+                while True:
+                    req = json.loads(conn.recv())
+                    method = req.get("method", "")
+                    with lock:
+                        if method in ("logsSubscribe", "blockSubscribe", "accountSubscribe"):
+                            sub = len(subs) + 1
+                            pubkey = (req.get("params") or [None])[0] if method == "accountSubscribe" else None
+                            subs[sub] = (method[:-len("Subscribe")], pubkey)
+                            if pubkey:     # like the real node: notify on change only
+                                last[sub] = data.curve_data(pubkey)
+                            conn.send(json.dumps({"jsonrpc": "2.0", "result": sub, "id": req.get("id")}))
+                        elif method.endswith("Unsubscribe"):
+                            subs.pop((req.get("params") or [0])[0], None)
+                            conn.send(json.dumps({"jsonrpc": "2.0", "result": True, "id": req.get("id")}))
+            except (OSError, ValueError, ws.ConnectionClosed):
+                done.set()
+
+        threading.Thread(target=reader, daemon=True).start()
+        opened = time.time()
+        slot = data.current_slot()
+        try:
+            while not done.is_set():
+                if cfg["drop_every"] and time.time() - opened >= cfg["drop_every"]:
+                    break
+                if data.current_slot() <= slot:
+                    time.sleep(SLOT_SECONDS / 4)
+                    continue
+                slot += 1
+                if data.skipped(slot):
+                    continue
+                with lock:
+                    active = list(subs.items())
+                for sub, (kind, pubkey) in active:
+                    if kind == "account":
+                        raw = data.curve_data(pubkey)
+                        if last.get(sub) == raw:
+                            continue
+                        last[sub] = raw
+                        msgs = [{"context": {"slot": slot}, "value": data.account(pubkey)}]
+                    else:
+                        msgs = self.notifications(data, kind, slot)
+                    for msg in msgs:
+                        conn.send(json.dumps({"jsonrpc": "2.0", "method": f"{kind}Notification",
+                                              "params": {"result": msg, "subscription": sub}}))
+        except (OSError, ws.ConnectionClosed):
+            pass
+        finally:
+            conn.close()
+
+    @staticmethod
+    def notifications(data, kind, slot):
+        mints = data.mints_in_block(slot)
+        context = {"slot": slot}
+        if kind == "block":
+            if not mints:
+                return []
+            block = data.block(slot)
+            block["transactions"] = [data.create_tx(slot, i, m) for i, m in enumerate(mints)]
+            return [{"context": context, "value": {"slot": slot, "block": block, "err": None}}]
+        out = [{"context": context, "value": {"signature": f"create{slot}x{i}", "err": None,
+                                              "logs": data.create_tx(slot, i, m)["meta"]["logMessages"]}}
+               for i, m in enumerate(mints)]
+        if _frac("buy", slot) < 0.5:     # non-create pump traffic the client must filter out
+            out.append({"context": context, "value": {
+                "signature": f"buy{slot}", "err": None,
+                "logs": [f"Program {PUMP_PROGRAM} invoke [1]", "Program log: Instruction: Buy"]}})
+        return out
+
+
+class WsServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, addr, data, cfg):
+        super().__init__(addr, WsHandler)
+        self.data = data
+        self.cfg = cfg
+
+
+def load_config(path=None, overrides=()):
+    services = {k: dict(v) for k, v in DEFAULT_SERVICES.items()}
+    data = dict(DEFAULT_DATA)
+    if path:
+        with open(path) as f:
+            user = json.load(f)
+        for name, cfg in user.items():
+            (data if name == "data" else services[name]).update(cfg)
+    for item in overrides:
+        key, value = item.split("=", 1)
+        name, field = key.split(".", 1)
+        target = data if name == "data" else services[name]
+        target[field] = type(target[field])(float(value)) if field in target else float(value)
+    return services, data
+
+
+def serve(port=8899, services_cfg=None, data_cfg=None, seed=0):
+    """Start the HTTP services and the websocket on daemon threads; returns (servers, services)."""
+    services_cfg = services_cfg or DEFAULT_SERVICES
+    data = SyntheticData(data_cfg or DEFAULT_DATA)
+    rng = random.Random(seed)
+    services = [Service(name, services_cfg[name], random.Random(rng.random()))
+                for name in ("rpc", "dex", "gecko")]
+    servers = []
+    for offset, service in enumerate(services):
+        server = ThreadingHTTPServer(("127.0.0.1", port + offset),
+                                     make_handler(service, data, services))
+        server.daemon_threads = True
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        servers.append(server)
+    ws_server = WsServer(("127.0.0.1", port + 3), data, services_cfg["ws"])
+    threading.Thread(target=ws_server.serve_forever, daemon=True).start()
+    servers.append(ws_server)
+    return servers, services
+
+
+def env_exports(port):
+    return {
+        "PUMP_RPC_URL": f"http://127.0.0.1:{port}",
+        "PUMP_RPC_WS_URL": f"ws://127.0.0.1:{port + 3}",
+        "PUMP_DEXSCREENER_BASE": f"http://127.0.0.1:{port + 1}",
+        "PUMP_GECKOTERMINAL_BASE": f"http://127.0.0.1:{port + 2}/api/v2",
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Mock Solana RPC / DexScreener / GeckoTerminal")
+    parser.add_argument("--port", type=int, default=8899,
+                        help="RPC port; DexScreener, GeckoTerminal and the websocket use the next three")
+    parser.add_argument("--config", help="JSON file: {rpc|dex|gecko|data: {field: value}}")
+    parser.add_argument("--set", action="append", default=[], metavar="SERVICE.FIELD=VALUE",
+                        help="override one setting, e.g. gecko.p429=0.2 or data.skip_rate=0.1")
+    parser.add_argument("--seed", type=int, default=0, help="fault-injection RNG seed")
+    parser.add_argument("--report", type=float, default=10.0,
+                        help="seconds between stats lines (0 disables)")
+    args = parser.parse_args()
+
+    services_cfg, data_cfg = load_config(args.config, args.set)
+    _, services = serve(args.port, services_cfg, data_cfg, args.seed)
+    for name in ("rpc", "dex", "gecko", "ws"):
+        print(f"  {name:<6} {services_cfg[name]}")
+    print("Point the pipeline here with:")
+    for k, v in env_exports(args.port).items():
+        print(f"  export {k}={v}")
+    try:
+        while True:
+            time.sleep(args.report or 3600)
+            if args.report:
+                print("  " + "  ".join(f"{s.name}={dict(sorted(s.stats.items()))}"
+                                       for s in services), flush=True)
+    except KeyboardInterrupt:
+        print("\n" + json.dumps({s.name: s.stats for s in services}))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,302 @@
+#!/usr/bin/env python3
+"""
+pipeline.py — Run the pipeline stages as a DAG, skipping the ones that are up to date.
+
+Each stage declares its script, the data files it reads and the files it
+writes; a stage depends on every earlier stage that writes one of its inputs.
+A stage is re-run only when one of these changed since its last successful run:
+  - its code: sha256 of the script plus every local module it imports
+    (transitively) plus its extra arguments
+  - the content of any input (sha256; unchanged size + mtime reuse the
+    stored hash, so a 50 MB launches file is not re-read every time)
+  - an output is missing
+Staleness is decided when a stage becomes ready, after its upstream stages
+ran, so a rerun step1_enrich that rewrites launches makes step2 / step3 rerun
+while a rerun that produced identical bytes does not. Stages whose
+dependencies are done run in parallel (step2 and step3 only read launches).
+step1_fetch has no inputs: it reruns only on code changes or with --force.
+
+Each stage's output goes to output/pipeline/<stage>.log. Per-stage hashes are
+kept in data/pipeline_state.json; every invocation appends its per-stage
+status and wall time to data/pipeline_runs.jsonl.
+
+Usage:
+  python3 pipeline.py                      # run whatever is stale
+  python3 pipeline.py --dry-run            # show what would run and why
+  python3 pipeline.py --force step2        # rerun step2 (and whatever it changes)
+  python3 pipeline.py --only step3 analyze # consider only these stages
+  python3 pipeline.py --args step1_enrich="--active-ttl 600" [--jobs 2]
+"""
+
+import argparse
+import ast
+import hashlib
+import json
+import os
+import shlex
+import subprocess
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+
+from candle_store import INDEX_FILES
+from metrics import METRICS
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+STATE_FILE = "data/pipeline_state.json"
+RUNS_FILE = "data/pipeline_runs.jsonl"
+LOG_DIR = "output/pipeline"
+LAUNCHES = "data/step1_launches.json"
+
+
+@dataclass
+class Stage:
+    name: str
+    script: str
+    inputs: list = field(default_factory=list)
+    outputs: list = field(default_factory=list)
+    args: list = field(default_factory=list)
+
+
+STAGES = [
+    Stage("step1_fetch", "step1_fetch_launches.py",
+          outputs=[LAUNCHES, "data/step1_summary.json", "output/step1_report.md"]),
+    # Enriches launches in place: its input is also its output
+    Stage("step1_enrich", "step1_enrich.py", inputs=[LAUNCHES],
+          outputs=[LAUNCHES, "data/step1_summary.json", "output/step1_report.md"]),
+    Stage("step2", "step2_near_graduation.py", inputs=[LAUNCHES],
+          outputs=["data/step2_near_grad.json", "output/step2_report.md"]),
+    Stage("step3", "step3_graduated_price.py", inputs=[LAUNCHES],
+          outputs=["data/step3_price_action.json", "output/step3_report.md"]),
+    Stage("analyze", "analyze.py",
+          inputs=[LAUNCHES, "data/step2_near_grad.json", "data/step3_price_action.json",
+                  *INDEX_FILES],
+          outputs=["output/analysis_report.md"]),
+]
+
+
+def dependencies(stages):
+    """stage name -> names of earlier stages that write one of its inputs."""
+    deps = {}
+    for i, stage in enumerate(stages):
+        deps[stage.name] = {s.name for s in stages[:i] if set(s.outputs) & set(stage.inputs)}
+    return deps
+
+
+# ── Hashing ──────────────────────────────────────────────────────────────────
+
+def local_imports(path, seen=None):
+    """The script plus every module in BASE_DIR it imports, transitively."""
+    seen = set() if seen is None else seen
+    if path in seen or not os.path.exists(path):
+        return seen
+    seen.add(path)
+    with open(path) as f:
+        tree = ast.parse(f.read(), filename=path)
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            names = [a.name for a in node.names]
+        elif isinstance(node, ast.ImportFrom) and node.module and not node.level:
+            names = [node.module]
+        else:
+            continue
+        for name in names:
+            local_imports(os.path.join(BASE_DIR, name.split(".")[0] + ".py"), seen)
+    return seen
+
+
+def code_hash(stage):
+    h = hashlib.sha256(json.dumps(stage.args).encode())
+    for path in sorted(local_imports(os.path.join(BASE_DIR, stage.script))):
+        with open(path, "rb") as f:
+            h.update(os.path.basename(path).encode() + b"\0" + f.read())
+    return h.hexdigest()
+
+
+class FileHasher:
+    """sha256 of file contents, reusing the stored digest while size and mtime match."""
+
+    def __init__(self, cache):
+        self.cache = cache       # path -> [size, mtime_ns, sha256]
+
+    def __call__(self, path):
+        try:
+            st = os.stat(path)
+        except FileNotFoundError:
+            return None
+        hit = self.cache.get(path)
+        if hit and hit[0] == st.st_size and hit[1] == st.st_mtime_ns:
+            return hit[2]
+        h = hashlib.sha256()
+        with open(path, "rb") as f, METRICS.timed_op("pipeline_hash"):
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                h.update(chunk)
+        self.cache[path] = [st.st_size, st.st_mtime_ns, h.hexdigest()]
+        return h.hexdigest()
+
+
+# ── Runner ───────────────────────────────────────────────────────────────────
+
+class Pipeline:
+    def __init__(self, stages=STAGES, state_path=STATE_FILE):
+        self.stages = {s.name: s for s in stages}
+        self.order = [s.name for s in stages]
+        self.deps = dependencies(stages)
+        self.state_path = state_path
+        self.state = {"stages": {}, "files": {}}
+        if os.path.exists(state_path):
+            with open(state_path) as f:
+                self.state = json.load(f)
+        self.hash_file = FileHasher(self.state["files"])
+
+    def stale_reason(self, name, forced):
+        """Why the stage must run, or None when it is up to date."""
+        stage = self.stages[name]
+        rec = self.state["stages"].get(name)
+        if name in forced:
+            return "forced"
+        if rec is None:
+            return "never run"
+        if rec["code"] != code_hash(stage):
+            return "code changed"
+        missing = [p for p in stage.outputs if not os.path.exists(p)]
+        if missing:
+            return f"missing {missing[0]}"
+        for path in stage.inputs:
+            if self.hash_file(path) != rec["inputs"].get(path):
+                return f"{path} changed"
+        return None
+
+    def _run_stage(self, name):
+        stage = self.stages[name]
+        os.makedirs(LOG_DIR, exist_ok=True)
+        log_path = os.path.join(LOG_DIR, f"{name}.log")
+        start = time.time()
+        with open(log_path, "w") as log:
+            proc = subprocess.run([sys.executable, os.path.join(BASE_DIR, stage.script)] + stage.args,
+                                  stdout=log, stderr=subprocess.STDOUT)
+        return proc.returncode, time.time() - start, log_path
+
+    def _record(self, name):
+        stage = self.stages[name]
+        # Hashed after the run: an in-place stage (step1_enrich) is then up to
+        # date against what it wrote itself
+        self.state["stages"][name] = {
+            "code": code_hash(stage),
+            "inputs": {p: self.hash_file(p) for p in stage.inputs},
+            "finished_at": int(time.time()),
+        }
+        self.save()
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.state_path) or ".", exist_ok=True)
+        tmp = self.state_path + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump(self.state, f, indent=2)
+        os.replace(tmp, self.state_path)
+
+    def plan(self, only=None, forced=()):
+        """Dry run: stage -> reason it would run (None = up to date)."""
+        names = [n for n in self.order if not only or n in only]
+        plan = {}
+        for name in names:
+            upstream = [d for d in self.deps[name] if plan.get(d)]
+            plan[name] = self.stale_reason(name, forced) or (
+                f"after {', '.join(sorted(upstream))}" if upstream else None)
+        return plan
+
+    def run(self, only=None, forced=(), jobs=2):
+        names = [n for n in self.order if not only or n in only]
+        deps = {n: self.deps[n] & set(names) for n in names}
+        results = {}                 # name -> row
+        running = {}
+        with ThreadPoolExecutor(max_workers=jobs) as executor:
+            while len(results) < len(names):
+                for name in names:
+                    if name in results or name in running:
+                        continue
+                    if any(results.get(d, {}).get("status") in ("failed", "blocked")
+                           for d in deps[name]):
+                        results[name] = {"stage": name, "status": "blocked", "wall_s": 0}
+                        print(f"  [{name}] blocked — upstream failed")
+                        continue
+                    if not all(d in results for d in deps[name]):
+                        continue
+                    reason = self.stale_reason(name, forced)
+                    if reason is None:
+                        results[name] = {"stage": name, "status": "up to date", "wall_s": 0}
+                        print(f"  [{name}] up to date")
+                        continue
+                    print(f"  [{name}] running ({reason}) → {LOG_DIR}/{name}.log")
+                    running[name] = (executor.submit(self._run_stage, name), reason)
+                if not running:
+                    continue
+                done, _ = wait([f for f, _ in running.values()], return_when=FIRST_COMPLETED)
+                for name in [n for n, (f, _) in running.items() if f in done]:
+                    future, reason = running.pop(name)
+                    code, wall, log_path = future.result()
+                    status = "ok" if code == 0 else "failed"
+                    results[name] = {"stage": name, "status": status, "reason": reason,
+                                     "wall_s": round(wall, 2)}
+                    METRICS.observe("pipeline_stage_seconds", wall, stage=name, status=status)
+                    if code == 0:
+                        self._record(name)
+                        print(f"  [{name}] done in {wall:.1f}s")
+                    else:
+                        print(f"  [{name}] FAILED (exit {code}) after {wall:.1f}s — see {log_path}")
+        self.save()
+        rows = [results[n] for n in names]
+        with open(RUNS_FILE, "a") as f:
+            f.write(json.dumps({"ts": int(time.time()), "stages": rows}) + "\n")
+        return rows
+
+
+def print_table(rows):
+    print(f"\n  {'Stage':<14} {'Status':<11} {'Wall s':>8}  Reason")
+    for r in rows:
+        print(f"  {r['stage']:<14} {r['status']:<11} {r['wall_s']:>8.1f}  {r.get('reason') or ''}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the pipeline DAG, skipping up-to-date stages")
+    parser.add_argument("--only", nargs="+", metavar="STAGE", help="consider only these stages")
+    parser.add_argument("--force", nargs="+", default=[], metavar="STAGE",
+                        help="rerun these stages even when up to date ('all' for every stage)")
+    parser.add_argument("--args", action="append", default=[], metavar='STAGE="ARGS"',
+                        help="extra arguments for one stage's script (part of its code hash)")
+    parser.add_argument("--jobs", type=int, default=2, help="stages run concurrently (default: 2)")
+    parser.add_argument("--dry-run", action="store_true", help="show what would run and why")
+    args = parser.parse_args()
+
+    stages = [Stage(s.name, s.script, list(s.inputs), list(s.outputs)) for s in STAGES]
+    by_name = {s.name: s for s in stages}
+    for spec in args.args:
+        name, _, extra = spec.partition("=")
+        if name not in by_name:
+            parser.error(f"unknown stage {name!r} (stages: {', '.join(by_name)})")
+        by_name[name].args = shlex.split(extra)
+    for name in (args.only or []) + [f for f in args.force if f != "all"]:
+        if name not in by_name:
+            parser.error(f"unknown stage {name!r} (stages: {', '.join(by_name)})")
+    forced = set(by_name) if "all" in args.force else set(args.force)
+
+    pipeline = Pipeline(stages)
+    if args.dry_run:
+        for name, reason in pipeline.plan(args.only, forced).items():
+            print(f"  {name:<14} {'would run — ' + reason if reason else 'up to date'}")
+        return
+
+    print("=" * 60)
+    print("PIPELINE — " + " → ".join(n for n in pipeline.order if not args.only or n in args.only))
+    print("=" * 60)
+    start = time.time()
+    rows = pipeline.run(args.only, forced, args.jobs)
+    print_table(rows)
+    print(f"\nPipeline finished in {time.time() - start:.1f}s → {RUNS_FILE}")
+    if any(r["status"] in ("failed", "blocked") for r in rows):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
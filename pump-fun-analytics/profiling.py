@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+"""
+profiling.py — --profile mode for the pipeline scripts.
+
+Wraps a whole script run and, for every METRICS phase inside it, records:
+  - wall seconds and process CPU seconds (all threads)
+  - network wait: request seconds summed over all threads (can exceed wall
+    when requests run concurrently)
+  - seconds in hot operations from METRICS.timed_op (extract, json_decode,
+    json_write)
+  - tracemalloc peak of Python allocations
+
+and for the whole run a cProfile dump (or pyinstrument, with
+PUMP_PROFILER=pyinstrument when installed) plus the top allocation sites.
+cProfile and pyinstrument only see the main thread; worker-thread time shows
+up in the network-wait and op columns instead.
+
+Outputs go next to the reports, in output/profile/:
+  <script>.prof          pstats dump (snakeviz / python -m pstats)
+  <script>_pyinstrument.html   when PUMP_PROFILER=pyinstrument
+  <script>_profile.md    phase breakdown, top functions, top allocations
+  <script>_profile.json  phase breakdown, machine-readable
+"""
+
+import cProfile
+import io
+import json
+import os
+import pstats
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+from metrics import METRICS
+
+PROFILE_DIR = "output/profile"
+TOP_FUNCTIONS = 30
+TOP_ALLOCATIONS = 15
+NET_METRIC = "request_latency_seconds"
+
+
+class Profiler:
+    def __init__(self, script, out_dir=PROFILE_DIR, engine=None):
+        self.script = script
+        self.out_dir = out_dir
+        self.engine = engine or os.environ.get("PUMP_PROFILER", "cprofile")
+        self.phases = []        # finished phase rows, in completion order
+        self.open = {}          # phase name -> start snapshot
+        self.prof = None
+
+    # ── Snapshots ────────────────────────────────────────────────────────────
+
+    def _snapshot(self):
+        return {
+            "wall": time.perf_counter(),
+            "cpu": time.process_time(),
+            "net": METRICS.histogram_sum(NET_METRIC),
+            "ops": {dict(k).get("op"): v for k, v in METRICS.totals("op_seconds_total").items()},
+        }
+
+    def _on_phase(self, event, name):
+        current, peak = tracemalloc.get_traced_memory()
+        # reset_peak() below would hide an inner phase's peak from enclosing ones
+        for snap in self.open.values():
+            snap["peak"] = max(snap["peak"], peak)
+        if event == "start":
+            snap = self._snapshot()
+            snap["peak"] = current
+            self.open[name] = snap
+            tracemalloc.reset_peak()
+            return
+
+        start = self.open.pop(name, None)
+        if start is None:
+            return
+        end = self._snapshot()
+        ops = {
+            op: round(v - start["ops"].get(op, 0), 3)
+            for op, v in end["ops"].items() if v - start["ops"].get(op, 0) > 0
+        }
+        self.phases.append({
+            "phase": name,
+            "wall_s": round(end["wall"] - start["wall"], 3),
+            "cpu_s": round(end["cpu"] - start["cpu"], 3),
+            "net_wait_s": round(end["net"] - start["net"], 3),
+            "ops_s": ops,
+            "peak_mb": round(max(start["peak"], peak) / 1e6, 2),
+        })
+
+    # ── Run control ──────────────────────────────────────────────────────────
+
+    def start(self):
+        tracemalloc.start()
+        METRICS.add_phase_listener(self._on_phase)
+        self.run_start = self._snapshot()
+        if self.engine == "pyinstrument":
+            try:
+                from pyinstrument import Profiler as PyinstrumentProfiler
+                self.prof = PyinstrumentProfiler()
+            except ImportError:
+                print("WARNING: pyinstrument not installed — falling back to cProfile")
+                self.engine = "cprofile"
+        if self.prof is None:
+            self.prof = cProfile.Profile()
+        if self.engine == "pyinstrument":
+            self.prof.start()
+        else:
+            self.prof.enable()
+
+    def stop(self):
+        if self.engine == "pyinstrument":
+            self.prof.stop()
+        else:
+            self.prof.disable()
+        end = self._snapshot()
+        _, peak = tracemalloc.get_traced_memory()
+        for snap in self.open.values():
+            peak = max(peak, snap["peak"])
+        allocations = tracemalloc.take_snapshot().statistics("lineno")[:TOP_ALLOCATIONS]
+        tracemalloc.stop()
+
+        total = {
+            "phase": "TOTAL",
+            "wall_s": round(end["wall"] - self.run_start["wall"], 3),
+            "cpu_s": round(end["cpu"] - self.run_start["cpu"], 3),
+            "net_wait_s": round(end["net"] - self.run_start["net"], 3),
+            "ops_s": {op: round(v, 3) for op, v in end["ops"].items() if v > 0},
+            "peak_mb": round(max([peak] + [p["peak_mb"] * 1e6 for p in self.phases]) / 1e6, 2),
+        }
+        return self._write(total, allocations)
+
+    # ── Output ───────────────────────────────────────────────────────────────
+
+    def _write(self, total, allocations):
+        os.makedirs(self.out_dir, exist_ok=True)
+        base = os.path.join(self.out_dir, self.script)
+        rows = self.phases + [total]
+
+        if self.engine == "pyinstrument":
+            dump_path = f"{base}_pyinstrument.html"
+            with open(dump_path, "w") as f:
+                f.write(self.prof.output_html())
+            top = self.prof.output_text(unicode=False, color=False)
+        else:
+            dump_path = f"{base}.prof"
+            self.prof.dump_stats(dump_path)
+            buf = io.StringIO()
+            pstats.Stats(self.prof, stream=buf).sort_stats("cumulative").print_stats(TOP_FUNCTIONS)
+            top = buf.getvalue()
+
+        with open(f"{base}_profile.json", "w") as f:
+            json.dump({"script": self.script, "engine": self.engine, "phases": rows,
+                       "dump": dump_path}, f, indent=2)
+
+        ops = sorted({op for r in rows for op in r["ops_s"]})
+        lines = [
+            f"# Profile — {self.script}",
+            "",
+            f"Engine: {self.engine} (dump: `{dump_path}`). Net wait is request seconds "
+            "summed over all threads; op columns are seconds inside METRICS.timed_op.",
+            "",
+            "## Phase Breakdown",
+            "",
+            "| Phase | Wall s | CPU s | Net wait s | " + "".join(f"{op} s | " for op in ops)
+            + "Peak MB |",
+            "|-------|--------|-------|------------|" + "------|" * len(ops) + "---------|",
+        ]
+        for r in rows:
+            lines.append(
+                f"| {r['phase']} | {r['wall_s']} | {r['cpu_s']} | {r['net_wait_s']} | "
+                + "".join(f"{r['ops_s'].get(op, 0)} | " for op in ops)
+                + f"{r['peak_mb']} |"
+            )
+        lines += ["", "## Top Functions (main thread)", "", "```", top.strip(), "```",
+                  "", "## Top Allocation Sites (at exit)", "",
+                  "| Site | Size KB | Blocks |", "|------|---------|--------|"]
+        for stat in allocations:
+            frame = stat.traceback[0]
+            lines.append(f"| `{frame.filename}:{frame.lineno}` | "
+                         f"{stat.size / 1024:,.1f} | {stat.count:,} |")
+
+        report_path = f"{base}_profile.md"
+        with open(report_path, "w") as f:
+            f.write("\n".join(lines) + "\n")
+        return report_path
+
+
+@contextmanager
+def profile_run(script, enabled=True):
+    """Profile the enclosed block when enabled; prints where the report went."""
+    if not enabled:
+        yield None
+        return
+    profiler = Profiler(script)
+    profiler.start()
+    try:
+        yield profiler
+    finally:
+        path = profiler.stop()
+        print(f"\nProfile saved to {path}")
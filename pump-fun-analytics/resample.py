@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+resample.py — Bootstrap confidence intervals and Monte Carlo bankroll simulation.
+
+Strategy stats in analyze.py come from a few dozen graduated tokens, so every
+point estimate is paired here with a percentile bootstrap interval. Resamples
+are drawn as one (draws × n) index matrix and each metric is a single axis-1
+reduction over it.
+
+The Monte Carlo portfolio run replays a strategy's empirical per-trade returns
+as a sequence of fixed-fraction bets, all paths drawn as one (paths × trades)
+matrix in-process — at 10k paths × 100 trades that takes tens of milliseconds,
+less than starting a process pool would.
+"""
+
+import numpy as np
+
+BOOTSTRAP_DRAWS = 10_000
+CI_LEVEL = 0.95
+
+
+# ── Bootstrap ─────────────────────────────────────────────────────────────────
+
+def _interval(samples, level):
+    lo, hi = np.percentile(samples, [(1 - level) / 2 * 100, (1 + level) / 2 * 100])
+    return [round(float(lo), 4), round(float(hi), 4)]
+
+
+def bootstrap_strategy_ci(returns, draws=BOOTSTRAP_DRAWS, level=CI_LEVEL, seed=0):
+    """
+    Percentile bootstrap CIs for the compute_strategy_stats metrics.
+
+    Returns {metric: [low, high]} for win_rate, avg_return, median_return and
+    max_drawdown, plus p_positive_ev (share of resampled means above zero).
+    Empty input returns None.
+    """
+    if not returns:
+        return None
+    x = np.asarray(returns, dtype=np.float64)
+    rng = np.random.default_rng(seed)
+    samples = x[rng.integers(0, len(x), size=(draws, len(x)))]
+
+    means = samples.mean(axis=1)
+    return {
+        "win_rate":      _interval((samples > 0).mean(axis=1) * 100, level),
+        "avg_return":    _interval(means, level),
+        "median_return": _interval(np.median(samples, axis=1), level),
+        "max_drawdown":  _interval(samples.min(axis=1), level),
+        "p_positive_ev": round(float((means > 0).mean()), 4),
+        "draws":         draws,
+        "level":         level,
+    }
+
+
+def bootstrap_q1_ev(graduated_flags, peak_mults, default_mult=1.5,
+                    draws=BOOTSTRAP_DRAWS, level=CI_LEVEL, seed=0):
+    """
+    Bootstrap the Q1 expected value p*(gain-1) - (1-p).
+
+    graduated_flags — one bool per 90%+ token (did it graduate)
+    peak_mults      — peak 30-min multipliers for those that graduated with price data
+    """
+    if not graduated_flags:
+        return None
+    rng = np.random.default_rng(seed)
+    flags = np.asarray(graduated_flags, dtype=np.float64)
+    p = flags[rng.integers(0, len(flags), size=(draws, len(flags)))].mean(axis=1)
+
+    if peak_mults:
+        mults = np.asarray(peak_mults, dtype=np.float64)
+        gain = mults[rng.integers(0, len(mults), size=(draws, len(mults)))].mean(axis=1)
+    else:
+        gain = np.full(draws, default_mult)
+
+    ev = p * (gain - 1.0) - (1.0 - p)
+    return {
+        "grad_rate_pct":     _interval(p * 100, level),
+        "ev_net_multiplier": _interval(ev, level),
+        "p_positive_ev":     round(float((ev > 0).mean()), 4),
+        "draws":             draws,
+        "level":             level,
+    }
+
+
+# ── Monte Carlo portfolio ─────────────────────────────────────────────────────
+
+def simulate_portfolio(returns, n_trades=100, fraction=0.02, paths=10_000,
+                       ruin_level=0.5, seed=0):
+    """
+    Monte Carlo bankroll simulation from a strategy's per-trade returns (%).
+
+    Each path stakes `fraction` of the current bankroll on n_trades draws from
+    the empirical returns. A path is ruined if the bankroll ever falls to
+    ruin_level (fraction of the starting bankroll).
+
+    Returns final-bankroll percentiles, ruin probability, median max drawdown
+    and p5/p50/p95 bankroll bands at every tenth trade. Raises ValueError unless
+    n_trades and paths are at least 1.
+    """
+    if n_trades < 1 or paths < 1:
+        raise ValueError(f"need at least one path and one trade: paths={paths}, n_trades={n_trades}")
+    if not returns:
+        return None
+    x = np.asarray(returns, dtype=np.float64)
+    rng = np.random.default_rng(seed)
+    trades = x[rng.integers(0, len(x), size=(paths, n_trades))] / 100.0
+    bankroll = np.cumprod(np.maximum(1.0 + fraction * trades, 0.0), axis=1)
+
+    final = bankroll[:, -1]
+    running_peak = np.maximum.accumulate(np.maximum(bankroll, 1.0), axis=1)
+    max_dd = ((running_peak - bankroll) / running_peak).max(axis=1)
+    steps = list(range(9, n_trades, 10)) or [n_trades - 1]
+    bands = np.percentile(bankroll[:, steps], [5, 50, 95], axis=0)
+
+    return {
+        "paths":             paths,
+        "n_trades":          n_trades,
+        "fraction":          fraction,
+        "ruin_level":        ruin_level,
+        "final_p5":          round(float(np.percentile(final, 5)), 4),
+        "final_median":      round(float(np.median(final)), 4),
+        "final_p95":         round(float(np.percentile(final, 95)), 4),
+        "final_mean":        round(float(final.mean()), 4),
+        "p_profit":          round(float((final > 1.0).mean()), 4),
+        "p_ruin":            round(float((bankroll.min(axis=1) <= ruin_level).mean()), 4),
+        "median_max_drawdown": round(float(np.median(max_dd)), 4),
+        "bankroll_bands": {
+            "trade": [s + 1 for s in steps],
+            "p5":    [round(float(v), 4) for v in bands[0]],
+            "p50":   [round(float(v), 4) for v in bands[1]],
+            "p95":   [round(float(v), 4) for v in bands[2]],
+        },
+    }
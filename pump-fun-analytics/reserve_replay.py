@@ -0,0 +1,290 @@
+#!/usr/bin/env python3
+"""
+reserve_replay.py — Streaming bonding-curve reserve replay over scanned blocks.
+
+step1_enrich reads real_sol_reserves as they are *now*, so a curve that hit
+95% and then dumped looks dead. The phase 2 block scan already sees every
+pump.fun transaction, including their preBalances / postBalances, and the
+curve PDA's lamport delta in a transaction is that trade's SOL in or out of
+the curve. ReserveReplay applies them per mint, in slot order — as the
+absolute postBalance, so a block that failed to fetch delays an update rather
+than leaving a permanent error — and tracks for each curve:
+  - peak real_sol_reserves / grad %, when it was reached and time to peak
+  - seconds spent in each grad % bucket (the step2 buckets)
+  - whether the curve completed, and when
+
+Memory is O(active curves): a curve is retired to data/reserve_peaks.jsonl
+once it completes or has not traded for IDLE_SECONDS of block time. An idle
+curve stays dormant for DORMANT_SECONDS more and is revived if it trades again
+(its later summary line supersedes the idle one). Everything still open when
+the scan ends is retired with retired_reason "end": its peak is a lower bound,
+and step2 reports it as such. In range mode the day shards hand their open and
+dormant curves on to the next day's replay instead (handoff_path / inherit),
+so only the last day's open curves end that way.
+
+Curves launched before the scanned range are not tracked (no starting
+balance). The open-curve state is checkpointed next to the phase 2 checkpoint
+and blocks at or below its last applied slot are ignored, so a resumed scan
+replays each block once.
+
+Usage:
+  python3 reserve_replay.py [--top 20]     # summarise data/reserve_peaks.jsonl
+"""
+
+import argparse
+import json
+import os
+
+from config import PUMP_PROGRAM
+from metrics import METRICS
+from step1_enrich import CURVE_RENT_LAMPORTS, GRADUATION_SOL_LAMPORTS, derive_bonding_curve_pda
+
+PEAKS_FILE = "data/reserve_peaks.jsonl"
+STATE_FILE = "data/reserve_replay_state.json"
+IDLE_SECONDS = 6 * 3600
+DORMANT_SECONDS = 7 * 86400  # how long an idle-retired curve can still be revived
+SWEEP_SECONDS = 300          # block-time interval between idle sweeps
+# Same edges and labels as step2_near_graduation.compute_buckets
+BUCKETS = ((100, "100"), (90, "90-99"), (75, "75-90"), (50, "50-75"),
+           (25, "25-50"), (10, "10-25"), (0, "0-10"))
+
+
+def grad_pct(real_sol):
+    return min(real_sol / GRADUATION_SOL_LAMPORTS * 100.0, 100.0)
+
+
+def bucket_of(pct):
+    return next(label for edge, label in BUCKETS if pct >= edge)
+
+
+def _account_keys(tx_data):
+    return [k if isinstance(k, str) else (k or {}).get("pubkey", "")
+            for k in tx_data.get("accountKeys") or []]
+
+
+class ReserveReplay:
+    """Per-curve state machine driven by blocks in slot order."""
+
+    def __init__(self, peaks_path=PEAKS_FILE, state_path=STATE_FILE, idle_seconds=IDLE_SECONDS,
+                 handoff_path=None, inherit=None, final=True):
+        """
+        handoff_path — finish() also saves the open and dormant curves there
+        inherit      — a previous replay's handoff (load_handoff) to start from
+        final        — finish() retires open curves ("end"); False leaves them to
+                       the handoff only
+        """
+        self.peaks_path = peaks_path
+        self.state_path = state_path
+        self.idle_seconds = idle_seconds
+        self.handoff_path = handoff_path
+        self.inherit = inherit
+        self.final = final
+        self.completed = []      # pdas that completed in the current block
+        self.last_sweep = None
+        self._start(inherit)
+        if os.path.exists(state_path):
+            self._start(_read_json(state_path))
+
+    def _start(self, state):
+        state = state or {}
+        self.curves = state.get("curves", {})       # pda -> open curve state
+        self.dormant = state.get("dormant", {})     # pda -> idle-retired curve state
+        self.last_slot, self.last_ts = state.get("last_slot"), state.get("last_ts")
+
+    # ── State machine ────────────────────────────────────────────────────────
+
+    def _launch(self, tok, ts):
+        pda = derive_bonding_curve_pda(tok["mint"])
+        self.curves[pda] = {
+            "pda": pda, "mint": tok["mint"], "launch_slot": tok["slot"], "launch_ts": ts,
+            "lamports": 0, "real_sol": 0, "peak_sol": 0, "peak_ts": ts, "trades": 0,
+            "bucket": bucket_of(0.0), "bucket_since": ts, "bucket_seconds": {},
+            "last_trade_ts": ts, "complete_ts": None,
+        }
+
+    def _trade(self, c, lamports, ts):
+        c["lamports"] = lamports
+        c["real_sol"] = max(0, lamports - CURVE_RENT_LAMPORTS)
+        c["trades"] += 1
+        c["last_trade_ts"] = ts
+        if c["real_sol"] > c["peak_sol"]:
+            c["peak_sol"], c["peak_ts"] = c["real_sol"], ts
+        pct = grad_pct(c["real_sol"])
+        bucket = bucket_of(pct)
+        if bucket != c["bucket"]:
+            self._close_bucket(c, ts)
+            c["bucket"] = bucket
+        if pct >= 100 and c["complete_ts"] is None:
+            c["complete_ts"] = ts
+            self.completed.append(c["pda"])
+
+    @staticmethod
+    def _close_bucket(c, ts):
+        spent = max(0, ts - c["bucket_since"])
+        c["bucket_seconds"][c["bucket"]] = c["bucket_seconds"].get(c["bucket"], 0) + spent
+        c["bucket_since"] = ts
+
+    def apply_block(self, slot, block, launches):
+        """
+        Apply one block, given the CreateV2 launches extracted from it. Blocks
+        must arrive in ascending slot order; already-applied slots are ignored.
+        """
+        if not block or (self.last_slot is not None and slot <= self.last_slot):
+            return
+        ts = block.get("blockTime") or self.last_ts or 0
+        for tok in launches:
+            self._launch(tok, ts)
+        for tx in block.get("transactions") or []:
+            meta = tx.get("meta") or {}
+            if meta.get("err"):
+                continue
+            keys = _account_keys(tx.get("transaction") or {})
+            if PUMP_PROGRAM not in keys:
+                continue
+            post = meta.get("postBalances") or []
+            for idx, key in enumerate(keys):
+                c = self.curves.get(key)
+                if c is None and key in self.dormant:
+                    c = self.dormant[key]
+                    if idx < len(post) and post[idx] != c["lamports"]:
+                        self.curves[key] = self.dormant.pop(key)     # traded again: revive
+                        METRICS.inc("replay_revived_total")
+                    else:
+                        c = None
+                if c is not None and idx < len(post) and post[idx] != c["lamports"]:
+                    self._trade(c, post[idx], ts)
+        self.last_slot, self.last_ts = slot, ts
+        if self.completed:
+            self._retire(self.completed, "complete", ts)
+            self.completed = []
+        if self.last_sweep is None or ts - self.last_sweep >= SWEEP_SECONDS:
+            self.last_sweep = ts
+            idle = [pda for pda, c in self.curves.items()
+                    if ts - c["last_trade_ts"] >= self.idle_seconds]
+            if idle:
+                self._retire(idle, "idle", ts)
+            self.dormant = {pda: c for pda, c in self.dormant.items()
+                            if ts - c["last_trade_ts"] < DORMANT_SECONDS}
+        METRICS.set_gauge("replay_open_curves", len(self.curves))
+
+    def _retire(self, pdas, reason, ts):
+        with open(self.peaks_path, "a") as f:
+            for pda in pdas:
+                c = self.curves.pop(pda)
+                f.write(json.dumps(self.summary(pda, c, ts, reason)) + "\n")
+                if reason == "idle":
+                    self.dormant[pda] = c
+        METRICS.inc("replay_retired_total", len(pdas), reason=reason)
+
+    def summary(self, pda, c, ts, reason=None):
+        self._close_bucket(c, c["complete_ts"] or ts)
+        return {
+            "mint": c["mint"], "pda": pda, "launch_slot": c["launch_slot"],
+            "trades": c["trades"],
+            "peak_real_sol": c["peak_sol"],
+            "peak_grad_pct": round(grad_pct(c["peak_sol"]), 2),
+            "peak_ts": c["peak_ts"],
+            "time_to_peak_s": c["peak_ts"] - c["launch_ts"],
+            "final_real_sol": c["real_sol"],
+            "final_grad_pct": round(grad_pct(c["real_sol"]), 2),
+            "complete_ts": c["complete_ts"],
+            "bucket_seconds": c["bucket_seconds"],
+            "retired_reason": reason,         # complete | idle | end (peak cut off by the scan)
+        }
+
+    # ── Checkpoint / finish ──────────────────────────────────────────────────
+
+    def reset(self):
+        """Start over: a fresh (non-resumed) scan must not append to old peaks."""
+        self._start(self.inherit)
+        self.completed, self.last_sweep = [], None
+        for path in (self.peaks_path, self.state_path):
+            if os.path.exists(path):
+                os.remove(path)
+
+    def _save(self, path):
+        tmp = path + ".tmp"
+        with open(tmp, "w") as f, METRICS.timed_op("json_write"):
+            json.dump({"last_slot": self.last_slot, "last_ts": self.last_ts,
+                       "curves": self.curves, "dormant": self.dormant}, f)
+        os.replace(tmp, path)
+
+    def checkpoint(self):
+        self._save(self.state_path)
+
+    def finish(self):
+        """
+        Hand the open and dormant curves off (handoff_path), retire the open ones
+        as "end" unless this replay is not the final one, and return all
+        summaries keyed by mint.
+        """
+        if self.handoff_path:
+            self._save(self.handoff_path)
+        if self.curves and self.final:
+            self._retire(list(self.curves), "end", self.last_ts or 0)
+        if os.path.exists(self.state_path):
+            os.remove(self.state_path)
+        return load_peaks(self.peaks_path)
+
+
+def _read_json(path):
+    with open(path) as f:
+        return json.load(f)
+
+
+def load_handoff(path):
+    """A previous day's handoff (open + dormant curves), or None if it has none."""
+    return _read_json(path) if os.path.exists(path) else None
+
+
+def load_peaks(path=PEAKS_FILE):
+    peaks = {}
+    if os.path.exists(path):
+        with open(path) as f:
+            for line in f:
+                try:
+                    rec = json.loads(line)
+                except ValueError:
+                    continue       # torn last line from a crash
+                peaks[rec["mint"]] = rec
+    return peaks
+
+
+def attach_peaks(tokens, peaks):
+    """Copy replayed peak fields onto token records; returns how many matched."""
+    n = 0
+    for tok in tokens:
+        rec = peaks.get(tok["mint"])
+        if rec is not None:
+            tok.update({k: rec[k] for k in ("peak_grad_pct", "peak_real_sol", "peak_ts",
+                                             "time_to_peak_s", "bucket_seconds")})
+            # Still open when the scan ended: the peak is a lower bound
+            tok["peak_truncated"] = rec.get("retired_reason") == "end"
+            n += 1
+    return n
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Summarise replayed bonding-curve peaks")
+    parser.add_argument("--top", type=int, default=20)
+    args = parser.parse_args()
+    peaks = list(load_peaks().values())
+    if not peaks:
+        print(f"ERROR: {PEAKS_FILE} is empty or missing. Run step1_fetch_launches.py first.")
+        return
+    counts = {label: 0 for _, label in reversed(BUCKETS)}
+    for p in peaks:
+        counts[bucket_of(p["peak_grad_pct"])] += 1
+    print(f"{len(peaks):,} curves replayed — peak grad % distribution:")
+    for label, n in counts.items():
+        print(f"  {label:>6}%  {n:>7,}  {n / len(peaks) * 100:5.1f}%")
+    fallen = sorted((p for p in peaks if p["complete_ts"] is None),
+                    key=lambda p: p["peak_grad_pct"], reverse=True)[:args.top]
+    print(f"\nTop {len(fallen)} peaks that never completed:")
+    for p in fallen:
+        print(f"  {p['mint'][:20]}…  peak {p['peak_grad_pct']:5.1f}% after "
+              f"{p['time_to_peak_s'] / 60:6.1f} min → now {p['final_grad_pct']:5.1f}%")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,244 @@
+#!/usr/bin/env python3
+"""
+rpc_pool.py — Multi-endpoint Solana JSON-RPC client with health scoring,
+hedged requests and per-endpoint circuit breakers.
+
+Each endpoint tracks an EWMA latency, a rolling latency window (for p95) and an
+EWMA error rate; requests go to the lowest score. If the primary has not
+answered by its own p95 latency, a hedged duplicate is sent to the next-best
+endpoint and whichever succeeds first wins. Transport failures, 429s and 5xx
+count against an endpoint; JSON-RPC application errors (e.g. skipped slot) do
+not. After BREAKER_FAILURES consecutive failures an endpoint's breaker opens
+for BREAKER_COOLDOWN seconds, then lets a single probe through (half-open).
+
+With a cu_budget.CuScheduler attached, every physical request (retries and
+hedges included) is admitted against the compute-unit budget first; the
+primary is admitted before its hedge timer starts, so queueing for budget
+never triggers a hedge.
+
+Retries after a transport failure back off briefly (0.25s, 0.5s) while another
+endpoint is available to take them; when none is — the usual single-endpoint
+setup — they wait the full 1s, 2s, or longer if a 429 sent Retry-After.
+"""
+
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from urllib.parse import urlsplit
+
+from metrics import METRICS
+
+EWMA_ALPHA = 0.2
+LATENCY_WINDOW = 200
+DEFAULT_HEDGE_AFTER = 1.0     # seconds, until an endpoint has enough samples
+MIN_HEDGE_AFTER = 0.05
+BREAKER_FAILURES = 5
+BREAKER_COOLDOWN = 30.0
+REQUEST_TIMEOUT = 30
+
+
+class EndpointError(Exception):
+    """Transport-level failure (connection, timeout, 429, 5xx, bad JSON)."""
+
+    def __init__(self, message, endpoint=None, retry_after=None):
+        super().__init__(message)
+        self.endpoint = endpoint
+        self.retry_after = retry_after      # seconds, from a 429/503 Retry-After header
+
+
+def _retry_after(value):
+    """Retry-After as seconds (delta-seconds form only; HTTP dates are ignored)."""
+    try:
+        return max(float(value), 0.0)
+    except (TypeError, ValueError):
+        return None
+
+
+class Endpoint:
+    def __init__(self, url):
+        self.url = url
+        self.host = urlsplit(url).netloc or url
+        self.lock = threading.Lock()
+        self.latencies = deque(maxlen=LATENCY_WINDOW)
+        self.ewma_latency = None
+        self.error_rate = 0.0
+        self.consecutive_failures = 0
+        self.state = "closed"           # closed | open | half_open
+        self.opened_at = 0.0
+        self.probe_in_flight = False
+        self.requests = 0
+        self.failures = 0
+
+    def p95(self):
+        with self.lock:
+            if len(self.latencies) < 20:
+                return DEFAULT_HEDGE_AFTER
+            ordered = sorted(self.latencies)
+        return max(ordered[int(len(ordered) * 0.95) - 1], MIN_HEDGE_AFTER)
+
+    def score(self):
+        latency = self.ewma_latency if self.ewma_latency is not None else DEFAULT_HEDGE_AFTER
+        return latency * (1.0 + 10.0 * self.error_rate)
+
+    def available(self, now):
+        """Breaker check; moves open → half_open once the cooldown has passed."""
+        with self.lock:
+            if self.state == "closed":
+                return True
+            if self.state == "open" and now - self.opened_at >= BREAKER_COOLDOWN:
+                self.state = "half_open"
+            if self.state == "half_open" and not self.probe_in_flight:
+                return True
+            return False
+
+    def begin(self):
+        with self.lock:
+            self.requests += 1
+            if self.state == "half_open":
+                self.probe_in_flight = True
+
+    def record_success(self, latency):
+        with self.lock:
+            self.latencies.append(latency)
+            self.ewma_latency = latency if self.ewma_latency is None else (
+                EWMA_ALPHA * latency + (1 - EWMA_ALPHA) * self.ewma_latency
+            )
+            self.error_rate *= (1 - EWMA_ALPHA)
+            self.consecutive_failures = 0
+            self.probe_in_flight = False
+            self.state = "closed"
+
+    def record_failure(self):
+        with self.lock:
+            self.failures += 1
+            self.error_rate = EWMA_ALPHA + (1 - EWMA_ALPHA) * self.error_rate
+            self.consecutive_failures += 1
+            self.probe_in_flight = False
+            if self.state == "half_open" or self.consecutive_failures >= BREAKER_FAILURES:
+                self.state = "open"
+                self.opened_at = time.time()
+
+    def snapshot(self):
+        with self.lock:
+            return {
+                "url": self.url,
+                "state": self.state,
+                "ewma_latency_s": round(self.ewma_latency, 4) if self.ewma_latency else None,
+                "error_rate": round(self.error_rate, 4),
+                "requests": self.requests,
+                "failures": self.failures,
+            }
+
+
+class RpcPool:
+    def __init__(self, urls, session, hedge=True, max_workers=128, scheduler=None):
+        if not urls:
+            raise ValueError("RpcPool needs at least one endpoint")
+        self.endpoints = [Endpoint(u) for u in urls]
+        self.session = session
+        self.hedge = hedge and len(self.endpoints) > 1
+        self.scheduler = scheduler
+        self.executor = ThreadPoolExecutor(max_workers=max_workers,
+                                           thread_name_prefix="rpc-pool")
+
+    # ── Routing ──────────────────────────────────────────────────────────────
+
+    def _ranked(self, exclude=()):
+        now = time.time()
+        candidates = [e for e in self.endpoints if e not in exclude and e.available(now)]
+        if not candidates and not exclude:
+            # Every breaker is open: fall back to the one that opened first
+            candidates = [min(self.endpoints, key=lambda e: e.opened_at)]
+        return sorted(candidates, key=lambda e: e.score())
+
+    def _admit(self, payload, priority):
+        if self.scheduler is not None:
+            self.scheduler.acquire(payload["method"], payload["params"], priority)
+
+    def _post(self, endpoint, payload, priority=None, admit=True):
+        if admit:
+            self._admit(payload, priority)
+        endpoint.begin()
+        method = payload["method"]
+        start = time.time()
+        status = "error"
+        nbytes = 0
+        retry_after = None
+        try:
+            r = self.session.post(endpoint.url, json=payload, timeout=REQUEST_TIMEOUT)
+            status, nbytes = r.status_code, len(r.content)
+            if r.status_code == 429 or r.status_code >= 500:
+                retry_after = _retry_after(r.headers.get("Retry-After"))
+                raise EndpointError(f"HTTP {r.status_code}")
+            with METRICS.timed_op("json_decode"):
+                d = r.json()
+        except Exception as e:
+            endpoint.record_failure()
+            METRICS.observe_request(endpoint.host, method, time.time() - start, status, nbytes)
+            raise EndpointError(str(e), endpoint, retry_after) from e
+        latency = time.time() - start
+        endpoint.record_success(latency)
+        METRICS.observe_request(endpoint.host, method, latency, status, nbytes)
+        return d
+
+    def _request(self, payload, priority=None):
+        """One logical request: primary plus an optional hedge. Returns the JSON body."""
+        self._admit(payload, priority)
+        ranked = self._ranked()
+        primary = ranked[0]
+        futures = {self.executor.submit(self._post, primary, payload, admit=False): primary}
+
+        if self.hedge:
+            done, _ = wait(futures, timeout=primary.p95())
+            if not done:
+                backup = self._ranked(exclude=(primary,))
+                if backup:
+                    hedge = self.executor.submit(self._post, backup[0], payload, priority)
+                    futures[hedge] = backup[0]
+
+        pending = set(futures)
+        last_error = None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for f in done:
+                try:
+                    return f.result()
+                except EndpointError as e:
+                    last_error = e
+        raise last_error
+
+    def _backoff(self, error, attempt):
+        """Short if another endpoint can take the retry, else the single-endpoint backoff."""
+        if self._ranked(exclude=(error.endpoint,)):
+            return 0.25 * (2 ** attempt)
+        return max(2 ** attempt, error.retry_after or 0.0)
+
+    # ── Public API ───────────────────────────────────────────────────────────
+
+    def call(self, method, params, retries=3, priority=None):
+        """
+        Same contract as config.rpc_call: the result, or None after retries.
+        priority overrides the scheduler's per-method default (lower runs first).
+        """
+        payload = {"jsonrpc": "2.0", "id": 1, "method": method, "params": params}
+        for attempt in range(retries):
+            if attempt:
+                METRICS.retry(method)
+            try:
+                d = self._request(payload, priority)
+            except EndpointError as e:
+                # Endpoint health already recorded; the next attempt re-ranks
+                if attempt < retries - 1:
+                    time.sleep(self._backoff(e, attempt))
+                continue
+            if "error" in d:
+                if attempt < retries - 1:
+                    time.sleep(2 ** attempt)
+                    continue
+                return None
+            return d.get("result")
+        return None
+
+    def health(self):
+        return [e.snapshot() for e in self.endpoints]
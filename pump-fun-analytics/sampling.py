@@ -0,0 +1,251 @@
+#!/usr/bin/env python3
+"""
+sampling.py — Stratified random block sampling for the phase 2 scan.
+
+A full day is ~216k blocks. With --sample-rate, step1_fetch_launches scans a
+random subset instead: the day's produced slots are split into hour strata
+(by nominal slot time from the first slot) and each stratum is sampled
+without replacement at the same rate. Per-block launch counts then give the
+usual stratified estimators (Cochran, ch. 5):
+
+  total    T = Σ N_h · ȳ_h            Var = Σ N_h² (1 − n_h/N_h) s_h² / n_h
+  rate     R = T_grad / T_launched    Var via linearisation, d = y_grad − R·y_launched
+
+with normal 95% intervals. Launch rates swing hard with the hour of day, so
+stratifying by hour removes most of the between-hour variance a simple random
+sample would carry.
+
+Each stratum's sample is a prefix of a seeded permutation, so raising the
+rate only scans the blocks not sampled yet: progressive refinement repeats
+scan → estimate → grow until the relative half-width on total_launched is at
+or below --target-error (only launch counts are known during the scan; the
+graduation-rate interval is reported once statuses are in).
+
+The design (stratum sizes + scanned slots) is saved to data/step1_sample.json
+so step1_enrich can recompute the estimates from refreshed statuses; a full
+(non-sampled) scan removes it.
+
+Usage:
+  python3 sampling.py       # print the estimates for data/step1_launches.json
+"""
+
+import json
+import math
+import os
+
+import numpy as np
+
+from slot_time import SLOT_SECONDS
+
+SAMPLE_FILE = "data/step1_sample.json"
+STRATUM_SECONDS = 3600
+MIN_PER_STRATUM = 2          # a stratum variance needs two blocks
+Z95 = 1.96
+# Totals estimated from per-block indicators, keyed by summary field
+TOTALS = {
+    "total_launched":  lambda t: True,
+    "total_graduated": lambda t: t.get("status") == "graduated",
+    "total_active":    lambda t: t.get("status") == "active",
+    "total_dead":      lambda t: t.get("status") == "dead",
+}
+
+
+class StratifiedSample:
+    """Hour-stratified sample of block slots, grown by prefix of a seeded permutation."""
+
+    def __init__(self, slots=None, seed=0, stratum_seconds=STRATUM_SECONDS):
+        self.seed = seed
+        self.stratum_seconds = stratum_seconds
+        self.rate = 0.0
+        self.rounds = []
+        self.missing = set()     # sampled slots whose block failed to fetch
+        self.perms = []
+        if slots is not None and len(slots):
+            slots = np.unique(np.asarray(slots, dtype=np.int64))
+            hour = ((slots - slots[0]) * SLOT_SECONDS // stratum_seconds).astype(np.int64)
+            rng = np.random.default_rng(seed)
+            self.perms = [rng.permutation(s)
+                          for s in np.split(slots, np.flatnonzero(np.diff(hour)) + 1)]
+        self.sizes = np.array([len(p) for p in self.perms], dtype=np.int64)
+        self.n = np.zeros(len(self.perms), dtype=np.int64)
+
+    @property
+    def complete(self):
+        return bool(np.all(self.n >= self.sizes))
+
+    def scanned(self):
+        """Observed slots per stratum: the sampled prefix minus failed fetches."""
+        if not self.missing:
+            return [p[:n] for p, n in zip(self.perms, self.n)]
+        missing = np.fromiter(self.missing, dtype=np.int64)
+        return [p[:n][~np.isin(p[:n], missing)] for p, n in zip(self.perms, self.n)]
+
+    def draw(self, rate):
+        """Raise every stratum to `rate`; returns the newly sampled slots, sorted."""
+        self.rate = max(self.rate, min(rate, 1.0))
+        want = np.minimum(np.maximum(np.ceil(self.rate * self.sizes).astype(np.int64),
+                                     MIN_PER_STRATUM), self.sizes)
+        new = [p[n:w] for p, n, w in zip(self.perms, self.n, want) if w > n]
+        self.n = np.maximum(self.n, want)
+        return np.sort(np.concatenate(new)).tolist() if new else []
+
+    def next_rate(self, rel_error, target_error):
+        """Rate expected to bring the relative half-width down to `target_error`."""
+        if not rel_error or not math.isfinite(rel_error):
+            return min(1.0, self.rate * 2)
+        # Half-width ∝ 1/√n (ignoring the finite-population factor, which only helps)
+        grow = max((rel_error / target_error) ** 2 * 1.1, 1.25)
+        return min(1.0, self.rate * grow)
+
+    # ── Estimators ───────────────────────────────────────────────────────────
+
+    def _units(self, tokens):
+        """Per-stratum observed block counts, and per block its stratum id and one
+        count row per TOTALS field."""
+        scanned = self.scanned()
+        n = np.array([len(s) for s in scanned], dtype=float)
+        slots = np.concatenate(scanned) if scanned else np.zeros(0, dtype=np.int64)
+        sid = np.repeat(np.arange(len(scanned)), n.astype(np.int64))
+        order = np.argsort(slots)
+        slots, sid = slots[order], sid[order]
+        y = np.zeros((len(TOTALS), len(slots)))
+        tok_slots = np.array([t["slot"] for t in tokens], dtype=np.int64)
+        idx = np.minimum(np.searchsorted(slots, tok_slots), max(len(slots) - 1, 0))
+        hit = (slots[idx] == tok_slots) if len(slots) else np.zeros(len(tokens), dtype=bool)
+        for k, pred in enumerate(TOTALS.values()):
+            flags = np.array([bool(pred(t)) for t in tokens], dtype=bool)
+            np.add.at(y[k], idx[hit & flags], 1.0)
+        return n, sid, y
+
+    def _total(self, n, sid, y):
+        N = self.sizes.astype(float)
+        s1 = np.bincount(sid, weights=y, minlength=len(n))
+        s2 = np.bincount(sid, weights=y * y, minlength=len(n))
+        mean = np.divide(s1, n, out=np.zeros_like(s1), where=n > 0)
+        var = np.divide(s2 - n * mean ** 2, n - 1, out=np.zeros_like(s1), where=n > 1)
+        fpc = np.divide(N - n, N, out=np.zeros_like(N), where=N > 0)
+        se2 = np.divide(N ** 2 * fpc * np.maximum(var, 0), n, out=np.zeros_like(s1), where=n > 0)
+        return float(np.sum(N * mean)), float(np.sqrt(se2.sum()))
+
+    def estimate(self, tokens):
+        """Population estimates with 95% intervals, keyed like the step1 summary."""
+        n, sid, y = self._units(list(tokens))
+        out = {}
+        totals = {}
+        for k, name in enumerate(TOTALS):
+            est, se = self._total(n, sid, y[k])
+            totals[name] = est
+            out[name] = _interval(est, se, lo=0.0)
+        launched, graduated = y[0], y[1]
+        if totals["total_launched"] > 0:
+            r = totals["total_graduated"] / totals["total_launched"]
+            _, se_d = self._total(n, sid, graduated - r * launched)
+            out["graduation_rate_pct"] = _interval(r * 100, se_d / totals["total_launched"] * 100,
+                                                   lo=0.0, hi=100.0)
+        return out
+
+    def describe(self):
+        return {
+            "rate": round(self.rate, 4),
+            "seed": self.seed,
+            "blocks_scanned": sum(len(s) for s in self.scanned()),
+            "blocks_total": int(self.sizes.sum()),
+            "strata": len(self.sizes),
+            "stratum_seconds": self.stratum_seconds,
+            "rounds": self.rounds,
+        }
+
+    # ── Persistence ──────────────────────────────────────────────────────────
+
+    def save(self, path=SAMPLE_FILE):
+        state = self.describe()
+        state["strata"] = [{"size": int(N), "slots": s.tolist()}
+                           for N, s in zip(self.sizes, self.scanned())]
+        tmp = path + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump(state, f)
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path=SAMPLE_FILE):
+        """The saved design (scanned slots only — enough to estimate, not to grow)."""
+        if not os.path.exists(path):
+            return None
+        with open(path) as f:
+            state = json.load(f)
+        sample = cls(seed=state["seed"], stratum_seconds=state["stratum_seconds"])
+        sample.perms = [np.asarray(s["slots"], dtype=np.int64) for s in state["strata"]]
+        sample.sizes = np.array([s["size"] for s in state["strata"]], dtype=np.int64)
+        sample.n = np.array([len(p) for p in sample.perms], dtype=np.int64)
+        sample.rate, sample.rounds = state["rate"], state["rounds"]
+        return sample
+
+
+def _interval(est, se, lo=None, hi=None):
+    low, high = est - Z95 * se, est + Z95 * se
+    if lo is not None:
+        low = max(low, lo)
+    if hi is not None:
+        high = min(high, hi)
+    return {
+        "estimate": round(est, 2),
+        "ci95": [round(low, 2), round(high, 2)],
+        "rel_error": round(Z95 * se / est, 4) if est else None,
+    }
+
+
+def clear_sample(path=SAMPLE_FILE):
+    if os.path.exists(path):
+        os.remove(path)
+
+
+# ── Summary / report helpers (shared by step1_fetch_launches and step1_enrich) ─
+
+def apply_estimates(summary, estimates, sample):
+    """Replace the summary's sample counts by population estimates (raw counts kept)."""
+    summary["sample_counts"] = {k: summary[k] for k in list(TOTALS) + ["graduation_rate_pct"]
+                                if k in summary}
+    for name, e in estimates.items():
+        summary[name] = round(e["estimate"], 2) if name.endswith("_pct") else round(e["estimate"])
+    summary["estimates"] = estimates
+    summary["sample"] = sample.describe()
+    return summary
+
+
+def report_lines(estimates, sample):
+    d = sample.describe()
+    labels = {"total_launched": "Total Launched", "total_graduated": "Graduated",
+              "total_active": "Active", "total_dead": "Dead",
+              "graduation_rate_pct": "Graduation Rate (%)"}
+    lines = [
+        "## Sampled Estimates",
+        "",
+        f"Stratified sample: {d['blocks_scanned']:,} of {d['blocks_total']:,} blocks "
+        f"({d['blocks_scanned'] / max(d['blocks_total'], 1) * 100:.1f}%) across "
+        f"{d['strata']} hourly strata, {len(d['rounds'])} round(s), seed {d['seed']}.",
+        "",
+        "| Metric | Estimate | 95% CI | ± rel |",
+        "|--------|----------|--------|-------|",
+    ]
+    for name, label in labels.items():
+        e = estimates.get(name)
+        if e is None:
+            continue
+        rel = f"{e['rel_error'] * 100:.1f}%" if e["rel_error"] is not None else "—"
+        lines.append(f"| {label} | {e['estimate']:,.2f} | "
+                     f"{e['ci95'][0]:,.2f} – {e['ci95'][1]:,.2f} | {rel} |")
+    return lines + [""]
+
+
+def main():
+    sample = StratifiedSample.load()
+    if sample is None:
+        print(f"No sample design at {SAMPLE_FILE} — the last scan was a full scan.")
+        return
+    with open("data/step1_launches.json") as f:
+        tokens = json.load(f)
+    print("\n".join(report_lines(sample.estimate(tokens), sample)))
+
+
+if __name__ == "__main__":
+    main()
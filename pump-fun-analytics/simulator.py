@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+"""
+simulator.py — Path-dependent exit simulator over post-graduation candles.
+
+Walks each token's candles in time order (the 30 1-min candles from graduation,
+then the hourly candles that follow, sliced from candle_store.py) and fires
+take-profit and stop orders as the price path reaches them. All tokens are
+stepped together: candles are packed into padded (tokens × steps) arrays and
+each step is a handful of NumPy ops, so cost grows with path length, not with
+token count.
+
+Intra-candle ordering is unknown from OHLC alone. Each candle is walked as
+open → low → high → close when stop_first=True (pessimistic, default) or
+open → high → low → close when stop_first=False. Orders crossed by a gap at
+the open fill at the open price.
+"""
+
+import numpy as np
+
+from candle_store import HOURLY_CANDLES, POST_MINUTES, open_store
+
+
+# ── Path packing ──────────────────────────────────────────────────────────────
+
+def gather(column, rows):
+    """column[rows] for first_rows() indices; the -1 padding reads row 0 (or 0 if empty)."""
+    if not len(column):
+        return np.zeros(np.shape(rows) + column.shape[1:], dtype=column.dtype)
+    return column[np.maximum(rows, 0)]
+
+
+def build_paths(price_tokens, include_hourly=True, store=None):
+    """
+    Pack per-token candles from the candle store into padded arrays.
+
+    Returns (index, entry, O, H, L, C):
+      index — positions in price_tokens that have a grad_price and candles
+      entry — entry price per packed token (grad_price)
+      O/H/L/C — float64 arrays of shape (tokens, steps), NaN-padded
+    """
+    store = store or open_store()
+    minute, hour = store["minute"], store["hour"]
+    keep = [i for i, r in enumerate(price_tokens) if r.get("grad_price") and r["grad_price"] > 0]
+    pools = [price_tokens[i].get("pair_address") for i in keep]
+    t0 = [price_tokens[i].get("graduation_time") or 0 for i in keep]
+    n = len(keep)
+
+    # (timeframe, row indices, valid mask, destination column) per part of the path
+    rows = minute.first_rows(pools, t0, POST_MINUTES)
+    ok = rows >= 0
+    length = ok.sum(axis=1)
+    parts = [(minute, rows, ok, np.cumsum(ok, axis=1) - 1)]
+    if include_hourly:
+        # Skip the hourly candles that overlap the 1-min window
+        last = rows[np.arange(n), np.maximum(length - 1, 0)]
+        after = np.where(length > 0, gather(minute.ts, last) + 60, 0)
+        hrows = hour.first_rows(pools, t0, HOURLY_CANDLES)
+        hok = (hrows >= 0) & (gather(hour.ts, hrows) >= after[:, None])
+        parts.append((hour, hrows, hok, length[:, None] + np.cumsum(hok, axis=1) - 1))
+        length = length + hok.sum(axis=1)
+
+    steps = int(length.max()) if n else 0
+    O, H, L, C = (np.full((n, steps), np.nan) for _ in range(4))
+    for tf, r, valid, col in parts:
+        i, j = np.nonzero(valid)
+        ohlc = tf.ohlcv[r[i, j], :4]
+        O[i, col[i, j]], H[i, col[i, j]], L[i, col[i, j]], C[i, col[i, j]] = ohlc.T
+
+    has = length > 0
+    entry = np.array([price_tokens[i]["grad_price"] for i in keep], dtype=np.float64)
+    return ([keep[i] for i in np.flatnonzero(has)], entry[has],
+            O[has], H[has], L[has], C[has])
+
+
+# ── Order execution ───────────────────────────────────────────────────────────
+
+def check_ladder(take_profits, tranches):
+    """Raise ValueError unless each take-profit has one tranche and the tranches sell at most 100%."""
+    if len(take_profits) != len(tranches):
+        raise ValueError(f"ladder needs one tranche per take-profit: "
+                         f"take_profits={list(take_profits)}, tranches={list(tranches)}")
+    if any(tp <= 0 for tp in take_profits):
+        raise ValueError(f"take-profit multipliers must be positive: {list(take_profits)}")
+    if any(size < 0 for size in tranches) or sum(tranches) > 1.0 + 1e-9:
+        raise ValueError(f"tranches must be non-negative and sum to at most 1: {list(tranches)}")
+
+
+def simulate_ladder(entry, O, H, L, C, take_profits=(2.0, 5.0), tranches=(0.50, 0.25),
+                    stop_loss=-0.60, stop_first=True):
+    """
+    Run a take-profit ladder plus a stop on the open position across all tokens.
+
+    take_profits — multipliers of entry; tranches — position fraction sold at each.
+    stop_loss    — fractional stop below entry applied to whatever is still held
+                   (None disables it). Anything left at the end of the path is sold
+                   at the last close.
+
+    Returns per-token return in percent.
+    """
+    check_ladder(take_profits, tranches)
+    n, steps = C.shape
+    levels = np.asarray(take_profits, dtype=np.float64)
+    sizes = np.asarray(tranches, dtype=np.float64)
+
+    tp_px = entry[:, None] * levels[None, :]
+    stop_px = entry * (1.0 + stop_loss) if stop_loss is not None else np.full(n, -np.inf)
+    filled = np.zeros((n, len(levels)), dtype=bool)
+    held = np.ones(n)
+    value = np.zeros(n)      # realised proceeds, in units of entry
+    last_close = entry.copy()
+
+    def fill_tps(hit, price):
+        nonlocal held, value
+        qty = np.where(hit, sizes[None, :], 0.0)
+        qty = np.minimum(qty, held[:, None])
+        # np.where, not qty * price: price is NaN on the padded steps of shorter paths
+        value += np.where(hit, qty * price / entry[:, None], 0.0).sum(axis=1)
+        held -= qty.sum(axis=1)
+        filled[hit] = True
+
+    def fill_stop(hit, price):
+        nonlocal held, value
+        value += np.where(hit, held * price / entry, 0.0)
+        held = np.where(hit, 0.0, held)
+
+    for t in range(steps):
+        o, h, l, c = O[:, t], H[:, t], L[:, t], C[:, t]
+        live = ~np.isnan(c) & (held > 0)
+        last_close = np.where(np.isnan(c), last_close, c)
+
+        # Gap through take-profits at the open
+        gap = live[:, None] & ~filled & (tp_px <= o[:, None])
+        fill_tps(gap, np.broadcast_to(o[:, None], tp_px.shape))
+
+        stop_hit = live & (held > 0) & (l <= stop_px)
+        if stop_first:
+            fill_stop(stop_hit, np.minimum(stop_px, o))
+            tp_hit = live[:, None] & ~filled & (h[:, None] >= tp_px) & (held > 0)[:, None]
+            fill_tps(tp_hit, tp_px)
+        else:
+            tp_hit = live[:, None] & ~filled & (h[:, None] >= tp_px)
+            fill_tps(tp_hit, tp_px)
+            fill_stop(stop_hit & (held > 0), np.minimum(stop_px, o))
+
+    value += held * last_close / entry
+    return (value - 1.0) * 100.0
+
+
+def simulate_ladder_returns(price_tokens, take_profits=(2.0, 5.0), tranches=(0.50, 0.25),
+                            stop_loss=-0.60, stop_first=True, include_hourly=True, store=None):
+    """Convenience wrapper: pack price_tokens, simulate, return a list of returns (%)."""
+    _, entry, O, H, L, C = build_paths(price_tokens, include_hourly=include_hourly, store=store)
+    if not len(entry):
+        return []
+    returns = simulate_ladder(entry, O, H, L, C, take_profits, tranches, stop_loss, stop_first)
+    return returns.tolist()
@@ -0,0 +1,243 @@
+#!/usr/bin/env python3
+"""
+sketches.py — Mergeable per-day summaries (t-digest quantiles + counters).
+
+Each pipeline run persists one small JSON summary per launch day it covered:
+
+  data/sketches/<stage>/<YYYY-MM-DD>.json
+    {"stage": ..., "day": ..., "counters": {name: int},
+     "sketches": {name: <TDigest dict>}}
+
+Counters merge by addition, digests by centroid merge, so a range query over
+months of days only reads the summaries — never the raw per-token JSON.
+
+Usage:
+  python3 sketches.py step3 2026-01-01 2026-01-31   # merged summary for a range
+"""
+
+import json
+import math
+import os
+import sys
+from datetime import date, datetime, timedelta, timezone
+
+SKETCH_DIR = "data/sketches"
+DEFAULT_COMPRESSION = 100
+
+
+# ── t-digest ──────────────────────────────────────────────────────────────────
+
+class TDigest:
+    """
+    Merging t-digest (Dunning & Ertl) with the k1 arcsine scale function.
+
+    Keeps at most ~compression centroids; small inputs stay exact because each
+    value remains its own centroid. Sum and count are exact, so the mean is too.
+    """
+
+    def __init__(self, compression=DEFAULT_COMPRESSION):
+        self.compression = compression
+        self.centroids = []     # sorted [mean, weight] pairs
+        self._buffer = []
+        self.count = 0.0
+        self.total = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def add(self, x, w=1.0):
+        x = float(x)
+        self._buffer.append([x, w])
+        self.count += w
+        self.total += x * w
+        self.min = min(self.min, x)
+        self.max = max(self.max, x)
+        if len(self._buffer) >= self.compression * 5:
+            self._compress()
+
+    def update(self, values):
+        for v in values:
+            self.add(v)
+        return self
+
+    def merge(self, other):
+        other._compress()
+        self._buffer.extend([m, w] for m, w in other.centroids)
+        self.count += other.count
+        self.total += other.total
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        self._compress()
+        return self
+
+    def _q_limit(self, q0):
+        k = self.compression / (2 * math.pi) * math.asin(2 * q0 - 1) + 1
+        if k >= self.compression / 4:
+            return 1.0
+        return (math.sin(k * 2 * math.pi / self.compression) + 1) / 2
+
+    def _compress(self):
+        if not self._buffer:
+            return
+        items = sorted(self.centroids + self._buffer)
+        self._buffer = []
+        total_w = sum(w for _, w in items)
+
+        merged = []
+        cur_mean, cur_w = items[0]
+        w_so_far = 0.0
+        q_limit = self._q_limit(0.0)
+        for mean, w in items[1:]:
+            if (w_so_far + cur_w + w) / total_w <= q_limit:
+                cur_w += w
+                cur_mean += (mean - cur_mean) * w / cur_w
+            else:
+                merged.append([cur_mean, cur_w])
+                w_so_far += cur_w
+                q_limit = self._q_limit(w_so_far / total_w)
+                cur_mean, cur_w = mean, w
+        merged.append([cur_mean, cur_w])
+        self.centroids = merged
+
+    def quantile(self, q):
+        """Estimated q-quantile (0 ≤ q ≤ 1), or None if empty."""
+        self._compress()
+        if not self.centroids:
+            return None
+        if len(self.centroids) == 1:
+            return self.centroids[0][0]
+
+        target = q * self.count
+        first_mean, first_w = self.centroids[0]
+        if target < first_w / 2:
+            if first_w <= 1:
+                return first_mean
+            return self.min + (first_mean - self.min) * target / (first_w / 2)
+
+        cum = 0.0
+        for (m0, w0), (m1, w1) in zip(self.centroids, self.centroids[1:]):
+            mid0 = cum + w0 / 2
+            mid1 = cum + w0 + w1 / 2
+            if target <= mid1:
+                return m0 + (m1 - m0) * (target - mid0) / (mid1 - mid0)
+            cum += w0
+
+        last_mean, last_w = self.centroids[-1]
+        if last_w <= 1:
+            return last_mean
+        tail = (target - (self.count - last_w / 2)) / (last_w / 2)
+        return last_mean + (self.max - last_mean) * min(tail, 1.0)
+
+    def median(self):
+        return self.quantile(0.5)
+
+    def mean(self):
+        return self.total / self.count if self.count else None
+
+    def to_dict(self):
+        self._compress()
+        return {
+            "compression": self.compression,
+            "centroids": self.centroids,
+            "count": self.count,
+            "total": self.total,
+            "min": self.min if self.count else None,
+            "max": self.max if self.count else None,
+        }
+
+    @classmethod
+    def from_dict(cls, d):
+        td = cls(d.get("compression", DEFAULT_COMPRESSION))
+        td.centroids = [list(c) for c in d.get("centroids", [])]
+        td.count = d.get("count", 0.0)
+        td.total = d.get("total", 0.0)
+        if td.count:
+            td.min, td.max = d["min"], d["max"]
+        return td
+
+
+# ── Per-day summaries ─────────────────────────────────────────────────────────
+
+def day_key(ts):
+    """UTC calendar day (YYYY-MM-DD) for a unix timestamp."""
+    return datetime.fromtimestamp(ts, timezone.utc).strftime("%Y-%m-%d")
+
+
+def group_by_day(items, ts_of):
+    """{day: [items]} by day_key(ts_of(item)); items without a timestamp are left out."""
+    days = {}
+    for item in items:
+        ts = ts_of(item)
+        if ts:
+            days.setdefault(day_key(ts), []).append(item)
+    return days
+
+
+def summary_path(stage, day):
+    return os.path.join(SKETCH_DIR, stage, f"{day}.json")
+
+
+def save_day_summary(stage, day, counters, sketches):
+    """Persist one stage's counters and TDigest sketches for a day."""
+    path = summary_path(stage, day)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w") as f:
+        json.dump({
+            "stage": stage,
+            "day": day,
+            "counters": counters,
+            "sketches": {name: td.to_dict() for name, td in sketches.items()},
+        }, f)
+    return path
+
+
+def merge_summaries(summaries):
+    """Merge a sequence of loaded day summaries into (counters, sketches, days)."""
+    counters, sketches, days = {}, {}, []
+    for s in summaries:
+        days.append(s["day"])
+        for name, v in s.get("counters", {}).items():
+            counters[name] = counters.get(name, 0) + v
+        for name, d in s.get("sketches", {}).items():
+            td = TDigest.from_dict(d)
+            if name in sketches:
+                sketches[name].merge(td)
+            else:
+                sketches[name] = td
+    return counters, sketches, days
+
+
+def load_range(stage, start_day, end_day):
+    """Merge every persisted summary for stage with start_day ≤ day ≤ end_day (inclusive)."""
+    start = date.fromisoformat(start_day)
+    end = date.fromisoformat(end_day)
+    summaries = []
+    d = start
+    while d <= end:
+        path = summary_path(stage, d.isoformat())
+        if os.path.exists(path):
+            with open(path) as f:
+                summaries.append(json.load(f))
+        d += timedelta(days=1)
+    return merge_summaries(summaries)
+
+
+def main():
+    if len(sys.argv) != 4:
+        print(__doc__)
+        sys.exit(1)
+    stage, start_day, end_day = sys.argv[1:4]
+    counters, sketches, days = load_range(stage, start_day, end_day)
+    print(f"{stage}: {len(days)} day(s) merged ({start_day} → {end_day})")
+    for name, v in sorted(counters.items()):
+        print(f"  {name}: {v:,}")
+    for name, td in sorted(sketches.items()):
+        if not td.count:
+            continue
+        print(
+            f"  {name}: n={td.count:,.0f} mean={td.mean():.4f} "
+            f"p10={td.quantile(0.1):.4f} median={td.median():.4f} p90={td.quantile(0.9):.4f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
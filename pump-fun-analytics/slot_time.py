@@ -0,0 +1,218 @@
+#!/usr/bin/env python3
+"""
+slot_time.py — Resolve Solana slots ↔ unix time via getBlockTime binary search.
+
+Every getBlockTime answer is cached in data/slot_time_index.json, so repeated
+range resolutions (and neighbouring days) mostly hit the cache.
+
+Only real RPC answers are cached. With an empty cache the search starts from
+config's hand-estimated Jan 20 anchor, which is a bracket hint only and never
+written to the index. Searches never probe past the chain head (getSlot, once
+per resolution): a day that is not over yet ends at the head slot.
+
+Skipped slots have no block time; a lookup on one falls forward to the next
+produced block via getBlocksWithLimit. estimate_times() answers offline from
+the cache alone, for tokens that lack a block_time.
+
+Usage:
+  python3 slot_time.py 2026-01-20 2026-01-22   # print per-day slot shards
+"""
+
+import json
+import os
+import sys
+import threading
+import time
+from datetime import date, datetime, timedelta, timezone
+
+import numpy as np
+
+from config import JAN20_START_SLOT, JAN20_START_TS, rpc_call
+
+INDEX_FILE = "data/slot_time_index.json"
+SLOT_SECONDS = 0.4          # nominal slot time, used only to seed the search bracket
+# Starting guess for an empty cache; never persisted
+HINT = (JAN20_START_SLOT, JAN20_START_TS)
+
+_index = None
+_index_lock = threading.Lock()
+
+
+# ── Cache ─────────────────────────────────────────────────────────────────────
+
+def _load_index():
+    global _index
+    if _index is None:
+        _index = {}
+        if os.path.exists(INDEX_FILE):
+            try:
+                with open(INDEX_FILE) as f:
+                    _index.update({int(k): v for k, v in json.load(f).items()})
+            except Exception:
+                pass
+    return _index
+
+
+def save_index():
+    with _index_lock:
+        index = _load_index()
+        os.makedirs(os.path.dirname(INDEX_FILE), exist_ok=True)
+        with open(INDEX_FILE, "w") as f:
+            json.dump({str(k): v for k, v in sorted(index.items())}, f)
+
+
+# ── Lookups ───────────────────────────────────────────────────────────────────
+
+def block_time(slot):
+    """
+    Unix time of `slot`, or of the first produced block after it if skipped.
+    Returns None if the RPC cannot answer.
+    """
+    with _index_lock:
+        index = _load_index()
+        if slot in index:
+            return index[slot]
+
+    ts = rpc_call("getBlockTime", [slot])
+    if ts is None:
+        nxt = rpc_call("getBlocksWithLimit", [slot, 1])
+        if nxt:
+            ts = rpc_call("getBlockTime", [nxt[0]])
+
+    if ts is not None:
+        with _index_lock:
+            _index[slot] = ts
+    return ts
+
+
+def head_slot():
+    """Current confirmed slot; raises RuntimeError if the RPC cannot answer."""
+    head = rpc_call("getSlot", [{"commitment": "confirmed"}])
+    if head is None:
+        raise RuntimeError("getSlot failed")
+    return head
+
+
+def slot_for_time(ts, head):
+    """
+    First slot whose block time is >= ts, or head + 1 if the head is still before ts.
+
+    Seeds a bracket from the nearest cached answer (HINT when the cache is
+    empty) at SLOT_SECONDS per slot, widens it until it straddles ts without
+    going past `head`, then binary searches on getBlockTime.
+    """
+    head_ts = block_time(head)
+    if head_ts is not None and head_ts < ts:
+        return head + 1
+    with _index_lock:
+        anchors = list(_load_index().items()) or [HINT]
+    anchor_slot, anchor_ts = min(anchors, key=lambda kv: abs(kv[1] - ts))
+
+    guess = min(anchor_slot + int((ts - anchor_ts) / SLOT_SECONDS), head)
+    step = 2_000
+    lo, hi = guess - step, min(guess + step, head)
+
+    while (t := block_time(lo)) is not None and t >= ts:
+        lo -= step
+        step *= 2
+    step = 2_000
+    while hi < head and (t := block_time(hi)) is not None and t < ts:
+        hi = min(hi + step, head)
+        step *= 2
+
+    while lo + 1 < hi:
+        mid = (lo + hi) // 2
+        t = block_time(mid)
+        if t is None:
+            raise RuntimeError(f"getBlockTime failed for slot {mid}")
+        if t >= ts:
+            hi = mid
+        else:
+            lo = mid
+    return hi
+
+
+def estimate_times(slots):
+    """
+    Unix times for slots without any RPC: linear between the nearest cached
+    answers, SLOT_SECONDS per slot beyond the first / last one.
+    """
+    with _index_lock:
+        known = np.array(sorted(_load_index().items()) or [HINT], dtype=np.float64)
+    s = np.asarray(slots, dtype=np.float64)
+    t = np.interp(s, known[:, 0], known[:, 1])
+    t = np.where(s < known[0, 0], known[0, 1] + (s - known[0, 0]) * SLOT_SECONDS, t)
+    t = np.where(s > known[-1, 0], known[-1, 1] + (s - known[-1, 0]) * SLOT_SECONDS, t)
+    return t.astype(np.int64)
+
+
+def day_label(timestamps):
+    """Report label for the UTC days spanned: "Jan 20, 2026" or "2026-01-20 → 2026-01-26"."""
+    days = sorted({datetime.fromtimestamp(ts, timezone.utc).date() for ts in timestamps if ts})
+    if not days:
+        return "unknown dates"
+    if days[0] == days[-1]:
+        return f"{days[0]:%b} {days[0].day}, {days[0].year}"
+    return f"{days[0].isoformat()} → {days[-1].isoformat()}"
+
+
+def day_bounds(day):
+    """(start_ts, end_ts) of a UTC calendar day, end exclusive."""
+    start = int(datetime(day.year, day.month, day.day, tzinfo=timezone.utc).timestamp())
+    return start, start + 86400
+
+
+def resolve_day_shards(start_day, end_day):
+    """
+    Split [start_day, end_day] (inclusive, YYYY-MM-DD) into per-day shards.
+
+    Returns a list of {"day", "start_ts", "end_ts", "start_slot", "end_slot"}
+    with end_slot inclusive. Adjacent shards share boundaries, so nothing is
+    scanned twice or skipped. Days after today (UTC) are dropped, and today's
+    shard ends at the current head slot.
+    """
+    first = date.fromisoformat(start_day)
+    last = date.fromisoformat(end_day)
+    if last < first:
+        raise ValueError(f"--to {end_day} is before --from {start_day}")
+    today = datetime.fromtimestamp(time.time(), timezone.utc).date()
+    if first > today:
+        raise ValueError(f"--from {start_day} is in the future")
+    last = min(last, today)
+
+    days = []
+    d = first
+    while d <= last:
+        days.append(d)
+        d += timedelta(days=1)
+
+    head = head_slot()
+    boundaries = [slot_for_time(day_bounds(d)[0], head) for d in days]
+    boundaries.append(slot_for_time(day_bounds(last)[1], head))
+    save_index()
+
+    return [
+        {
+            "day": d.isoformat(),
+            "start_ts": day_bounds(d)[0],
+            "end_ts": day_bounds(d)[1],
+            "start_slot": boundaries[i],
+            "end_slot": boundaries[i + 1] - 1,
+        }
+        for i, d in enumerate(days)
+    ]
+
+
+def main():
+    if len(sys.argv) != 3:
+        print(__doc__)
+        sys.exit(1)
+    for shard in resolve_day_shards(sys.argv[1], sys.argv[2]):
+        print(
+            f"{shard['day']}: slots {shard['start_slot']}–{shard['end_slot']} "
+            f"({shard['end_slot'] - shard['start_slot'] + 1:,} slots)"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -7,8 +7,27 @@ Uses on-chain bonding curve PDA check for accurate graduation detection:
   - account closed (None) → graduated (bonding curve burned on migration)
   - real_sol_reserves / 85 SOL → grad_pct for non-graduated tokens
 
+Incremental by default: each token records enriched_at, and only stale tokens
+are refreshed —
+  - dead / closed PDA: never re-checked (reserves do not come back)
+  - active: re-enriched once older than --active-ttl seconds
+  - graduated: only missing price fields (DexScreener pair, OHLCV) are fetched
+  - never enriched or errored: full enrichment (a failed token keeps its
+    previous record plus enrich_error, cleared by the next success)
+Hourly OHLCV goes to the candle store (data/candles/hour, candle_store.py);
+the token record keeps only hourly_candles, the number fetched.
+Each finished token is appended to data/enrich_journal.jsonl, so an interrupted
+run resumes where it stopped (--full included); the journal is cleared after a
+successful save.
+
+--snapshot refreshes every open curve from one getProgramAccounts call first
+(saved columnar to data/curve_snapshot.npz), so only curves that vanished
+since the last run and graduated tokens missing prices need point reads.
+
 Usage:
-  python3 step1_enrich.py              # enrich all 19,765 tokens
+  python3 step1_enrich.py              # refresh stale tokens only
+  python3 step1_enrich.py --snapshot   # program-wide curve snapshot, then stale only
+  python3 step1_enrich.py --full       # re-enrich all 19,765 tokens
   python3 step1_enrich.py --smoke-test # process first 20 tokens only
 """
 
@@ -25,26 +44,42 @@ from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime, timezone
 
 import base58
+import numpy as np
 
 from config import (
+    ALCHEMY_CONCURRENCY,
+    DEX_CONCURRENCY,
     DEXSCREENER_BASE,
+    GECKO_CONCURRENCY,
     GECKOTERMINAL_BASE,
+    CU_SCHEDULER,
     PUMP_PROGRAM,
     http_get,
     rpc_call,
 )
+from candle_store import open_store
+from creator_index import INDEX_DIR as CREATOR_INDEX_DIR, CreatorIndex
+from metrics import METRICS
+from profiling import profile_run
+from sampling import StratifiedSample, apply_estimates
+from sampling import report_lines as sample_report_lines
+from slot_time import day_label
 
 os.makedirs("data", exist_ok=True)
 os.makedirs("output", exist_ok=True)
 
 # ── Rate-limit semaphores ──────────────────────────────────────────────────────
-ALCHEMY_SEM = threading.Semaphore(50)
-DEX_SEM = threading.Semaphore(5)
-GECKO_SEM = threading.Semaphore(3)
+ALCHEMY_SEM = threading.Semaphore(ALCHEMY_CONCURRENCY)
+DEX_SEM = threading.Semaphore(DEX_CONCURRENCY)
+GECKO_SEM = threading.Semaphore(GECKO_CONCURRENCY)
 
 # pump.fun graduation threshold: 85 SOL in lamports
 GRADUATION_SOL_LAMPORTS = 85_000_000_000
 
+JOURNAL_PATH = "data/enrich_journal.jsonl"
+ACTIVE_TTL = int(os.environ.get("ENRICH_ACTIVE_TTL", "300"))   # seconds
+PRICE_FIELDS = ("pair_address", "market_cap_usd", "hourly_candles")
+
 
 # ── PDA derivation (pure Python) ───────────────────────────────────────────────
 
@@ -103,7 +138,11 @@ def get_bonding_curve_info(mint_str: str) -> dict:
             pda,
             {"encoding": "base64", "commitment": "confirmed"},
         ])
+    return parse_bonding_curve(pda, result)
+
 
+def parse_bonding_curve(pda: str, result: dict) -> dict:
+    """Decode a getAccountInfo result for a bonding curve PDA (layout above)."""
     # value=None → account closed. Could be graduation OR dead/reclaimed.
     # Do NOT assume graduated — 74% of dead Jan 20 tokens also have closed PDAs.
     # Graduation will be confirmed separately via DexScreener Raydium pair check.
@@ -152,6 +191,125 @@ def get_bonding_curve_info(mint_str: str) -> dict:
     }
 
 
+# ── Program-wide curve snapshot ────────────────────────────────────────────────
+#
+# One getProgramAccounts(PUMP_PROGRAM) call returns every open bonding curve,
+# filtered server-side to the curve layout and sliced to bytes 8–48 (the five
+# reserves + complete), instead of one getAccountInfo per mint.
+
+BONDING_CURVE_DISCRIMINATOR = bytes.fromhex("17b7f83760d8ac60")
+BONDING_CURVE_SIZE = 81          # dataSize filter; 0 = match on the discriminator only
+CURVE_RENT_LAMPORTS = (128 + BONDING_CURVE_SIZE) * 6960    # rent-exempt minimum, not reserves
+SNAPSHOT_SLICE = {"offset": 8, "length": 41}
+SNAPSHOT_PATH = "data/curve_snapshot.npz"
+SNAPSHOT_DTYPE = np.dtype([
+    ("virtual_token_reserves", "<u8"), ("virtual_sol_reserves", "<u8"),
+    ("real_token_reserves", "<u8"), ("real_sol_reserves", "<u8"),
+    ("token_total_supply", "<u8"), ("complete", "u1"),
+])
+
+
+class CurveSnapshot:
+    """Columnar table of open bonding curves: one numpy array per field, rows keyed by PDA."""
+
+    def __init__(self, pda, columns, fetched_at):
+        self.pda = pda
+        self.columns = columns
+        self.fetched_at = fetched_at
+        self.row = {p: i for i, p in enumerate(pda.tolist())}
+
+    def __len__(self):
+        return len(self.pda)
+
+    def __getitem__(self, name):
+        return self.columns[name]
+
+    def grad_pct(self):
+        pct = np.minimum(self["real_sol_reserves"] / GRADUATION_SOL_LAMPORTS * 100.0, 100.0)
+        return np.where(self["complete"].astype(bool), 100.0, pct)
+
+    @classmethod
+    def from_accounts(cls, accounts, fetched_at=None):
+        """Parse getProgramAccounts results (base64, sliced by SNAPSHOT_SLICE)."""
+        pdas, raw = [], []
+        for acc in accounts:
+            data = base64.b64decode(acc["account"]["data"][0])
+            if len(data) != SNAPSHOT_DTYPE.itemsize:
+                METRICS.inc("curve_snapshot_skipped_total")
+                continue
+            pdas.append(acc["pubkey"])
+            raw.append(data)
+        rows = np.frombuffer(b"".join(raw), dtype=SNAPSHOT_DTYPE)
+        columns = {name: rows[name].copy() for name in SNAPSHOT_DTYPE.names}
+        return cls(np.array(pdas, dtype=str), columns, fetched_at or int(time.time()))
+
+    def save(self, path=SNAPSHOT_PATH):
+        with METRICS.timed_op("json_write"):
+            np.savez_compressed(path, pda=self.pda, fetched_at=self.fetched_at, **self.columns)
+
+    @classmethod
+    def load(cls, path=SNAPSHOT_PATH):
+        with np.load(path) as f:
+            return cls(f["pda"], {name: f[name] for name in SNAPSHOT_DTYPE.names},
+                       int(f["fetched_at"]))
+
+
+@METRICS.timed_phase("curve_snapshot")
+def fetch_curve_snapshot(data_size: int = BONDING_CURVE_SIZE) -> CurveSnapshot:
+    """Every open bonding curve in one getProgramAccounts call."""
+    filters = [{"memcmp": {"offset": 0, "encoding": "base58",
+                           "bytes": base58.b58encode(BONDING_CURVE_DISCRIMINATOR).decode()}}]
+    if data_size:
+        filters.insert(0, {"dataSize": data_size})
+    result = rpc_call("getProgramAccounts", [PUMP_PROGRAM, {
+        "encoding": "base64", "commitment": "confirmed",
+        "filters": filters, "dataSlice": SNAPSHOT_SLICE,
+    }])
+    if result is None:
+        raise RuntimeError("getProgramAccounts failed — RPC may not allow program scans")
+    return CurveSnapshot.from_accounts(result)
+
+
+def apply_snapshot(tokens: list, snap: CurveSnapshot) -> dict:
+    """
+    Join the snapshot to tokens by derived PDA and refresh their on-chain fields.
+
+    A token whose curve is missing from the snapshot (closed since, or another
+    account size) loses enriched_at, so the incremental pass re-enriches it
+    with a point read + DexScreener — that is where graduation is confirmed.
+    """
+    pct = snap.grad_pct()
+    real_sol = snap["real_sol_reserves"]
+    virtual_sol = snap["virtual_sol_reserves"]
+    complete = snap["complete"]
+    counts = {"matched": 0, "vanished": 0}
+    for tok in tokens:
+        if tok.get("status") == "graduated" or tok.get("account_closed"):
+            continue
+        pda = tok.get("bonding_curve_pda") or derive_bonding_curve_pda(tok["mint"])
+        i = snap.row.get(pda)
+        if i is None:
+            if tok.get("enriched_at"):
+                tok.pop("enriched_at")
+                counts["vanished"] += 1
+            continue
+        grad_pct = round(float(pct[i]), 2)
+        graduated = bool(complete[i])
+        tok.update({
+            "graduated":            graduated,
+            "complete":             graduated,
+            "grad_pct":             grad_pct,
+            "real_sol_reserves":    int(real_sol[i]),
+            "virtual_sol_reserves": int(virtual_sol[i]),
+            "bonding_curve_pda":    pda,
+            "account_closed":       False,
+            "status":               "graduated" if graduated else "active" if grad_pct >= 5 else "dead",
+            "enriched_at":          snap.fetched_at,
+        })
+        counts["matched"] += 1
+    return counts
+
+
 # ── DexScreener ────────────────────────────────────────────────────────────────
 
 def fetch_dexscreener(mint: str) -> dict:
@@ -207,6 +365,12 @@ def fetch_gecko_ohlcv(pool_address: str, block_time: int) -> list:
         return []
 
 
+def store_hourly(pool_address: str, candles: list) -> int:
+    """Append fetched hourly candles to the candle store; returns how many were fetched."""
+    open_store()["hour"].append(pool_address, candles)
+    return len(candles)
+
+
 # ── Per-token enrichment ───────────────────────────────────────────────────────
 
 def enrich_token(tok: dict) -> dict:
@@ -245,10 +409,10 @@ def enrich_token(tok: dict) -> dict:
         graduated = True
         grad_pct  = 100.0
 
-    # Step 3: GeckoTerminal OHLCV (graduated + has Raydium pair)
-    hourly_prices_24h = []
+    # Step 3: GeckoTerminal OHLCV (graduated + has Raydium pair) → candle store
+    hourly_candles = 0
     if graduated and pair_address:
-        hourly_prices_24h = fetch_gecko_ohlcv(pair_address, block_time)
+        hourly_candles = store_hourly(pair_address, fetch_gecko_ohlcv(pair_address, block_time))
 
     # Determine status
     if graduated:
@@ -266,6 +430,7 @@ def enrich_token(tok: dict) -> dict:
         "real_sol_reserves":    bc.get("real_sol_reserves", 0),
         "virtual_sol_reserves": bc.get("virtual_sol_reserves", 0),
         "bonding_curve_pda":    bc.get("pda"),
+        "account_closed":       bc.get("account_closed", False),
         "pair_address":         pair_address,
         "market_cap_usd":       market_cap_usd,
         "fdv":                  fdv,
@@ -273,20 +438,82 @@ def enrich_token(tok: dict) -> dict:
         "price_usd":            price_usd,
         "pair_created_at":      pair_created_at,
         "status":               status,
-        "hourly_prices_24h":    hourly_prices_24h,
+        "hourly_candles":       hourly_candles,
+        "enriched_at":          int(time.time()),
     })
+    result.pop("enrich_error", None)
+    return result
+
+
+def refresh_prices(tok: dict) -> dict:
+    """Graduated token: fetch only the price fields that are still missing."""
+    result = dict(tok)
+    if not tok.get("pair_address") or not tok.get("market_cap_usd"):
+        dx = fetch_dexscreener(tok["mint"])
+        for key in ("pair_address", "market_cap_usd", "fdv", "liquidity_usd", "price_usd",
+                    "pair_created_at"):
+            if dx.get(key):
+                result[key] = dx[key]
+    if result.get("pair_address") and not result.get("hourly_candles"):
+        result["hourly_candles"] = store_hourly(
+            result["pair_address"],
+            fetch_gecko_ohlcv(result["pair_address"], tok.get("block_time") or 0))
+    result["enriched_at"] = int(time.time())
+    result.pop("enrich_error", None)
     return result
 
 
+# ── Staleness policy & journal ─────────────────────────────────────────────────
+
+def refresh_kind(tok: dict, now: float, active_ttl: int = ACTIVE_TTL):
+    """'full', 'prices' or None (still fresh) for one token record."""
+    enriched_at = tok.get("enriched_at")
+    if not enriched_at or tok.get("enrich_error"):
+        return "full"
+    status = tok.get("status")
+    if status == "graduated":
+        return "prices" if any(not tok.get(f) for f in PRICE_FIELDS) else None
+    if status == "active":
+        return "full" if now - enriched_at >= active_ttl else None
+    return None   # dead / closed
+
+
+def apply_journal(tokens: list, path: str = JOURNAL_PATH) -> set:
+    """Overlay results journaled by an interrupted run; returns the mints applied."""
+    if not os.path.exists(path):
+        return set()
+    by_mint = {}
+    with open(path) as f:
+        for line in f:
+            try:
+                rec = json.loads(line)
+            except ValueError:
+                continue   # torn last line from a crash
+            by_mint[rec["mint"]] = rec
+    applied = set()
+    for i, tok in enumerate(tokens):
+        rec = by_mint.get(tok["mint"])
+        if rec is not None:
+            tokens[i] = rec
+            applied.add(tok["mint"])
+    return applied
+
+
 # ── Concurrent orchestration ───────────────────────────────────────────────────
 
-def enrich_all(tokens: list, smoke_test: bool = False) -> list:
+@METRICS.timed_phase("enrich_all")
+def enrich_all(tokens: list, smoke_test: bool = False, kinds: list = None,
+               journal=None) -> list:
     """
     Concurrently enrich tokens using ThreadPoolExecutor.
     Semaphores cap each external service independently.
+
+    kinds[i] = "prices" refreshes only missing price fields of tokens[i]
+    (default: full enrichment). Each result is appended to journal if given.
     """
     if smoke_test:
         tokens = tokens[:20]
+    kinds = kinds or ["full"] * len(tokens)
 
     total    = len(tokens)
     results  = [None] * total
@@ -299,9 +526,9 @@ def enrich_all(tokens: list, smoke_test: bool = False) -> list:
         f"(Alchemy×50 | DexScreener×5 | GeckoTerminal×3) ..."
     )
 
-    with ThreadPoolExecutor(max_workers=50) as executor:
+    with ThreadPoolExecutor(max_workers=ALCHEMY_CONCURRENCY) as executor:
         future_to_idx = {
-            executor.submit(enrich_token, tok): i
+            executor.submit(refresh_prices if kinds[i] == "prices" else enrich_token, tok): i
             for i, tok in enumerate(tokens)
         }
 
@@ -310,21 +537,22 @@ def enrich_all(tokens: list, smoke_test: bool = False) -> list:
             try:
                 enriched = future.result()
             except Exception as e:
+                # Keep what we knew; the error makes the next run retry it in full
                 enriched = dict(tokens[idx])
-                enriched.update({
-                    "enrich_error": str(e),
-                    "graduated": False,
-                    "status": "dead",
-                    "grad_pct": 0.0,
-                })
+                enriched["enrich_error"] = str(e)
             results[idx] = enriched
+            if journal is not None:
+                journal.write(json.dumps(enriched) + "\n")
+                journal.flush()
 
+            METRICS.add_items("enrich_all")
             with lock:
                 counters["completed"] += 1
                 if enriched.get("graduated"):
                     counters["graduated"] += 1
                 done = counters["completed"]
                 grad = counters["graduated"]
+                METRICS.set_gauge("queue_depth", total - done, queue="enrich_pending")
                 rate = grad / done * 100 if done else 0.0
 
             if smoke_test:
@@ -350,7 +578,8 @@ def enrich_all(tokens: list, smoke_test: bool = False) -> list:
 
 # ── Save results and generate report ──────────────────────────────────────────
 
-def save_results(tokens: list):
+@METRICS.timed_phase("save_results")
+def save_results(tokens: list, refresh_counts: dict = None):
     total_launched  = len(tokens)
     total_graduated = sum(1 for t in tokens if t.get("status") == "graduated")
     total_active    = sum(1 for t in tokens if t.get("status") == "active")
@@ -359,8 +588,11 @@ def save_results(tokens: list):
 
     # Overwrite step1_launches.json
     with open("data/step1_launches.json", "w") as f:
-        json.dump(tokens, f, indent=2)
+        with METRICS.timed_op("json_write"):
+            json.dump(tokens, f, indent=2)
     print(f"\nSaved {len(tokens)} tokens → data/step1_launches.json")
+    rewritten = CreatorIndex().update(tokens)
+    print(f"Updated creator index ({rewritten} partitions rewritten) → {CREATOR_INDEX_DIR}/")
 
     # Summary
     summary = {
@@ -371,9 +603,16 @@ def save_results(tokens: list):
         "graduation_rate_pct": round(grad_rate, 2),
         "method":              "on_chain_bonding_curve_pda",
         "enriched_at":         int(time.time()),
+        "refreshed":           refresh_counts,
     }
+    # Launches from a sampled scan: re-estimate from the refreshed statuses
+    sample = StratifiedSample.load()
+    estimates = sample.estimate(tokens) if sample is not None else None
+    if sample is not None:
+        apply_estimates(summary, estimates, sample)
     with open("data/step1_summary.json", "w") as f:
-        json.dump(summary, f, indent=2)
+        with METRICS.timed_op("json_write"):
+            json.dump(summary, f, indent=2)
     print("Saved summary → data/step1_summary.json")
 
     # Report
@@ -384,9 +623,10 @@ def save_results(tokens: list):
     )[:20]
 
     lines = [
-        "# Step 1 Enriched Report — pump.fun CreateV2 Launches on Jan 20, 2026",
+        f"# Step 1 Enriched Report — pump.fun CreateV2 Launches on "
+        f"{day_label(t.get('block_time') for t in tokens)}",
         "",
-        "## Summary Statistics",
+        "## Summary Statistics" + (" (sampled blocks only)" if sample is not None else ""),
         "",
         "| Metric | Value |",
         "|--------|-------|",
@@ -396,6 +636,10 @@ def save_results(tokens: list):
         f"| Dead | {total_dead:,} |",
         f"| Graduation Rate | {grad_rate:.2f}% |",
         "",
+    ]
+    if sample is not None:
+        lines += sample_report_lines(estimates, sample)
+    lines += [
         "## Top 20 Graduated Tokens (by market cap)",
         "",
         "| Mint | Market Cap | grad_pct | Slot |",
@@ -436,8 +680,34 @@ def main():
         "--smoke-test", action="store_true",
         help="Process first 20 tokens only and print per-token results (no file writes)",
     )
+    parser.add_argument(
+        "--full", action="store_true",
+        help="Re-enrich every token, ignoring enriched_at and the staleness policy",
+    )
+    parser.add_argument(
+        "--snapshot", action="store_true",
+        help="Refresh open curves from one getProgramAccounts snapshot before the incremental pass",
+    )
+    parser.add_argument(
+        "--data-size", type=int, default=BONDING_CURVE_SIZE,
+        help="Snapshot dataSize filter in bytes; 0 matches on the discriminator only "
+             "(default: %(default)s)",
+    )
+    parser.add_argument(
+        "--active-ttl", type=int, default=ACTIVE_TTL,
+        help="Seconds before an active token is re-enriched (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--profile", action="store_true",
+        help="Write per-phase wall/CPU/net-wait, cProfile and tracemalloc reports to output/profile/",
+    )
     args = parser.parse_args()
 
+    with profile_run("step1_enrich", args.profile):
+        run(args)
+
+
+def run(args):
     print("=" * 60)
     print("step1_enrich.py — Concurrent pump.fun token enrichment")
     print("Graduation method: on-chain bonding curve PDA (complete bit)")
@@ -448,7 +718,7 @@ def main():
         print(f"ERROR: {launches_path} not found. Run step1_fetch_launches.py first.")
         sys.exit(1)
 
-    with open(launches_path) as f:
+    with open(launches_path) as f, METRICS.timed_op("json_load"):
         tokens = json.load(f)
 
     print(f"Loaded {len(tokens):,} tokens from {launches_path}")
@@ -461,10 +731,46 @@ def main():
             f"\nSmoke test done: {grad_count}/{len(enriched)} graduated "
             f"({grad_count / len(enriched) * 100:.1f}%)"
         )
+        CU_SCHEDULER.print_report()
         return
 
-    enriched = enrich_all(tokens, smoke_test=False)
-    save_results(enriched)
+    resumed = apply_journal(tokens)
+    if resumed:
+        print(f"Resumed {len(resumed):,} tokens from {JOURNAL_PATH}")
+
+    if args.snapshot:
+        snap = fetch_curve_snapshot(args.data_size)
+        snap.save()
+        joined = apply_snapshot(tokens, snap)
+        print(f"Snapshot: {len(snap):,} open curves → {SNAPSHOT_PATH} | "
+              f"matched {joined['matched']:,} tokens | {joined['vanished']:,} vanished (re-enrich)")
+
+    now = time.time()
+    plan = []
+    for i, tok in enumerate(tokens):
+        if args.full and tok["mint"] not in resumed:
+            kind = "full"      # a resumed --full run skips what it already journaled
+        else:
+            kind = refresh_kind(tok, now, args.active_ttl)
+        if kind:
+            plan.append((i, kind))
+    counts = {
+        "full": sum(1 for _, k in plan if k == "full"),
+        "prices": sum(1 for _, k in plan if k == "prices"),
+        "fresh": len(tokens) - len(plan),
+    }
+    print(f"Stale: {counts['full']:,} full + {counts['prices']:,} price-only | "
+          f"fresh (skipped): {counts['fresh']:,}")
+
+    with open(JOURNAL_PATH, "a") as journal:
+        refreshed = enrich_all([tokens[i] for i, _ in plan], kinds=[k for _, k in plan],
+                               journal=journal)
+    for (i, _), tok in zip(plan, refreshed):
+        tokens[i] = tok
+
+    save_results(tokens, refresh_counts=counts)
+    os.remove(JOURNAL_PATH)
+    CU_SCHEDULER.print_report()
     print("\nstep1_enrich.py COMPLETE.")
 
 
@@ -1,58 +1,113 @@
 #!/usr/bin/env python3
 """
-STEP 1 — Fetch every pump.fun CreateV2 token launched on Jan 20, 2026.
+STEP 1 — Fetch every pump.fun CreateV2 token launched on Jan 20, 2026
+(or any UTC date range with --from/--to).
 Uses on-chain Alchemy RPC (getBlocks + getBlock) — pump.fun frontend API is 530 BLOCKED.
 
+Usage:
+  python3 step1_fetch_launches.py                                  # Jan 20, 2026
+  python3 step1_fetch_launches.py --from 2026-01-20 --to 2026-01-26 [--parallel-days 3]
+  python3 step1_fetch_launches.py --stream [--stream-mode logs|block] [--no-enrich]
+  python3 step1_fetch_launches.py --no-replay                      # skip reserve replay
+  python3 step1_fetch_launches.py --sample-rate 0.05 [--target-error 0.03] [--seed 7]
+
 Outputs:
   data/step1_launches.json   — array of token objects
   data/step1_summary.json    — summary stats
   output/step1_report.md     — markdown summary
+  data/shards/step1_launches_<day>.json — per-day scan output (range mode)
+  data/stream_launches.jsonl — one (enriched) token per line (stream mode)
+  data/reserve_peaks.jsonl   — replayed peak grad % / time per bucket per curve
+                               (data/shards/reserve_peaks_<day>.jsonl in range mode,
+                               with open curves carried day to day via
+                               data/shards/replay_handoff_<day>.json)
+  data/step1_sample.json     — sample design (--sample-rate; see sampling.py)
+  data/creator_index/        — creator → launches index (creator_index.py)
+  data/candles/hour/         — hourly OHLCV of graduated tokens (candle_store.py)
 """
 
+import argparse
 import json
 import os
+import socket
 import sys
+import threading
 import time
 from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime, timezone
 
 from config import (
-    rpc_call, http_get,
+    rpc_call, http_get, pace,
     PUMP_PROGRAM, JAN20_START_SLOT, JAN20_END_SLOT,
     DEXSCREENER_BASE, GECKOTERMINAL_BASE,
+    ALCHEMY_CONCURRENCY, ALCHEMY_CU_PER_SECOND, CU_SCHEDULER, RPC_WS_URL,
 )
+from candle_store import open_store
+from creator_index import INDEX_DIR as CREATOR_INDEX_DIR, CreatorIndex
+from metrics import METRICS
+from profiling import profile_run
+from reserve_replay import ReserveReplay, attach_peaks, load_handoff, load_peaks
+from sampling import StratifiedSample, apply_estimates, clear_sample
+from sampling import report_lines as sample_report_lines
+from slot_time import day_label, resolve_day_shards
+from step1_enrich import enrich_token
+import ws
 
 os.makedirs("data", exist_ok=True)
 os.makedirs("output", exist_ok=True)
 
 CHUNK_SIZE = 1000      # getBlocks max range per call
-BATCH_SIZE = 15        # concurrent block fetches (conservative to avoid Alchemy 429s)
+# concurrent block fetches — conservative to avoid Alchemy 429s, unless a CU budget
+# is configured, in which case the scheduler paces requests at the plan limit.
+# SCAN_BATCH_SIZE overrides both (load tests against mock_server.py).
+BATCH_SIZE = (int(os.environ.get("SCAN_BATCH_SIZE", "0"))
+              or (ALCHEMY_CONCURRENCY if ALCHEMY_CU_PER_SECOND else 15))
 CHECKPOINT_FILE = "data/step1_checkpoint.json"
 CHECKPOINT_INTERVAL = 2000  # save progress every N blocks
+SHARD_DIR = "data/shards"
+SAMPLE_CHECKPOINT = "data/step1_sample_checkpoint.json"
+SAMPLE_MAX_ROUNDS = 6
 
 
 # ── PHASE 1: Get valid block slots ────────────────────────────────────────────
 
-def phase1_get_slots():
+class ScanAborted(Exception):
+    """Raised when a scan's stop() callback asks it to give up (e.g. a lost work-queue lease)."""
+
+
+def shard_name(name, day=None):
+    """Metric phase / queue name, suffixed with the day shard it runs for (shards run in parallel)."""
+    return f"{name}:{day}" if day else name
+
+
+def phase1_get_slots(start=JAN20_START_SLOT, end=JAN20_END_SLOT, label="Jan 20, 2026", day=None,
+                     stop=None):
+    phase = shard_name("phase1_get_slots", day)
+    with METRICS.phase(phase):
+        return _collect_slots(start, end, label, phase, stop)
+
+
+def _collect_slots(start, end, label, phase, stop):
     print("=" * 60)
-    print("PHASE 1 — Collecting valid block slots for Jan 20, 2026")
+    print(f"PHASE 1 — Collecting valid block slots for {label}")
     print("=" * 60)
 
     all_slots = []
-    start = JAN20_START_SLOT
-    end = JAN20_END_SLOT
     total_range = end - start
     chunks_done = 0
     total_chunks = (total_range + CHUNK_SIZE - 1) // CHUNK_SIZE
 
     current = start
     while current <= end:
+        if stop is not None and stop():
+            raise ScanAborted(f"phase 1 stopped at slot {current}")
         chunk_end = min(current + CHUNK_SIZE - 1, end)
         slots = rpc_call("getBlocks", [current, chunk_end])
         if slots is None:
             print(f"  WARNING: getBlocks({current}, {chunk_end}) returned None, skipping")
         elif isinstance(slots, list):
             all_slots.extend(slots)
+        METRICS.add_items(phase, chunk_end - current + 1)
 
         chunks_done += 1
         if chunks_done % 20 == 0 or chunks_done == total_chunks:
@@ -61,9 +116,9 @@ def phase1_get_slots():
                   f"Slots found so far: {len(all_slots)}")
 
         current = chunk_end + 1
-        time.sleep(0.05)  # gentle rate limit
+        pace(0.05)  # gentle rate limit
 
-    print(f"\nPhase 1: Found {len(all_slots)} valid blocks in Jan 20 range")
+    print(f"\nPhase 1: Found {len(all_slots)} valid blocks in {label} range")
     return all_slots
 
 
@@ -158,7 +213,17 @@ def extract_createv2_from_block(slot, block):
     return tokens
 
 
-def phase2_scan_blocks(all_slots):
+def phase2_scan_blocks(all_slots, checkpoint_file=CHECKPOINT_FILE, replay=None, failed=None,
+                       day=None, stop=None):
+    """
+    Scan all_slots for CreateV2 launches. stop() is polled before every batch;
+    when it returns True the scan raises ScanAborted, keeping its checkpoint.
+    """
+    with METRICS.phase(shard_name("phase2_scan_blocks", day)):
+        return _scan_blocks(all_slots, checkpoint_file, replay, failed, day, stop)
+
+
+def _scan_blocks(all_slots, checkpoint_file, replay, failed, day, stop):
     print("\n" + "=" * 60)
     print("PHASE 2 — Scanning blocks for CreateV2 transactions")
     print("=" * 60)
@@ -170,39 +235,64 @@ def phase2_scan_blocks(all_slots):
 
     # Resume from checkpoint if exists
     resume_from = 0
-    if os.path.exists(CHECKPOINT_FILE):
+    if os.path.exists(checkpoint_file):
         try:
-            with open(CHECKPOINT_FILE) as f:
+            with open(checkpoint_file) as f:
                 cp = json.load(f)
             resume_from = cp.get("scanned", 0)
             for tok in cp.get("tokens", []):
                 found_tokens[tok["mint"]] = tok
+            if failed is not None:
+                failed.extend(cp.get("failed", []))
             print(f"  Resuming from checkpoint: {resume_from}/{total_slots} blocks already scanned, "
                   f"{len(found_tokens)} tokens found so far")
         except Exception:
             resume_from = 0
 
+    if replay is not None and resume_from == 0:
+        replay.reset()
+
     # Process in batches of BATCH_SIZE concurrent requests
     for batch_start in range(resume_from, total_slots, BATCH_SIZE):
+        if stop is not None and stop():
+            raise ScanAborted(f"phase 2 stopped after {batch_start}/{total_slots} blocks")
         batch = all_slots[batch_start:batch_start + BATCH_SIZE]
 
+        fetched = []
         with ThreadPoolExecutor(max_workers=BATCH_SIZE) as executor:
             futures = {executor.submit(fetch_block, slot): slot for slot in batch}
             for future in as_completed(futures):
                 slot, block = future.result()
-                tokens_in_block = extract_createv2_from_block(slot, block)
+                if block is None and failed is not None:
+                    failed.append(slot)
+                with METRICS.timed_op("extract"):
+                    tokens_in_block = extract_createv2_from_block(slot, block)
                 for tok in tokens_in_block:
                     mint = tok["mint"]
                     if mint not in found_tokens:
                         found_tokens[mint] = tok
+                if replay is not None:
+                    fetched.append((slot, block, tokens_in_block))
+
+        # The replay needs slot order; batches already are, blocks within one are not
+        if replay is not None:
+            with METRICS.timed_op("replay"):
+                for slot, block, tokens_in_block in sorted(fetched, key=lambda x: x[0]):
+                    replay.apply_block(slot, block, tokens_in_block)
 
         scanned = batch_start + len(batch)
+        METRICS.add_items(shard_name("phase2_scan_blocks", day), len(batch))
+        METRICS.set_gauge("queue_depth", total_slots - scanned,
+                          queue=shard_name("phase2_blocks", day))
 
         # Checkpoint every CHECKPOINT_INTERVAL blocks
         if scanned % CHECKPOINT_INTERVAL < BATCH_SIZE or scanned >= total_slots:
-            with open(CHECKPOINT_FILE, "w") as f:
+            with open(checkpoint_file, "w") as f, METRICS.timed_op("json_write"):
                 json.dump({"scanned": scanned, "total": total_slots,
-                           "tokens": list(found_tokens.values())}, f)
+                           "tokens": list(found_tokens.values()),
+                           "failed": failed or []}, f)
+            if replay is not None:
+                replay.checkpoint()
 
         if scanned % 5000 < BATCH_SIZE or scanned >= total_slots:
             elapsed = time.time() - start_time
@@ -213,15 +303,192 @@ def phase2_scan_blocks(all_slots):
                   f"Rate: {rate:.1f} blocks/s | "
                   f"ETA: {remaining:.0f}s")
 
-        time.sleep(0.05)  # gentle rate limit between batches
+        pace(0.05)  # gentle rate limit between batches
 
     print(f"\nPhase 2: Scanned {scanned} blocks, found {len(found_tokens)} unique CreateV2 tokens")
+    if replay is not None:
+        peaks = replay.finish()
+        matched = attach_peaks(found_tokens.values(), peaks)
+        print(f"Reserve replay: peak grad % for {matched} tokens → {replay.peaks_path}")
     # Clean up checkpoint
-    if os.path.exists(CHECKPOINT_FILE):
-        os.remove(CHECKPOINT_FILE)
+    if os.path.exists(checkpoint_file):
+        os.remove(checkpoint_file)
     return list(found_tokens.values())
 
 
+def _save_sample_checkpoint(sample, found_tokens, pending_rate):
+    with open(SAMPLE_CHECKPOINT, "w") as f, METRICS.timed_op("json_write"):
+        json.dump({"seed": sample.seed, "blocks_total": int(sample.sizes.sum()),
+                   "rate": sample.rate, "pending_rate": pending_rate, "rounds": sample.rounds,
+                   "missing": sorted(sample.missing),
+                   "tokens": list(found_tokens.values())}, f)
+
+
+def phase2_sample_blocks(all_slots, rate, target_error=None, seed=0):
+    """
+    Phase 2 over an hour-stratified random subset of `all_slots` (sampling.py).
+    With `target_error`, the sample grows round by round until the 95%
+    half-width on total_launched is within that fraction of the estimate, or
+    every block has been scanned. Returns (tokens, sample).
+    """
+    sample = StratifiedSample(all_slots, seed=seed)
+    found_tokens = {}
+    pending = rate
+    if os.path.exists(SAMPLE_CHECKPOINT):
+        with open(SAMPLE_CHECKPOINT) as f:
+            state = json.load(f)
+        if state["seed"] == seed and state["blocks_total"] == int(sample.sizes.sum()):
+            if state["rate"]:
+                sample.draw(state["rate"])       # same seed → the same blocks as before
+            sample.rounds = state["rounds"]
+            sample.missing = set(state["missing"])
+            found_tokens = {t["mint"]: t for t in state["tokens"]}
+            pending = state["pending_rate"]
+            print(f"  Resuming sample: {len(sample.rounds)} round(s) done, "
+                  f"{sum(len(s) for s in sample.scanned())} blocks, {len(found_tokens)} tokens")
+
+    if pending is None:
+        # Interrupted between rounds: decide from the last completed one
+        last = sample.rounds[-1]
+        done = (target_error is None or sample.complete
+                or (last["rel_error"] is not None and last["rel_error"] <= target_error))
+        pending = None if done else sample.next_rate(last["rel_error"], target_error)
+
+    while pending is not None and len(sample.rounds) < SAMPLE_MAX_ROUNDS:
+        _save_sample_checkpoint(sample, found_tokens, pending)
+        new_slots = sample.draw(pending)
+        print(f"\n  Sample round {len(sample.rounds) + 1}: rate {sample.rate:.2%} "
+              f"→ {len(new_slots)} new blocks across {len(sample.sizes)} hourly strata")
+        if new_slots:
+            checkpoint = f"data/step1_checkpoint_sample{len(sample.rounds)}.json"
+            failed = []
+            for tok in phase2_scan_blocks(new_slots, checkpoint_file=checkpoint, failed=failed):
+                found_tokens.setdefault(tok["mint"], tok)
+            # A block that failed to fetch is unobserved, not a block without launches
+            sample.missing.update(failed)
+            if failed:
+                print(f"  {len(failed)} sampled blocks failed to fetch — left out of the estimate")
+
+        est = sample.estimate(found_tokens.values())["total_launched"]
+        sample.rounds.append({"rate": round(sample.rate, 4),
+                              "blocks_scanned": sum(len(s) for s in sample.scanned()),
+                              "tokens_found": len(found_tokens), "estimate": est["estimate"],
+                              "rel_error": est["rel_error"]})
+        rel = f"±{est['rel_error']:.1%}" if est["rel_error"] is not None else "± n/a"
+        print(f"  Estimated launches: {est['estimate']:,.0f} {rel} "
+              f"(95% CI {est['ci95'][0]:,.0f}–{est['ci95'][1]:,.0f})")
+        METRICS.set_gauge("sample_rel_error", est["rel_error"] or 0)
+
+        pending = None
+        if target_error is not None and not sample.complete and (
+                est["rel_error"] is None or est["rel_error"] > target_error):
+            pending = sample.next_rate(est["rel_error"], target_error)
+            print(f"  Above target ±{target_error:.1%} — growing the sample")
+        _save_sample_checkpoint(sample, found_tokens, pending)
+
+    if target_error is not None and pending is not None:
+        print(f"  WARNING: stopped after {SAMPLE_MAX_ROUNDS} rounds above the target error")
+    os.remove(SAMPLE_CHECKPOINT)
+    return list(found_tokens.values()), sample
+
+
+# ── Date-range mode: parallel day shards ──────────────────────────────────────
+
+def shard_path(kind, day):
+    return os.path.join(SHARD_DIR, {
+        "launches": f"step1_launches_{day}.json",
+        "checkpoint": f"checkpoint_{day}.json",
+        "peaks": f"reserve_peaks_{day}.jsonl",
+        "state": f"replay_state_{day}.json",
+        "handoff": f"replay_handoff_{day}.json",
+    }[kind])
+
+
+def scan_shard(shard, replay=True, prev=None, final=True):
+    """
+    Phase 1 + 2 for one day shard; writes and returns its token list.
+
+    With the replay on, phase 2 waits for the previous day (prev: its day and
+    a threading.Event set when it is done) and starts from that day's open
+    and dormant curves, so a curve's peak is not cut off at midnight.
+    Phase 1 still runs in parallel with the other shards.
+    """
+    day = shard["day"]
+    out_path = shard_path("launches", day)
+    if os.path.exists(out_path):
+        with open(out_path) as f:
+            tokens = json.load(f)
+        print(f"  Shard {day}: reusing {out_path} ({len(tokens)} tokens)")
+        return tokens
+
+    slots = phase1_get_slots(shard["start_slot"], shard["end_slot"], label=day, day=day)
+    shard_replay = None
+    if replay:
+        inherit = None
+        if prev is not None:
+            prev_day, prev_done = prev
+            prev_done.wait()
+            inherit = load_handoff(shard_path("handoff", prev_day))
+        shard_replay = ReserveReplay(shard_path("peaks", day), shard_path("state", day),
+                                     handoff_path=shard_path("handoff", day),
+                                     inherit=inherit, final=final)
+    if slots:
+        tokens = phase2_scan_blocks(slots, checkpoint_file=shard_path("checkpoint", day),
+                                    replay=shard_replay, day=day)
+    else:
+        tokens = []
+        if shard_replay is not None:
+            shard_replay.finish()        # pass the inherited curves on
+
+    with open(out_path, "w") as f:
+        json.dump(tokens, f)
+    print(f"  Shard {day}: saved {len(tokens)} tokens -> {out_path}")
+    return tokens
+
+
+def scan_date_range(start_day, end_day, parallel_days=2, replay=True):
+    """
+    Resolve day shards, scan them in parallel and merge, deduplicated by mint.
+    The reserve replay hands curves from day to day, so with it on the shards'
+    phase 2 runs in day order (only phase 1 overlaps); --no-replay scans days
+    fully in parallel.
+    """
+    os.makedirs(SHARD_DIR, exist_ok=True)
+    shards = resolve_day_shards(start_day, end_day)
+    for sh in shards:
+        print(f"  Shard {sh['day']}: slots {sh['start_slot']}–{sh['end_slot']}")
+
+    done = {sh["day"]: threading.Event() for sh in shards}
+
+    def run_shard(i, sh):
+        try:
+            prev = (shards[i - 1]["day"], done[shards[i - 1]["day"]]) if i else None
+            return scan_shard(sh, replay, prev=prev, final=i == len(shards) - 1)
+        finally:
+            done[sh["day"]].set()
+
+    merged = {}
+    # Submitted in day order, so a shard only ever waits on one already running
+    with ThreadPoolExecutor(max_workers=parallel_days) as executor:
+        futures = {executor.submit(run_shard, i, sh): sh["day"] for i, sh in enumerate(shards)}
+        for future in as_completed(futures):
+            for tok in future.result():
+                prev = merged.get(tok["mint"])
+                if prev is None or tok["slot"] < prev["slot"]:
+                    merged[tok["mint"]] = tok
+
+    tokens = sorted(merged.values(), key=lambda t: t["slot"])
+    if replay:
+        # A curve handed on to a later day is summarised in that day's peaks file
+        peaks = {}
+        for sh in shards:
+            peaks.update(load_peaks(shard_path("peaks", sh["day"])))
+        attach_peaks(tokens, peaks)
+    print(f"\nDate range {start_day} → {end_day}: {len(tokens)} unique CreateV2 tokens "
+          f"across {len(shards)} day shard(s)")
+    return tokens
+
+
 # ── PHASE 3: Enrich with DexScreener ─────────────────────────────────────────
 
 def fetch_dexscreener(mint):
@@ -287,6 +554,7 @@ def fetch_dexscreener(mint):
     }
 
 
+@METRICS.timed_phase("phase3_enrich_dexscreener")
 def phase3_enrich_dexscreener(tokens):
     print("\n" + "=" * 60)
     print("PHASE 3 — Enriching with DexScreener data")
@@ -307,14 +575,15 @@ def phase3_enrich_dexscreener(tokens):
             "pair_created_at": dx.get("pair_created_at"),
             "grad_pct": dx.get("grad_pct", 0),
             "status": dx.get("status", "dead"),
-            "hourly_prices_24h": [],
+            "hourly_candles": 0,
         })
         enriched.append(tok)
+        METRICS.add_items("phase3_enrich_dexscreener")
 
         if (i + 1) % 50 == 0 or (i + 1) == total:
             print(f"  DexScreener: {i+1}/{total} tokens enriched")
 
-        time.sleep(0.4)  # 2.5 req/sec limit
+        pace(0.4)  # 2.5 req/sec limit
 
     return enriched
 
@@ -339,6 +608,7 @@ def fetch_gecko_ohlcv(pool_address, timeframe, before_timestamp, limit):
         return []
 
 
+@METRICS.timed_phase("phase4_fetch_prices")
 def phase4_fetch_prices(tokens):
     print("\n" + "=" * 60)
     print("PHASE 4 — Fetching hourly price data for graduated tokens")
@@ -346,6 +616,7 @@ def phase4_fetch_prices(tokens):
 
     graduated = [t for t in tokens if t.get("status") == "graduated" and t.get("pair_address")]
     print(f"  Fetching OHLCV for {len(graduated)} graduated tokens...")
+    store = open_store()
 
     for i, tok in enumerate(graduated):
         pair_address = tok["pair_address"]
@@ -356,21 +627,24 @@ def phase4_fetch_prices(tokens):
             before_timestamp=block_time + 86400,
             limit=48,
         )
-        # Trim to first 24 candles after launch
-        after_launch = [c for c in candles if c[0] >= block_time]
-        tok["hourly_prices_24h"] = after_launch[:24]
+        # Trim to first 24 candles after launch; the candles go to the candle store
+        after_launch = [c for c in candles if c[0] >= block_time][:24]
+        store["hour"].append(pair_address, after_launch)
+        tok["hourly_candles"] = len(after_launch)
+        METRICS.add_items("phase4_fetch_prices")
 
         if (i + 1) % 20 == 0 or (i + 1) == len(graduated):
             print(f"  GeckoTerminal: {i+1}/{len(graduated)} tokens fetched")
 
-        time.sleep(0.5)
+        pace(0.5)
 
     return tokens
 
 
 # ── PHASE 5: Save and report ──────────────────────────────────────────────────
 
-def phase5_save_report(tokens):
+@METRICS.timed_phase("phase5_save_report")
+def phase5_save_report(tokens, sample=None):
     print("\n" + "=" * 60)
     print("PHASE 5 — Saving results and generating report")
     print("=" * 60)
@@ -383,8 +657,11 @@ def phase5_save_report(tokens):
 
     # Save launches
     with open("data/step1_launches.json", "w") as f:
-        json.dump(tokens, f, indent=2)
+        with METRICS.timed_op("json_write"):
+            json.dump(tokens, f, indent=2)
     print(f"Saved {len(tokens)} tokens -> data/step1_launches.json")
+    rewritten = CreatorIndex().update(tokens)
+    print(f"Updated creator index ({rewritten} partitions rewritten) -> {CREATOR_INDEX_DIR}/")
 
     # Save summary
     summary = {
@@ -395,8 +672,17 @@ def phase5_save_report(tokens):
         "graduation_rate_pct": round(grad_rate, 2),
         "scan_completed_at": int(time.time()),
     }
+    if sample is not None:
+        # Sampled scan: the summary carries population estimates, not sample counts
+        estimates = sample.estimate(tokens)
+        apply_estimates(summary, estimates, sample)
+        sample.save()
+        print("Saved sample design -> data/step1_sample.json")
+    else:
+        clear_sample()
     with open("data/step1_summary.json", "w") as f:
-        json.dump(summary, f, indent=2)
+        with METRICS.timed_op("json_write"):
+            json.dump(summary, f, indent=2)
     print(f"Saved summary -> data/step1_summary.json")
 
     # Top 20 graduated by peak market cap
@@ -407,9 +693,9 @@ def phase5_save_report(tokens):
     )[:20]
 
     report_lines = [
-        "# Step 1 Report — pump.fun CreateV2 Launches on Jan 20, 2026",
+        f"# Step 1 Report — pump.fun CreateV2 Launches on {day_label(t.get('block_time') for t in tokens)}",
         "",
-        "## Summary Statistics",
+        "## Summary Statistics" + (" (sampled blocks only)" if sample is not None else ""),
         "",
         "| Metric | Value |",
         "|--------|-------|",
@@ -419,6 +705,10 @@ def phase5_save_report(tokens):
         f"| Dead | {total_dead:,} |",
         f"| Graduation Rate | {grad_rate:.2f}% |",
         "",
+    ]
+    if sample is not None:
+        report_lines += sample_report_lines(estimates, sample)
+    report_lines += [
         "## Top 20 Graduated Tokens (by market cap)",
         "",
         "| Mint | Creator | Market Cap | FDV | Slot |",
@@ -448,31 +738,334 @@ def phase5_save_report(tokens):
 
     print(f"\nSummary: {total_launched} launched | {total_graduated} graduated "
           f"({grad_rate:.1f}%) | {total_active} active | {total_dead} dead")
+    if sample is not None:
+        e = estimates["total_launched"]
+        print(f"Estimated: {e['estimate']:,.0f} launched (95% CI {e['ci95'][0]:,.0f}–"
+              f"{e['ci95'][1]:,.0f})"
+              + (f" | graduation rate {estimates['graduation_rate_pct']['estimate']:.2f}%"
+                 if "graduation_rate_pct" in estimates else ""))
+
+
+# ── STREAM MODE: live launches over websocket subscriptions ──────────────────
+
+STREAM_FILE = "data/stream_launches.jsonl"
+STREAM_PING_SECONDS = 20     # ping when idle; reconnect after 2× this with no frames
+STREAM_MAX_BACKOFF = 30
+STREAM_LOOKUP_WORKERS = 8    # concurrent getTransaction calls in logs mode
+STREAM_LOOKUP_DELAYS = (1, 2, 4, 8, 16)   # seconds between retries of a lookup that came back empty
+
+
+def tx_from_get_transaction(result):
+    """getTransaction (json encoding) → the block transaction shape extract_createv2_from_block reads."""
+    tx = result.get("transaction") or {}
+    msg = tx.get("message") or {}
+    meta = result.get("meta") or {}
+    loaded = meta.get("loadedAddresses") or {}
+    keys = (list(msg.get("accountKeys") or [])
+            + list(loaded.get("writable") or []) + list(loaded.get("readonly") or []))
+    return {"transaction": {"accountKeys": keys, "signatures": tx.get("signatures") or []},
+            "meta": meta}
+
+
+class LaunchStream:
+    """
+    Subscribes to the pump program and runs every notification through the
+    same CreateV2 fingerprint as the batch scan:
+      - mode "block": blockSubscribe(mentionsAccountOrProgram) delivers the
+        transactions directly (needs an RPC that supports blockSubscribe)
+      - mode "logs":  logsSubscribe(mentions); Create instructions are looked up
+        with getTransaction
+    Reconnects with exponential backoff; after each reconnect the slots missed
+    since the last one seen are backfilled with getBlocks + getBlock. A logs
+    lookup that getTransaction cannot answer falls back to getBlock on its slot
+    (retried until the block is served); slots still unread go to the next backfill.
+    """
+
+    def __init__(self, on_token, ws_url=RPC_WS_URL, mode="logs"):
+        if mode not in ("logs", "block"):
+            raise ValueError(f"stream mode must be logs or block, got {mode!r}")
+        self.on_token = on_token
+        self.ws_url = ws_url
+        self.mode = mode
+        self.seen = set()
+        self.last_slot = None
+        self.missed = set()      # lookup slots neither getTransaction nor getBlock answered
+        self.lock = threading.Lock()
+        self.stop_event = threading.Event()
+        self.conn = None
+        self.lookups = ThreadPoolExecutor(max_workers=STREAM_LOOKUP_WORKERS)
+
+    def _emit(self, slot, tokens, source):
+        with self.lock:
+            self.last_slot = slot if self.last_slot is None else max(self.last_slot, slot)
+            fresh = [t for t in tokens if t["mint"] not in self.seen]
+            self.seen.update(t["mint"] for t in fresh)
+        for tok in fresh:
+            tok["source"] = source
+            tok["seen_at"] = time.time()
+            METRICS.inc("stream_tokens_total", source=source)
+            self.on_token(tok)
+
+    def _lookup(self, slot, signature):
+        # last_slot has usually moved past `slot` already, so a reconnect backfill
+        # would not cover it: keep trying here, then fall back to the whole block
+        for delay in (0,) + STREAM_LOOKUP_DELAYS[:2]:
+            if self.stop_event.wait(delay):
+                break
+            result = rpc_call("getTransaction", [signature, {
+                "encoding": "json", "commitment": "confirmed", "maxSupportedTransactionVersion": 0,
+            }])
+            if result:
+                block = {"blockTime": result.get("blockTime"),
+                         "transactions": [tx_from_get_transaction(result)]}
+                self._emit(slot, extract_createv2_from_block(slot, block), "logs")
+                return
+        METRICS.inc("stream_lookup_fallbacks_total")
+        for delay in STREAM_LOOKUP_DELAYS:
+            _, block = fetch_block(slot)      # getBlock serves finalized slots only
+            if block is not None:
+                self._emit(slot, extract_createv2_from_block(slot, block), "backfill")
+                return
+            if self.stop_event.wait(delay):
+                break
+        with self.lock:
+            self.missed.add(slot)
+        print(f"  stream: WARNING: slot {slot} ({signature[:16]}…) unread — queued for backfill")
+
+    def handle(self, msg):
+        method = msg.get("method")
+        if method == "blockNotification":
+            value = msg["params"]["result"]["value"]
+            slot = value["slot"]
+            self._emit(slot, extract_createv2_from_block(slot, value.get("block")), "block")
+        elif method == "logsNotification":
+            result = msg["params"]["result"]
+            slot, value = result["context"]["slot"], result["value"]
+            if value.get("err") or not any("Instruction: Create" in line
+                                           for line in value.get("logs") or []):
+                self._emit(slot, [], "logs")
+                return
+            self.lookups.submit(self._lookup, slot, value["signature"])
+
+    def backfill(self, upto):
+        """
+        Scan (last_slot, upto] with getBlocks + getBlock for launches missed while
+        down, plus any earlier lookup slots still unread (self.missed).
+        """
+        start = self.last_slot + 1
+        with self.lock:
+            slots = sorted(s for s in self.missed if s < start)
+            self.missed.difference_update(slots)
+        for chunk_start in range(start, upto + 1, CHUNK_SIZE):
+            slots.extend(rpc_call("getBlocks", [chunk_start,
+                                                min(chunk_start + CHUNK_SIZE - 1, upto)]) or [])
+        if not slots:
+            return
+        print(f"  stream: backfilling {len(slots)} blocks in slots {start}–{upto}")
+        with ThreadPoolExecutor(max_workers=BATCH_SIZE) as executor:
+            for slot, block in executor.map(fetch_block, slots):
+                if block is None:
+                    with self.lock:
+                        self.missed.add(slot)
+                    continue
+                self._emit(slot, extract_createv2_from_block(slot, block), "backfill")
+        METRICS.inc("stream_backfilled_blocks_total", len(slots))
+
+    def _subscribe(self, conn):
+        if self.mode == "block":
+            params = [{"mentionsAccountOrProgram": PUMP_PROGRAM}, {
+                "commitment": "confirmed", "encoding": "json", "transactionDetails": "accounts",
+                "maxSupportedTransactionVersion": 0, "showRewards": False,
+            }]
+        else:
+            params = [{"mentions": [PUMP_PROGRAM]}, {"commitment": "confirmed"}]
+        conn.send(json.dumps({"jsonrpc": "2.0", "id": 1, "method": f"{self.mode}Subscribe",
+                              "params": params}))
+
+    def _listen(self, conn):
+        conn.settimeout(STREAM_PING_SECONDS)
+        while not self.stop_event.is_set():
+            try:
+                raw = conn.recv()
+            except socket.timeout:
+                if time.time() - conn.last_frame > 2 * STREAM_PING_SECONDS:
+                    raise ws.ConnectionClosed("no frames (pong included) — connection stale")
+                conn.ping()
+                continue
+            msg = json.loads(raw)
+            if "error" in msg:
+                raise ws.ConnectionClosed(f"subscription rejected: {msg['error']}")
+            self.handle(msg)
+
+    def run(self):
+        backoff = 1
+        while not self.stop_event.is_set():
+            try:
+                self.conn = ws.connect(self.ws_url)
+                self._subscribe(self.conn)
+                head = rpc_call("getSlot", [{"commitment": "confirmed"}])
+                if self.last_slot is None:
+                    self.last_slot = head
+                elif head:
+                    self.backfill(head)
+                print(f"  stream: subscribed ({self.mode}) at slot {head}")
+                backoff = 1
+                self._listen(self.conn)
+            except (OSError, ValueError, ws.ConnectionClosed) as e:
+                if self.stop_event.is_set():
+                    break
+                METRICS.inc("stream_reconnects_total")
+                print(f"  stream: {type(e).__name__}: {e} — reconnecting in {backoff}s")
+                self.stop_event.wait(backoff)
+                backoff = min(backoff * 2, STREAM_MAX_BACKOFF)
+            finally:
+                if self.conn is not None:
+                    self.conn.close()
+        self.lookups.shutdown(wait=True)
+
+    def stop(self):
+        self.stop_event.set()
+        if self.conn is not None:
+            self.conn.close()     # unblocks recv()
+
+
+def run_stream(mode="logs", enrich=True, seconds=None, out_path=STREAM_FILE):
+    """Stream launches until Ctrl-C (or for `seconds`), enriching each as it arrives."""
+    print(f"STREAM — {mode}Subscribe on {RPC_WS_URL.split('/v2/')[0]} → {out_path}")
+    write_lock = threading.Lock()
+    out = open(out_path, "a")
+    enricher = ThreadPoolExecutor(max_workers=ALCHEMY_CONCURRENCY) if enrich else None
+
+    def write(tok):
+        with write_lock:
+            out.write(json.dumps(tok) + "\n")
+            out.flush()
+
+    def finish(future):
+        try:
+            tok = future.result()
+        except Exception as e:
+            print(f"  stream: enrichment failed: {e}")
+            return
+        write(tok)
+        print(f"  enriched {tok['mint'][:16]}… status={tok.get('status')} "
+              f"grad_pct={tok.get('grad_pct', 0):.1f}%")
+
+    def on_token(tok):
+        lag = tok["seen_at"] - tok["block_time"] if tok.get("block_time") else float("nan")
+        print(f"  NEW {tok['mint']} slot={tok['slot']} via {tok['source']} lag={lag:.1f}s")
+        if enricher is None:
+            write(tok)
+        else:
+            enricher.submit(enrich_token, tok).add_done_callback(finish)
+
+    stream = LaunchStream(on_token, mode=mode)
+    if seconds:
+        timer = threading.Timer(seconds, stream.stop)
+        timer.daemon = True
+        timer.start()
+    try:
+        stream.run()
+    except KeyboardInterrupt:
+        stream.stop()
+    finally:
+        if enricher is not None:
+            enricher.shutdown(wait=True)
+        out.close()
+    print(f"\nStream stopped: {len(stream.seen)} launches seen, last slot {stream.last_slot}")
 
 
 # ── Main ──────────────────────────────────────────────────────────────────────
 
 def main():
+    parser = argparse.ArgumentParser(description="pump.fun CreateV2 token discovery")
+    parser.add_argument("--from", dest="start_day", metavar="YYYY-MM-DD",
+                        help="First UTC day to scan (default: Jan 20, 2026 constants)")
+    parser.add_argument("--to", dest="end_day", metavar="YYYY-MM-DD",
+                        help="Last UTC day to scan, inclusive (default: same as --from)")
+    parser.add_argument("--parallel-days", type=int, default=2,
+                        help="Day shards scanned concurrently in range mode (with the reserve "
+                             "replay on, only their phase 1 overlaps)")
+    parser.add_argument("--no-replay", action="store_true",
+                        help="Skip the bonding-curve reserve replay (peak grad %% per token)")
+    parser.add_argument("--sample-rate", type=float, default=None, metavar="FRACTION",
+                        help="Scan a random FRACTION of each hour's blocks and report estimated "
+                             "totals with 95%% confidence intervals")
+    parser.add_argument("--target-error", type=float, default=None, metavar="FRACTION",
+                        help="With --sample-rate: grow the sample until the 95%% half-width on "
+                             "total launches is within FRACTION of the estimate")
+    parser.add_argument("--seed", type=int, default=0, help="Sample seed (default: 0)")
+    parser.add_argument("--stream", action="store_true",
+                        help="Follow new launches live over websocket instead of a batch scan")
+    parser.add_argument("--stream-mode", choices=("logs", "block"), default="logs",
+                        help="logsSubscribe + getTransaction, or blockSubscribe")
+    parser.add_argument("--stream-seconds", type=float, default=None,
+                        help="Stop streaming after this many seconds (default: until Ctrl-C)")
+    parser.add_argument("--no-enrich", action="store_true",
+                        help="Stream mode: write raw launches without enrichment")
+    parser.add_argument("--profile", action="store_true",
+                        help="Write per-phase wall/CPU/net-wait, cProfile and tracemalloc "
+                             "reports to output/profile/")
+    args = parser.parse_args()
+    if args.sample_rate is not None and not 0 < args.sample_rate <= 1:
+        parser.error("--sample-rate must be in (0, 1]")
+    if args.target_error is not None and args.sample_rate is None:
+        parser.error("--target-error needs --sample-rate")
+
+    with profile_run("step1_fetch_launches", args.profile):
+        run(args)
+
+
+def run(args):
+    if args.stream:
+        run_stream(args.stream_mode, enrich=not args.no_enrich, seconds=args.stream_seconds)
+        return
+
+    label = (f"{args.start_day} → {args.end_day or args.start_day}"
+             if args.start_day else "Jan 20, 2026")
     print("=" * 60)
-    print("STEP 1 — pump.fun CreateV2 token discovery (Jan 20, 2026)")
+    print(f"STEP 1 — pump.fun CreateV2 token discovery ({label})")
     print("Using on-chain Alchemy RPC — pump.fun frontend is BLOCKED")
     print("=" * 60)
     print()
 
-    # Phase 1: collect valid slot numbers
-    all_slots = phase1_get_slots()
+    sample = None
+    if args.sample_rate is not None:
+        # Phase 1 over the whole range, then phase 2 on a stratified subset.
+        # No reserve replay: it needs every block of a curve's life.
+        if args.start_day:
+            all_slots = []
+            for sh in resolve_day_shards(args.start_day, args.end_day or args.start_day):
+                all_slots += phase1_get_slots(sh["start_slot"], sh["end_slot"], label=sh["day"],
+                                              day=sh["day"])
+        else:
+            all_slots = phase1_get_slots()
+        if not all_slots:
+            print("ERROR: No valid slots found in range. Check Alchemy RPC.")
+            sys.exit(1)
+        tokens, sample = phase2_sample_blocks(all_slots, args.sample_rate,
+                                              args.target_error, args.seed)
+    elif args.start_day:
+        # Phases 1+2 per day shard, slot bounds resolved via getBlockTime
+        tokens = scan_date_range(args.start_day, args.end_day or args.start_day,
+                                 parallel_days=args.parallel_days, replay=not args.no_replay)
+    else:
+        # Phase 1: collect valid slot numbers
+        all_slots = phase1_get_slots()
 
-    if not all_slots:
-        print("ERROR: No valid slots found in range. Check Alchemy RPC.")
-        sys.exit(1)
+        if not all_slots:
+            print("ERROR: No valid slots found in range. Check Alchemy RPC.")
+            sys.exit(1)
 
-    # Phase 2: scan blocks for CreateV2 transactions
-    tokens = phase2_scan_blocks(all_slots)
+        # Phase 2: scan blocks for CreateV2 transactions
+        tokens = phase2_scan_blocks(all_slots,
+                                    replay=None if args.no_replay else ReserveReplay())
 
     if not tokens:
         print("WARNING: No CreateV2 tokens found. Check block scan logic.")
         json.dump([], open("data/step1_launches.json", "w"), indent=2)
         json.dump({}, open("data/step1_summary.json", "w"), indent=2)
+        clear_sample()
         return
 
     # Phase 3: enrich with DexScreener
@@ -482,8 +1075,9 @@ def main():
     tokens = phase4_fetch_prices(tokens)
 
     # Phase 5: save and report
-    phase5_save_report(tokens)
+    phase5_save_report(tokens, sample)
 
+    CU_SCHEDULER.print_report()
     print("\nSTEP 1 COMPLETE.")
 
 
@@ -2,18 +2,39 @@
 """
 STEP 2 — Among non-graduated tokens, calculate how close they got to graduation.
 
+"How close" is the peak grad % from step1's reserve replay when the token has
+one (peak_grad_pct), so a curve that hit 95% and dumped still counts as 95%;
+otherwise today's grad_pct. Buckets are reported both ways. A replayed peak
+of a curve still open when the step1 scan ended (peak_truncated) is only a
+lower bound; the report counts those separately.
+
+The distributions come from a launch cube (cube.py: grad bucket × peak
+bucket × launch hour × status × creator cohort) over this run's launches, so
+the report's extra slices — by creator cohort and by launch hour — are queries
+against it. The persisted cube is a separate artifact for ad-hoc slices
+(`cube.py query`): updated incrementally, it keeps every launch it has ever
+seen, including ones no longer in data/step1_launches.json.
+
 Input:  data/step1_launches.json
 Output:
   data/step2_near_grad.json   — near-graduation tokens with grad_pct and bucket distribution
   output/step2_report.md      — markdown bucket table + top-20 list
+  data/step2_cube.npz         — cumulative launch distribution cube (cube.py)
 """
 
+import argparse
 import json
 import os
 import sys
-import time
 
-from config import http_get, DEXSCREENER_BASE
+import numpy as np
+
+from config import http_get, pace, DEXSCREENER_BASE
+from creator_index import load_index
+from cube import CUBE_FILE, DEFAULT_DIMS, GRAD_LABELS, Cube, grad_codes, load_or_build
+from metrics import METRICS
+from profiling import profile_run
+from slot_time import day_label
 
 os.makedirs("data", exist_ok=True)
 os.makedirs("output", exist_ok=True)
@@ -24,7 +45,7 @@ def load_launches():
     if not os.path.exists(path):
         print(f"ERROR: {path} not found. Run step1_fetch_launches.py first.")
         sys.exit(1)
-    with open(path) as f:
+    with open(path) as f, METRICS.timed_op("json_load"):
         return json.load(f)
 
 
@@ -52,37 +73,68 @@ def fetch_dexscreener(mint):
     }
 
 
-def compute_buckets(tokens):
-    """Compute graduation percentage bucket distribution."""
-    buckets = {
-        "0-10": 0,
-        "10-25": 0,
-        "25-50": 0,
-        "50-75": 0,
-        "75-90": 0,
-        "90-99": 0,
-        "100": 0,
-    }
-    for t in tokens:
-        pct = t.get("grad_pct", 0) or 0
-        if pct >= 100:
-            buckets["100"] += 1
-        elif pct >= 90:
-            buckets["90-99"] += 1
-        elif pct >= 75:
-            buckets["75-90"] += 1
-        elif pct >= 50:
-            buckets["50-75"] += 1
-        elif pct >= 25:
-            buckets["25-50"] += 1
-        elif pct >= 10:
-            buckets["10-25"] += 1
-        else:
-            buckets["0-10"] += 1
-    return buckets
+def reached_pct(t):
+    """Highest grad % the curve got to: the step1 reserve replay peak when present, else today's."""
+    return max(t.get("grad_pct") or 0, t.get("peak_grad_pct") or 0)
+
+
+def compute_buckets(tokens, pct_of=lambda t: t.get("grad_pct", 0) or 0):
+    """Compute graduation percentage bucket distribution (np.digitize + np.bincount)."""
+    pct = np.array([pct_of(t) for t in tokens], dtype=np.float64)
+    counts = np.bincount(grad_codes(pct), minlength=len(GRAD_LABELS))
+    return dict(zip(GRAD_LABELS, counts.tolist()))
+
+
+def cube_report_lines(cube, not_grad):
+    """Peak-bucket slices of the non-graduated launches by creator cohort and launch hour."""
+    peak_labels = cube.labels("peak")
+    lines = [
+        "",
+        "## Peak Graduation % by Creator Cohort (non-graduated)",
+        "",
+        "| Cohort | " + " | ".join(f"{b}%" for b in peak_labels) + " | ≥50% share |",
+        "|--------|" + "---|" * (len(peak_labels) + 1),
+    ]
+    by_cohort = cube.query(("cohort", "peak"), status=not_grad)
+    for cohort, row in zip(cube.labels("cohort"), by_cohort.tolist()):
+        total = sum(row)
+        if not total:
+            continue
+        near = sum(row[peak_labels.index("50-75"):])
+        lines.append(f"| {cohort} | " + " | ".join(f"{n:,}" for n in row)
+                     + f" | {near / total * 100:.1f}% |")
+
+    by_hour = cube.query(("hour", "peak"), status=not_grad)
+    graduated = cube.query("hour", status="graduated").tolist()
+    lines += [
+        "",
+        "## By Launch Hour (UTC)",
+        "",
+        "| Hour | Launches | Graduated | Non-grad ≥50% peak | ≥90% peak |",
+        "|------|----------|-----------|--------------------|-----------|",
+    ]
+    for hour, row, grad in zip(cube.labels("hour"), by_hour.tolist(), graduated):
+        total = sum(row) + grad
+        if total:
+            lines.append(f"| {hour}:00 | {total:,} | {grad:,} | "
+                         f"{sum(row[peak_labels.index('50-75'):]):,} | "
+                         f"{sum(row[peak_labels.index('90-99'):]):,} |")
+    return lines
 
 
 def main():
+    parser = argparse.ArgumentParser(description="Near-graduation analysis")
+    parser.add_argument(
+        "--profile", action="store_true",
+        help="Write per-phase wall/CPU/net-wait, cProfile and tracemalloc reports to output/profile/",
+    )
+    args = parser.parse_args()
+
+    with profile_run("step2_near_graduation", args.profile):
+        run()
+
+
+def run():
     print("=" * 60)
     print("STEP 2 — Near-graduation analysis")
     print("=" * 60)
@@ -91,72 +143,96 @@ def main():
     non_graduated = [t for t in all_launches if t.get("status") != "graduated"]
     print(f"Loaded {len(all_launches)} total tokens, {len(non_graduated)} non-graduated.")
 
-    near_grad = [t for t in non_graduated if (t.get("grad_pct") or 0) >= 50]
-    print(f"Near-graduation tokens (>=50% grad): {len(near_grad)}")
+    replayed = sum(1 for t in non_graduated if "peak_grad_pct" in t)
+    truncated = sum(1 for t in non_graduated if t.get("peak_truncated"))
+    near_grad = [t for t in non_graduated if reached_pct(t) >= 50]
+    print(f"Near-graduation tokens (>=50% grad at peak, {replayed} with replayed peaks): "
+          f"{len(near_grad)}")
 
     # Refresh DexScreener for near-grad tokens with low confidence data
     print("Refreshing DexScreener data for near-grad tokens with low/missing FDV...")
     refreshed = 0
-    for i, token in enumerate(near_grad):
-        if not token.get("fdv") or token.get("fdv", 0) < 100:
-            data = fetch_dexscreener(token["mint"])
-            if data:
-                token.update(data)
-                if data.get("fdv", 0) > 0:
-                    token["grad_pct"] = min(data["fdv"] / 69000 * 100, 100)
-                refreshed += 1
-            time.sleep(0.4)
-
-        if (i + 1) % 20 == 0:
-            print(f"  Refreshed {i+1}/{len(near_grad)} near-grad tokens...")
+    with METRICS.phase("step2_refresh"):
+        for i, token in enumerate(near_grad):
+            if not token.get("fdv") or token.get("fdv", 0) < 100:
+                data = fetch_dexscreener(token["mint"])
+                if data:
+                    token.update(data)
+                    if data.get("fdv", 0) > 0:
+                        token["grad_pct"] = min(data["fdv"] / 69000 * 100, 100)
+                    refreshed += 1
+                pace(0.4)
+            METRICS.add_items("step2_refresh")
+            METRICS.set_gauge("queue_depth", len(near_grad) - i - 1, queue="step2_refresh")
+
+            if (i + 1) % 20 == 0:
+                print(f"  Refreshed {i+1}/{len(near_grad)} near-grad tokens...")
 
     print(f"Refreshed DexScreener data for {refreshed} tokens.")
 
-    buckets = compute_buckets(non_graduated)
+    with METRICS.phase("step2_cube"):
+        history = load_index(all_launches).history()
+        persisted, added, moved = load_or_build(all_launches, history=history)
+        persisted.save()
+        # The report counts this run's launches only; the persisted cube keeps every run's
+        cube = Cube(DEFAULT_DIMS)
+        cube.update(all_launches, history)
+    print(f"Cube: {added} tokens added, {moved} moved between cells → {CUBE_FILE} "
+          f"({persisted.total:,} tokens)")
+    not_grad = [s for s in cube.labels("status") if s != "graduated"]
+    buckets = cube.distribution("grad", status=not_grad)
+    peak_buckets = cube.distribution("peak", status=not_grad)
 
     result = {
         "total_non_graduated": len(non_graduated),
         "total_near_grad_50plus": len(near_grad),
+        "truncated_peaks": truncated,
         "bucket_distribution": buckets,
-        "near_grad_tokens": sorted(near_grad, key=lambda x: x.get("grad_pct", 0), reverse=True),
+        "peak_bucket_distribution": peak_buckets,
+        "near_grad_tokens": sorted(near_grad, key=reached_pct, reverse=True),
     }
 
     out_path = "data/step2_near_grad.json"
-    with open(out_path, "w") as f:
+    with open(out_path, "w") as f, METRICS.timed_op("json_write"):
         json.dump(result, f, indent=2)
     print(f"Saved {out_path}")
 
     # Report
     report_lines = [
-        "# Step 2 Report — Near-Graduation Analysis (Jan 20, 2026)",
+        f"# Step 2 Report — Near-Graduation Analysis ({day_label(t.get('block_time') for t in all_launches)})",
         "",
         "## Overview",
         "",
         f"- **Total non-graduated**: {len(non_graduated):,}",
-        f"- **Near-graduation (>=50%)**: {len(near_grad):,}",
+        f"- **Near-graduation (>=50% at peak)**: {len(near_grad):,}",
+        f"- **Replayed peaks available**: {replayed:,} (step1 reserve replay; {truncated:,} "
+        f"still open when the scan ended, so their peak is a lower bound)",
         "",
         "## Graduation % Distribution",
         "",
-        "| Bucket | Count | % of Non-Grads |",
-        "|--------|-------|---------------|",
+        "| Bucket | Count (now) | % of Non-Grads | Count (peak) | % of Non-Grads |",
+        "|--------|-------------|---------------|--------------|---------------|",
     ]
     total_ng = len(non_graduated)
     for bucket, count in buckets.items():
         share = count / total_ng * 100 if total_ng else 0
-        report_lines.append(f"| {bucket}% | {count:,} | {share:.1f}% |")
+        peak = peak_buckets[bucket]
+        peak_share = peak / total_ng * 100 if total_ng else 0
+        report_lines.append(f"| {bucket}% | {count:,} | {share:.1f}% | {peak:,} | {peak_share:.1f}% |")
+
+    report_lines += cube_report_lines(cube, not_grad)
 
     report_lines += [
         "",
         "## Top 20 Closest to Graduation",
         "",
-        "| # | Mint | Grad% | FDV | Status |",
-        "|---|------|-------|-----|--------|",
+        "| # | Mint | Peak% | Grad% | FDV | Status |",
+        "|---|------|-------|-------|-----|--------|",
     ]
 
-    sorted_near = sorted(near_grad, key=lambda x: x.get("grad_pct", 0), reverse=True)
-    for i, t in enumerate(sorted_near[:20], 1):
+    for i, t in enumerate(result["near_grad_tokens"][:20], 1):
         report_lines.append(
-            f"| {i} | `{t['mint'][:12]}...` | {t.get('grad_pct', 0):.1f}% | "
+            f"| {i} | `{t['mint'][:12]}...` | {reached_pct(t):.1f}% | {t.get('grad_pct', 0):.1f}% | "
             f"${t.get('fdv', 0):,.0f} | {t.get('status', 'unknown')} |"
         )
 
@@ -5,16 +5,22 @@ STEP 3 — For each graduated token, fetch pre/post-graduation price action.
 Input:  data/step1_launches.json  (filter where status == 'graduated')
 Output:
   data/step3_price_action.json   — per-token price structure + aggregate stats
+  data/candles/                  — the fetched 1-min and hourly candles (candle_store.py)
   output/step3_report.md         — stats + individual tables
 """
 
+import argparse
 import json
 import os
 import sys
-import time
 from statistics import median
 
-from config import http_get, GECKOTERMINAL_BASE
+from candle_store import HOURLY_CANDLES, POST_MINUTES, grad_windows, open_store
+from config import http_get, pace, GECKOTERMINAL_BASE
+from metrics import METRICS
+from profiling import profile_run
+from sketches import TDigest, group_by_day, load_range, save_day_summary
+from slot_time import day_label
 
 os.makedirs("data", exist_ok=True)
 os.makedirs("output", exist_ok=True)
@@ -25,7 +31,7 @@ def load_launches():
     if not os.path.exists(path):
         print(f"ERROR: {path} not found. Run step1_fetch_launches.py first.")
         sys.exit(1)
-    with open(path) as f:
+    with open(path) as f, METRICS.timed_op("json_load"):
         return json.load(f)
 
 
@@ -48,50 +54,67 @@ def fetch_ohlcv(pool_address, timeframe, before_timestamp, limit):
         return []
 
 
-def analyze_token(token):
-    """Fetch price action for a graduated token."""
+def graduation_ts(token):
+    """Pair creation time if known, else launch block time (0 if neither)."""
+    pair_created_ms = token.get("pair_created_at") or 0
+    if pair_created_ms:
+        return pair_created_ms / 1000
+    return token.get("block_time") or 0
+
+
+def analyze_token(token, store):
+    """Fetch price action for a graduated token (candles go to the candle store)."""
     pair_address = token.get("pair_address")
     if not pair_address:
         return None
 
-    pair_created_ms = token.get("pair_created_at") or 0
-    if pair_created_ms:
-        graduation_time = pair_created_ms / 1000
-    else:
-        graduation_time = token.get("block_time") or 0
-
+    graduation_time = graduation_ts(token)
     if not graduation_time:
         return None
 
-    # 1. Pre-graduation: last 5 min before graduation (1-min candles)
-    pre_grad_candles = fetch_ohlcv(
-        pair_address, "minute",
-        before_timestamp=graduation_time + 300,
-        limit=10,
-    )
-    time.sleep(0.5)
-    pre_grad_candles = [c for c in pre_grad_candles if c[0] < graduation_time]
-
-    # 2. Post-graduation 30-min (1-min candles)
-    post_30min_candles = fetch_ohlcv(
-        pair_address, "minute",
-        before_timestamp=graduation_time + 1800,
-        limit=60,
-    )
-    time.sleep(0.5)
-    post_30min_candles = [c for c in post_30min_candles if c[0] >= graduation_time]
-    post_30min_candles = post_30min_candles[:30]
-
-    # 3. Post-graduation 24h hourly
-    hourly_24h = token.get("hourly_prices_24h") or []
-    if not hourly_24h:
-        hourly_24h = fetch_ohlcv(
+    # 1 + 2. Pre-graduation (last 5 min) and post-graduation 30-min, 1-min candles —
+    # skipped when a previous run already stored the full post-graduation window
+    minute = store["minute"]
+    stored, _ = minute.window(pair_address, start=graduation_time, limit=POST_MINUTES)
+    if len(stored) < POST_MINUTES:
+        pre_grad_candles = fetch_ohlcv(
+            pair_address, "minute",
+            before_timestamp=graduation_time + 300,
+            limit=10,
+        )
+        pace(0.5)
+        post_30min_candles = fetch_ohlcv(
+            pair_address, "minute",
+            before_timestamp=graduation_time + 1800,
+            limit=60,
+        )
+        pace(0.5)
+        minute.append(pair_address, pre_grad_candles + post_30min_candles)
+
+    # 3. Post-graduation 24h hourly (step1 / step1_enrich may have stored them) —
+    # skipped only when the stored window is full or already reaches graduation + 24h
+    hour = store["hour"]
+    stored, _ = hour.window(pair_address, start=graduation_time, limit=HOURLY_CANDLES)
+    covered = len(stored) and stored[-1] + 3600 >= graduation_time + 86400
+    if len(stored) < HOURLY_CANDLES and not covered:
+        hour.append(pair_address, fetch_ohlcv(
             pair_address, "hour",
             before_timestamp=graduation_time + 86400,
             limit=48,
-        )
-        time.sleep(0.5)
-        hourly_24h = [c for c in hourly_24h if c[0] >= graduation_time][:24]
+        ))
+        pace(0.5)
+
+    w = {k: v.tolist() for k, v in grad_windows(store, pair_address, graduation_time).items()}
+    return price_action_from_candles(token, graduation_time, w["pre_grad"], w["post_30min"],
+                                     w["hourly_24h"])
+
+
+def price_action_from_candles(token, graduation_time, pre_grad_candles, post_30min_candles,
+                              hourly_24h):
+    """Per-token stats from the raw minute candles and the final 24h hourly candles."""
+    pair_address = token.get("pair_address")
+    pre_grad_candles = [c for c in pre_grad_candles if c[0] < graduation_time]
+    post_30min_candles = [c for c in post_30min_candles if c[0] >= graduation_time][:30]
 
     # Compute per-token stats
     grad_price = None
@@ -132,13 +155,76 @@ def analyze_token(token):
         "immediate_dump": immediate_dump,
         "price_at_24h": price_at_24h,
         "change_24h_pct": change_24h_pct,
-        "pre_grad_candles": pre_grad_candles,
-        "post_30min_candles": post_30min_candles,
-        "hourly_24h": hourly_24h,
+        "candles": {"pre_grad": len(pre_grad_candles), "post_30min": len(post_30min_candles),
+                    "hourly_24h": len(hourly_24h)},
+    }
+
+
+def day_summary(results):
+    """Counters and TDigest sketches for a set of price records (one day's, or all)."""
+    mults = [r["peak_30min_mult"] for r in results if r.get("peak_30min_mult") is not None]
+    changes_24h = [r["change_24h_pct"] for r in results if r.get("change_24h_pct") is not None]
+    counters = {
+        "tokens_analyzed": len(results),
+        "immediate_dump": sum(1 for r in results if r.get("immediate_dump")),
+        "2x_in_30min": sum(1 for r in results if (r.get("peak_30min_mult") or 0) >= 2.0),
+        "5x_in_30min": sum(1 for r in results if (r.get("peak_30min_mult") or 0) >= 5.0),
+        "higher_at_24h": sum(1 for r in results if (r.get("change_24h_pct") or 0) > 0),
     }
+    sketches = {
+        "peak_30min_mult": TDigest().update(mults),
+        "change_24h_pct": TDigest().update(changes_24h),
+    }
+    return counters, sketches
+
+
+def aggregate_from_summary(counters, sketches):
+    """Build the aggregate stats block from (possibly merged) counters and sketches."""
+    n = counters.get("tokens_analyzed", 0)
+    mults = sketches.get("peak_30min_mult") or TDigest()
+    changes_24h = sketches.get("change_24h_pct") or TDigest()
+    return {
+        "tokens_analyzed": n,
+        "pct_immediate_dump": round(counters.get("immediate_dump", 0) / n * 100, 2) if n else 0,
+        "pct_2x_in_30min": round(counters.get("2x_in_30min", 0) / n * 100, 2) if n else 0,
+        "pct_5x_in_30min": round(counters.get("5x_in_30min", 0) / n * 100, 2) if n else 0,
+        "median_peak_30min_multiplier": round(mults.median(), 4) if mults.count else None,
+        "median_24h_change_pct": round(changes_24h.median(), 2) if changes_24h.count else None,
+        "pct_higher_at_24h": round(counters.get("higher_at_24h", 0) / n * 100, 2) if n else 0,
+    }
+
+
+def run_aggregate(results):
+    """This run's aggregate: the summary counters, with exact medians over the in-memory records."""
+    agg = aggregate_from_summary(*day_summary(results))
+    mults = [r["peak_30min_mult"] for r in results if r.get("peak_30min_mult") is not None]
+    changes_24h = [r["change_24h_pct"] for r in results if r.get("change_24h_pct") is not None]
+    agg["median_peak_30min_multiplier"] = round(median(mults), 4) if mults else None
+    agg["median_24h_change_pct"] = round(median(changes_24h), 2) if changes_24h else None
+    return agg
+
+
+def range_aggregate(start_day, end_day):
+    """Aggregate stats across days from persisted sketches — no raw JSON is read."""
+    counters, sketches, days = load_range("step3", start_day, end_day)
+    agg = aggregate_from_summary(counters, sketches)
+    agg["days"] = days
+    return agg
 
 
 def main():
+    parser = argparse.ArgumentParser(description="Graduated token price action analysis")
+    parser.add_argument(
+        "--profile", action="store_true",
+        help="Write per-phase wall/CPU/net-wait, cProfile and tracemalloc reports to output/profile/",
+    )
+    args = parser.parse_args()
+
+    with profile_run("step3_graduated_price", args.profile):
+        run()
+
+
+def run():
     print("=" * 60)
     print("STEP 3 — Graduated token price action analysis")
     print("=" * 60)
@@ -157,47 +243,36 @@ def main():
 
     results = []
     total = len(graduated)
-    for i, token in enumerate(graduated):
-        print(f"  [{i+1}/{total}] Analyzing {token['mint'][:12]}...")
-        r = analyze_token(token)
-        if r:
-            results.append(r)
-
-        if (i + 1) % 10 == 0:
-            print(f"  Progress: {i+1}/{total} analyzed, {len(results)} with data")
-
-    # Aggregate stats
-    mults = [r["peak_30min_mult"] for r in results if r.get("peak_30min_mult") is not None]
-    changes_24h = [r["change_24h_pct"] for r in results if r.get("change_24h_pct") is not None]
-    dumps = [r for r in results if r.get("immediate_dump")]
-    two_x = [r for r in results if r.get("peak_30min_mult") and r["peak_30min_mult"] >= 2.0]
-    five_x = [r for r in results if r.get("peak_30min_mult") and r["peak_30min_mult"] >= 5.0]
-    higher_at_24h = [
-        r for r in results
-        if r.get("change_24h_pct") is not None and r["change_24h_pct"] > 0
-    ]
-
-    n = len(results)
-    agg = {
-        "tokens_analyzed": n,
-        "pct_immediate_dump": round(len(dumps) / n * 100, 2) if n else 0,
-        "pct_2x_in_30min": round(len(two_x) / n * 100, 2) if n else 0,
-        "pct_5x_in_30min": round(len(five_x) / n * 100, 2) if n else 0,
-        "median_peak_30min_multiplier": round(median(mults), 4) if mults else None,
-        "median_24h_change_pct": round(median(changes_24h), 2) if changes_24h else None,
-        "pct_higher_at_24h": round(len(higher_at_24h) / n * 100, 2) if n else 0,
-    }
+    store = open_store()
+    with METRICS.phase("step3_analyze"):
+        for i, token in enumerate(graduated):
+            print(f"  [{i+1}/{total}] Analyzing {token['mint'][:12]}...")
+            r = analyze_token(token, store)
+            if r:
+                results.append(r)
+            METRICS.add_items("step3_analyze")
+            METRICS.set_gauge("queue_depth", total - i - 1, queue="step3_analyze")
+
+            if (i + 1) % 10 == 0:
+                print(f"  Progress: {i+1}/{total} analyzed, {len(results)} with data")
+
+    agg = run_aggregate(results)
+    # One summary per launch day, so a range run refreshes each day it covered
+    launch_time = {t["mint"]: t.get("block_time") for t in graduated}
+    for day, rows in sorted(group_by_day(
+            results, lambda r: launch_time.get(r["mint"]) or r["graduation_time"]).items()):
+        print(f"Saved {save_day_summary('step3', day, *day_summary(rows))}")
 
     output = {"aggregate": agg, "tokens": results}
     out_path = "data/step3_price_action.json"
-    with open(out_path, "w") as f:
+    with open(out_path, "w") as f, METRICS.timed_op("json_write"):
         json.dump(output, f, indent=2)
     print(f"Saved {out_path}")
     print(f"\nAggregate: {agg}")
 
     # Report
     report_lines = [
-        "# Step 3 Report — Graduated Token Price Action (Jan 20, 2026)",
+        f"# Step 3 Report — Graduated Token Price Action ({day_label(launch_time.values())})",
         "",
         f"**Tokens analyzed:** {agg['tokens_analyzed']}",
         "",
@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""
+transport.py — Thread-safe pooled HTTP transport shared by rpc_call and http_get.
+
+Replaces a bare requests.Session (one urllib3 pool of 10 per host, not
+guaranteed thread-safe) with a single urllib3 PoolManager, which is:
+
+  - thread-safe — all worker threads share it directly
+  - sized per host — each host's pool matches the concurrency configured for
+    it, and blocks (up to the request timeout) instead of opening throwaway
+    connections past that size
+  - keep-alive — connections are reused for the life of the process
+  - compressed — Accept-Encoding advertises gzip/deflate (and br when the
+    brotli package is installed); bodies are decoded transparently
+
+Pools are keyed by netloc (host[:port]), so services on one host but different
+ports — e.g. mock_server.py — keep separate sizes.
+
+Hosts listed in http2_hosts go through an httpx HTTP/2 client instead, which
+multiplexes every in-flight request over one connection. This is optional: if
+httpx (with the h2 extra) is not installed those hosts fall back to HTTP/1.1.
+HTTP/2 forbids connection-specific headers (RFC 9113 §8.2.2), so those clients
+get the default headers minus HOP_BY_HOP_HEADERS.
+"""
+
+import json
+from urllib.parse import urlencode, urlsplit
+
+import urllib3
+
+try:
+    import httpx
+    import h2  # noqa: F401 — httpx needs it for http2=True
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+DEFAULT_POOL_SIZE = 10
+DEFAULT_HEADERS = {
+    "User-Agent": "Mozilla/5.0",
+    "Accept": "application/json",
+    "Connection": "keep-alive",
+}
+HOP_BY_HOP_HEADERS = {"connection", "keep-alive", "proxy-connection", "transfer-encoding",
+                      "upgrade"}
+
+
+class Response:
+    """Minimal requests-style response: status_code, content, headers, json()."""
+
+    def __init__(self, status_code, content, headers):
+        self.status_code = status_code
+        self.content = content
+        self.headers = headers
+
+    def json(self):
+        return json.loads(self.content)
+
+
+class Transport:
+    def __init__(self, pool_sizes=None, default_pool_size=DEFAULT_POOL_SIZE,
+                 http2_hosts=(), headers=None):
+        self.pool_sizes = dict(pool_sizes or {})
+        self.default_pool_size = default_pool_size
+        self.headers = dict(DEFAULT_HEADERS)
+        self.headers.update(urllib3.util.make_headers(accept_encoding=True))
+        self.headers.update(headers or {})
+
+        self.manager = urllib3.PoolManager(
+            num_pools=max(len(self.pool_sizes), 1) + 4,
+            headers=self.headers,
+            retries=False,
+        )
+
+        self.http2_clients = {}
+        if http2_hosts and HTTP2_AVAILABLE:
+            h2_headers = {k: v for k, v in self.headers.items()
+                          if k.lower() not in HOP_BY_HOP_HEADERS}
+            for host in http2_hosts:
+                size = self.pool_sizes.get(host, default_pool_size)
+                self.http2_clients[host] = httpx.Client(
+                    http2=True,
+                    headers=h2_headers,
+                    limits=httpx.Limits(max_connections=size,
+                                        max_keepalive_connections=size),
+                )
+        elif http2_hosts:
+            print("WARNING: httpx[http2] not installed — using HTTP/1.1 for all hosts")
+
+    def _pool(self, parts):
+        size = self.pool_sizes.get(parts.netloc, self.default_pool_size)
+        return self.manager.connection_from_host(
+            parts.hostname, parts.port, parts.scheme,
+            pool_kwargs={"maxsize": size, "block": True},
+        )
+
+    def request(self, method, url, params=None, json_body=None, timeout=30):
+        parts = urlsplit(url)
+        headers = {}
+        body = None
+        if json_body is not None:
+            body = json.dumps(json_body).encode()
+            headers["Content-Type"] = "application/json"
+
+        client = self.http2_clients.get(parts.netloc)
+        if client is not None:
+            r = client.request(method, url, params=params, content=body,
+                               headers=headers, timeout=timeout)
+            return Response(r.status_code, r.content, r.headers)
+
+        path = parts.path or "/"
+        query = "&".join(q for q in (parts.query, urlencode(params or {})) if q)
+        if query:
+            path = f"{path}?{query}"
+        headers = {**self.headers, **headers}
+        r = self._pool(parts).urlopen(
+            method, path, body=body, headers=headers,
+            timeout=urllib3.Timeout(total=timeout), pool_timeout=timeout, retries=False,
+            preload_content=True, decode_content=True,
+        )
+        return Response(r.status, r.data, r.headers)
+
+    def get(self, url, params=None, timeout=30):
+        return self.request("GET", url, params=params, timeout=timeout)
+
+    def post(self, url, json=None, timeout=30):
+        return self.request("POST", url, json_body=json, timeout=timeout)
+
+    def pool_stats(self):
+        """Per-netloc pool sizing (for logging)."""
+        return {
+            host: {"maxsize": size, "http2": host in self.http2_clients}
+            for host, size in self.pool_sizes.items()
+        }
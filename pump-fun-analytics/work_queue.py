@@ -0,0 +1,278 @@
+#!/usr/bin/env python3
+"""
+work_queue.py — Lease-based slot-range work queue for multi-process / multi-host scans.
+
+A slot range is split into fixed-size work units stored in SQLite
+(data/work_queue.db). Workers claim a unit under a time-limited lease, keep it
+alive with heartbeats while phases 1–2 of step1_fetch_launches run over it,
+write the unit's tokens to data/queue/unit_<id>.json and mark it done. A lease
+that stops heartbeating expires and the unit becomes claimable again, so a
+crashed worker never loses more than its current unit.
+
+Workers on other hosts share the queue by pointing --db and --out-dir at a
+shared filesystem (SQLite locking needs a filesystem with working POSIX locks).
+
+Usage:
+  python3 work_queue.py init --from-slot 394635000 --to-slot 394855000 [--unit-size 5000]
+  python3 work_queue.py init --from 2026-01-01 --to 2026-01-31
+  python3 work_queue.py worker [--id host-a-1] [--lease 300]
+  python3 work_queue.py status
+  python3 work_queue.py merge        # -> data/step1_launches.json (deduped by mint)
+"""
+
+import argparse
+import json
+import os
+import socket
+import sqlite3
+import sys
+import threading
+import time
+
+from config import CU_SCHEDULER
+from sampling import clear_sample
+from slot_time import resolve_day_shards
+from step1_fetch_launches import ScanAborted, phase1_get_slots, phase2_scan_blocks
+
+DB_PATH = "data/work_queue.db"
+OUT_DIR = "data/queue"
+UNIT_SIZE = 5_000           # slots per work unit
+LEASE_SECONDS = 300
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS units (
+    id            INTEGER PRIMARY KEY,
+    start_slot    INTEGER NOT NULL,
+    end_slot      INTEGER NOT NULL,
+    status        TEXT    NOT NULL DEFAULT 'pending',   -- pending | leased | done
+    worker        TEXT,
+    lease_expires REAL,
+    attempts      INTEGER NOT NULL DEFAULT 0,
+    output_path   TEXT,
+    tokens_found  INTEGER,
+    UNIQUE (start_slot, end_slot)
+);
+CREATE INDEX IF NOT EXISTS units_status ON units (status, lease_expires);
+"""
+
+
+# ── Queue operations ──────────────────────────────────────────────────────────
+
+def connect(db_path=DB_PATH):
+    os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+    conn = sqlite3.connect(db_path, timeout=30, isolation_level=None)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.executescript(SCHEMA)
+    return conn
+
+
+def enqueue_range(conn, start_slot, end_slot, unit_size=UNIT_SIZE):
+    """Split [start_slot, end_slot] into units; already-known units are left untouched."""
+    rows = [
+        (s, min(s + unit_size - 1, end_slot))
+        for s in range(start_slot, end_slot + 1, unit_size)
+    ]
+    conn.execute("BEGIN IMMEDIATE")
+    conn.executemany(
+        "INSERT OR IGNORE INTO units (start_slot, end_slot) VALUES (?, ?)", rows
+    )
+    conn.execute("COMMIT")
+    return len(rows)
+
+
+def claim(conn, worker, lease_seconds=LEASE_SECONDS):
+    """
+    Atomically lease the lowest pending unit (or one whose lease has expired).
+    Returns (id, start_slot, end_slot) or None when nothing is claimable.
+    """
+    now = time.time()
+    conn.execute("BEGIN IMMEDIATE")
+    row = conn.execute(
+        "SELECT id, start_slot, end_slot FROM units "
+        "WHERE status = 'pending' OR (status = 'leased' AND lease_expires < ?) "
+        "ORDER BY start_slot LIMIT 1",
+        (now,),
+    ).fetchone()
+    if row:
+        conn.execute(
+            "UPDATE units SET status = 'leased', worker = ?, lease_expires = ?, "
+            "attempts = attempts + 1 WHERE id = ?",
+            (worker, now + lease_seconds, row[0]),
+        )
+    conn.execute("COMMIT")
+    return row
+
+
+def heartbeat(conn, unit_id, worker, lease_seconds=LEASE_SECONDS):
+    """Extend the lease. Returns False if the lease was lost to another worker."""
+    cur = conn.execute(
+        "UPDATE units SET lease_expires = ? "
+        "WHERE id = ? AND worker = ? AND status = 'leased'",
+        (time.time() + lease_seconds, unit_id, worker),
+    )
+    return cur.rowcount == 1
+
+
+def complete(conn, unit_id, worker, output_path, tokens_found):
+    """Mark a unit done. Returns False if this worker no longer holds the lease."""
+    cur = conn.execute(
+        "UPDATE units SET status = 'done', output_path = ?, tokens_found = ?, "
+        "lease_expires = NULL WHERE id = ? AND worker = ? AND status = 'leased'",
+        (output_path, tokens_found, unit_id, worker),
+    )
+    return cur.rowcount == 1
+
+
+def status_counts(conn):
+    now = time.time()
+    counts = {"pending": 0, "leased": 0, "expired": 0, "done": 0}
+    for status, expires in conn.execute("SELECT status, lease_expires FROM units"):
+        if status == "leased" and expires is not None and expires < now:
+            counts["expired"] += 1
+        else:
+            counts[status] += 1
+    return counts
+
+
+# ── Worker ────────────────────────────────────────────────────────────────────
+
+class _Heartbeat(threading.Thread):
+    """Background lease renewal while a unit is being scanned."""
+
+    def __init__(self, db_path, unit_id, worker, lease_seconds):
+        super().__init__(daemon=True)
+        self.db_path, self.unit_id, self.worker = db_path, unit_id, worker
+        self.lease_seconds = lease_seconds
+        self.stop = threading.Event()
+        self.lost = False
+
+    def run(self):
+        conn = connect(self.db_path)
+        try:
+            while not self.stop.wait(self.lease_seconds / 3):
+                if not heartbeat(conn, self.unit_id, self.worker, self.lease_seconds):
+                    self.lost = True
+                    print(f"  [{self.worker}] lease lost on unit {self.unit_id}")
+                    return
+        finally:
+            conn.close()
+
+
+def run_worker(worker, db_path=DB_PATH, out_dir=OUT_DIR, lease_seconds=LEASE_SECONDS):
+    os.makedirs(out_dir, exist_ok=True)
+    conn = connect(db_path)
+    done = 0
+    while True:
+        unit = claim(conn, worker, lease_seconds)
+        if unit is None:
+            break
+        unit_id, start_slot, end_slot = unit
+        print(f"\n[{worker}] unit {unit_id}: slots {start_slot}–{end_slot}")
+
+        hb = _Heartbeat(db_path, unit_id, worker, lease_seconds)
+        hb.start()
+        lost = lambda: hb.lost       # stop spending RPC on a unit another worker now owns
+        try:
+            slots = phase1_get_slots(start_slot, end_slot, label=f"unit {unit_id}", stop=lost)
+            checkpoint = os.path.join(out_dir, f"checkpoint_{unit_id}.json")
+            tokens = (phase2_scan_blocks(slots, checkpoint_file=checkpoint, stop=lost)
+                      if slots else [])
+        except ScanAborted as e:
+            print(f"  [{worker}] abandoning unit {unit_id}: {e}")
+        finally:
+            hb.stop.set()
+            hb.join()
+
+        if hb.lost:
+            continue
+        out_path = os.path.join(out_dir, f"unit_{unit_id}.json")
+        with open(out_path, "w") as f:
+            json.dump(tokens, f)
+        if complete(conn, unit_id, worker, out_path, len(tokens)):
+            done += 1
+            print(f"[{worker}] unit {unit_id} done — {len(tokens)} tokens")
+
+    print(f"\n[{worker}] queue drained — completed {done} unit(s)")
+    CU_SCHEDULER.print_report()
+    conn.close()
+
+
+# ── Coordinator ───────────────────────────────────────────────────────────────
+
+LAUNCHES_PATH = "data/step1_launches.json"
+
+
+def merge_outputs(db_path=DB_PATH, out_path=LAUNCHES_PATH):
+    """Merge every done unit's tokens, deduplicated by mint (earliest slot wins)."""
+    conn = connect(db_path)
+    counts = status_counts(conn)
+    if counts["pending"] or counts["leased"] or counts["expired"]:
+        print(f"WARNING: merging an unfinished queue: {counts}")
+
+    merged = {}
+    for (path,) in conn.execute(
+        "SELECT output_path FROM units WHERE status = 'done' ORDER BY start_slot"
+    ):
+        with open(path) as f:
+            for tok in json.load(f):
+                prev = merged.get(tok["mint"])
+                if prev is None or tok["slot"] < prev["slot"]:
+                    merged[tok["mint"]] = tok
+    conn.close()
+
+    tokens = sorted(merged.values(), key=lambda t: t["slot"])
+    with open(out_path, "w") as f:
+        json.dump(tokens, f, indent=2)
+    if os.path.abspath(out_path) == os.path.abspath(LAUNCHES_PATH):
+        clear_sample()  # a full merged scan: an earlier --sample-rate design no longer applies
+    print(f"Merged {len(tokens)} unique tokens -> {out_path}")
+    return tokens
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Slot-range work queue for step1 scans")
+    parser.add_argument("--db", default=DB_PATH, help="SQLite queue path (shared across hosts)")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+
+    p_init = sub.add_parser("init", help="enqueue a slot or date range")
+    p_init.add_argument("--from-slot", type=int)
+    p_init.add_argument("--to-slot", type=int)
+    p_init.add_argument("--from", dest="start_day", metavar="YYYY-MM-DD")
+    p_init.add_argument("--to", dest="end_day", metavar="YYYY-MM-DD")
+    p_init.add_argument("--unit-size", type=int, default=UNIT_SIZE)
+
+    p_worker = sub.add_parser("worker", help="claim and scan units until the queue drains")
+    p_worker.add_argument("--id", default=f"{socket.gethostname()}-{os.getpid()}")
+    p_worker.add_argument("--lease", type=int, default=LEASE_SECONDS)
+    p_worker.add_argument("--out-dir", default=OUT_DIR)
+
+    sub.add_parser("status", help="print unit counts by state")
+
+    p_merge = sub.add_parser("merge", help="merge done units into step1_launches.json")
+    p_merge.add_argument("--out", default=LAUNCHES_PATH)
+
+    args = parser.parse_args()
+
+    if args.cmd == "init":
+        if args.start_day:
+            shards = resolve_day_shards(args.start_day, args.end_day or args.start_day)
+            start_slot, end_slot = shards[0]["start_slot"], shards[-1]["end_slot"]
+        elif args.from_slot is not None and args.to_slot is not None:
+            start_slot, end_slot = args.from_slot, args.to_slot
+        else:
+            print("ERROR: init needs --from-slot/--to-slot or --from/--to")
+            sys.exit(1)
+        conn = connect(args.db)
+        n = enqueue_range(conn, start_slot, end_slot, args.unit_size)
+        print(f"Enqueued {n} unit(s) covering slots {start_slot}–{end_slot}")
+        print(status_counts(conn))
+    elif args.cmd == "worker":
+        run_worker(args.id, db_path=args.db, out_dir=args.out_dir, lease_seconds=args.lease)
+    elif args.cmd == "status":
+        print(status_counts(connect(args.db)))
+    elif args.cmd == "merge":
+        merge_outputs(args.db, args.out)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,209 @@
+#!/usr/bin/env python3
+"""
+ws.py — Minimal blocking RFC 6455 websocket (client and server side), stdlib only.
+
+Enough for Solana JSON-RPC subscriptions and the mock_server.py stand-in:
+text frames, fragmentation, ping/pong, close, ws:// and wss://. One reader
+thread per connection; send() is safe to call from other threads.
+"""
+
+import base64
+import hashlib
+import os
+import socket
+import ssl
+import struct
+import threading
+import time
+from urllib.parse import urlsplit
+
+GUID = "258EAFA5-E914-47DA-95CA-C5AB0DC85B11"
+OP_CONT, OP_TEXT, OP_BINARY, OP_CLOSE, OP_PING, OP_PONG = 0x0, 0x1, 0x2, 0x8, 0x9, 0xA
+MAX_HEADER = 65536
+
+
+class ConnectionClosed(Exception):
+    pass
+
+
+def _accept_key(key):
+    return base64.b64encode(hashlib.sha1((key + GUID).encode()).digest()).decode()
+
+
+def _read_headers(sock):
+    buf = b""
+    while b"\r\n\r\n" not in buf:
+        chunk = sock.recv(4096)
+        if not chunk:
+            raise ConnectionClosed("connection closed during handshake")
+        buf += chunk
+        if len(buf) > MAX_HEADER:
+            raise ConnectionClosed("handshake headers too large")
+    head, rest = buf.split(b"\r\n\r\n", 1)
+    lines = head.decode("latin-1").split("\r\n")
+    headers = {}
+    for line in lines[1:]:
+        if ":" in line:
+            k, v = line.split(":", 1)
+            headers[k.strip().lower()] = v.strip()
+    return lines[0], headers, rest
+
+
+class WebSocket:
+    def __init__(self, sock, client=True, buffered=b""):
+        self.sock = sock
+        self.client = client          # clients mask outgoing frames
+        self.buf = bytearray(buffered)
+        self.send_lock = threading.Lock()
+        self.closed = False
+        self.last_frame = time.time()     # any frame, pongs included — liveness check
+
+    # ── Framing ──────────────────────────────────────────────────────────────
+
+    def _fill(self, n):
+        # Never consumes: a socket.timeout mid-frame leaves the buffer intact
+        while len(self.buf) < n:
+            chunk = self.sock.recv(65536)
+            if not chunk:
+                self.closed = True
+                raise ConnectionClosed("connection closed by peer")
+            self.buf += chunk
+
+    def _send_frame(self, opcode, payload):
+        header = bytes([0x80 | opcode])
+        mask_bit = 0x80 if self.client else 0
+        n = len(payload)
+        if n < 126:
+            header += bytes([mask_bit | n])
+        elif n < 1 << 16:
+            header += bytes([mask_bit | 126]) + struct.pack(">H", n)
+        else:
+            header += bytes([mask_bit | 127]) + struct.pack(">Q", n)
+        if self.client:
+            mask = os.urandom(4)
+            header += mask
+            payload = _mask_fast(payload, mask)
+        with self.send_lock:
+            self.sock.sendall(header + payload)
+
+    def _recv_frame(self):
+        self._fill(2)
+        b0, b1 = self.buf[0], self.buf[1]
+        fin, opcode = b0 & 0x80, b0 & 0x0F
+        n, pos = b1 & 0x7F, 2
+        if n == 126:
+            self._fill(4)
+            n, pos = struct.unpack_from(">H", self.buf, 2)[0], 4
+        elif n == 127:
+            self._fill(10)
+            n, pos = struct.unpack_from(">Q", self.buf, 2)[0], 10
+        mask = None
+        if b1 & 0x80:
+            self._fill(pos + 4)
+            mask, pos = bytes(self.buf[pos:pos + 4]), pos + 4
+        self._fill(pos + n)
+        payload = bytes(self.buf[pos:pos + n])
+        del self.buf[:pos + n]
+        if mask:
+            payload = _mask_fast(payload, mask)
+        self.last_frame = time.time()
+        return bool(fin), opcode, payload
+
+    # ── API ──────────────────────────────────────────────────────────────────
+
+    def send(self, text):
+        if self.closed:
+            raise ConnectionClosed("send on closed websocket")
+        self._send_frame(OP_TEXT, text.encode() if isinstance(text, str) else text)
+
+    def ping(self, data=b""):
+        self._send_frame(OP_PING, data)
+
+    def recv(self):
+        """Next text/binary message; answers pings, raises ConnectionClosed on close.
+        socket.timeout propagates (set with settimeout) so callers can heartbeat."""
+        parts = []
+        while True:
+            fin, opcode, payload = self._recv_frame()
+            if opcode == OP_PING:
+                self._send_frame(OP_PONG, payload)
+                continue
+            if opcode == OP_PONG:
+                continue
+            if opcode == OP_CLOSE:
+                self.closed = True
+                try:
+                    self._send_frame(OP_CLOSE, payload[:2])
+                except OSError:
+                    pass
+                raise ConnectionClosed("close frame received")
+            parts.append(payload)
+            if fin:
+                data = b"".join(parts)
+                return data.decode() if opcode in (OP_TEXT, OP_CONT) else data
+
+    def settimeout(self, seconds):
+        self.sock.settimeout(seconds)
+
+    def close(self):
+        if not self.closed:
+            self.closed = True
+            try:
+                self._send_frame(OP_CLOSE, struct.pack(">H", 1000))
+            except OSError:
+                pass
+        try:
+            self.sock.close()
+        except OSError:
+            pass
+
+
+def _mask_fast(payload, mask):
+    # XOR via big ints: ~100x faster than a per-byte loop for large frames
+    n = len(payload)
+    if not n:
+        return payload
+    key = (mask * (n // 4 + 1))[:n]
+    return (int.from_bytes(payload, "big") ^ int.from_bytes(key, "big")).to_bytes(n, "big")
+
+
+def connect(url, timeout=10):
+    """Open a client websocket to ws:// or wss:// url."""
+    parts = urlsplit(url)
+    secure = parts.scheme == "wss"
+    port = parts.port or (443 if secure else 80)
+    sock = socket.create_connection((parts.hostname, port), timeout=timeout)
+    if secure:
+        sock = ssl.create_default_context().wrap_socket(sock, server_hostname=parts.hostname)
+    key = base64.b64encode(os.urandom(16)).decode()
+    path = (parts.path or "/") + (f"?{parts.query}" if parts.query else "")
+    host = parts.hostname + (f":{parts.port}" if parts.port else "")
+    sock.sendall((
+        f"GET {path} HTTP/1.1\r\nHost: {host}\r\nUpgrade: websocket\r\n"
+        f"Connection: Upgrade\r\nSec-WebSocket-Key: {key}\r\n"
+        "Sec-WebSocket-Version: 13\r\n\r\n"
+    ).encode())
+    status, headers, rest = _read_headers(sock)
+    if " 101 " not in status + " ":
+        sock.close()
+        raise ConnectionClosed(f"handshake failed: {status}")
+    if headers.get("sec-websocket-accept") != _accept_key(key):
+        sock.close()
+        raise ConnectionClosed("handshake failed: bad Sec-WebSocket-Accept")
+    sock.settimeout(None)
+    return WebSocket(sock, client=True, buffered=rest)
+
+
+def accept(sock):
+    """Server side: complete the handshake on an accepted socket."""
+    _, headers, rest = _read_headers(sock)
+    key = headers.get("sec-websocket-key")
+    if not key or headers.get("upgrade", "").lower() != "websocket":
+        sock.sendall(b"HTTP/1.1 400 Bad Request\r\nContent-Length: 0\r\n\r\n")
+        sock.close()
+        raise ConnectionClosed("not a websocket upgrade")
+    sock.sendall((
+        "HTTP/1.1 101 Switching Protocols\r\nUpgrade: websocket\r\nConnection: Upgrade\r\n"
+        f"Sec-WebSocket-Accept: {_accept_key(key)}\r\n\r\n"
+    ).encode())
+    return WebSocket(sock, client=False, buffered=rest)